@@ -25,9 +25,11 @@ from twilio.rest import Client as TwilioClient
 
 from streaming.kafka_client import (
     KafkaClient, 
+    create_kafka_client,
     create_alert_triggered_message,
     KafkaMessage
 )
+from streaming.topic_router import TopicRouter
 
 logger = logging.getLogger(__name__)
 
@@ -106,14 +108,9 @@ class EmailChannel(NotificationChannel):
             msg.attach(MIMEText(text_content, 'plain'))
             msg.attach(MIMEText(html_content, 'html'))
             
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                if self.use_tls:
-                    server.starttls()
-                if self.smtp_username and self.smtp_password:
-                    server.login(self.smtp_username, self.smtp_password)
-                
-                server.send_message(msg)
+            # Send email off the event loop so other alerts keep flowing
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._send_smtp, msg)
             
             return {
                 'status': 'sent',
@@ -128,6 +125,16 @@ class EmailChannel(NotificationChannel):
                 'error': str(e)
             }
     
+    def _send_smtp(self, msg: MIMEMultipart):
+        """Blocking SMTP delivery, run in a worker thread"""
+        with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
+            if self.use_tls:
+                server.starttls()
+            if self.smtp_username and self.smtp_password:
+                server.login(self.smtp_username, self.smtp_password)
+            
+            server.send_message(msg)
+    
     async def _generate_html_content(self, alert: Alert) -> str:
         """Generate HTML email content"""
         template = """
@@ -433,16 +440,20 @@ class AlertEngine:
                  db_url: str,
                  redis_url: str = "redis://localhost:6379",
                  kafka_servers: str = "localhost:29092",
-                 smtp_config: Optional[Dict[str, Any]] = None):
+                 smtp_config: Optional[Dict[str, Any]] = None,
+                 kafka: Optional[KafkaClient] = None,
+                 router: Optional[TopicRouter] = None):
         self.db_url = db_url
         self.redis_url = redis_url
         self.kafka_servers = kafka_servers
         self.smtp_config = smtp_config or {}
         
-        # Core components
+        # Core components; a shared Kafka client and router may be injected
         self.db_pool: Optional[asyncpg.Pool] = None
         self.redis: Optional[aioredis.Redis] = None
-        self.kafka: Optional[KafkaClient] = None
+        self.kafka: Optional[KafkaClient] = kafka
+        self.router: Optional[TopicRouter] = router
+        self._owns_kafka = kafka is None
         
         # Channel handlers
         self.channel_handlers = {
@@ -483,12 +494,13 @@ class AlertEngine:
             await self.redis.ping()
             
             # Initialize Kafka
-            self.kafka = KafkaClient(
-                bootstrap_servers=self.kafka_servers,
-                redis_url=self.redis_url,
-                client_id="alert-engine"
-            )
-            await self.kafka.start()
+            if self._owns_kafka:
+                self.kafka = create_kafka_client(
+                    bootstrap_servers=self.kafka_servers,
+                    redis_url=self.redis_url,
+                    client_id="alert-engine"
+                )
+                await self.kafka.start()
             
             # Set up Kafka consumers
             await self._setup_consumers()
@@ -507,7 +519,7 @@ class AlertEngine:
         self.running = False
         
         try:
-            if self.kafka:
+            if self.kafka and self._owns_kafka:
                 await self.kafka.stop()
             if self.redis:
                 await self.redis.close()
@@ -519,46 +531,86 @@ class AlertEngine:
     
     async def _setup_consumers(self):
         """Set up Kafka consumers"""
+        if self.router:
+            self.router.register('change.detected', 'alert-engine.change-detected', 
+                                 batch_handler=self._handle_change_detected_batch)
+            self.router.register('alert.triggered', 'alert-engine.alert-triggered', 
+                                 message_handler=self._handle_alert_triggered, max_in_flight=16)
+            logger.info("Alert engine handlers registered with topic router")
+            return
+        
         await self.kafka.create_consumer(
             topics=['change.detected'],
             group_id='alert-engine-changes',
-            message_handler=self._handle_change_detected
+            batch_handler=self._handle_change_detected_batch,
+            batch_size=100,
+            batch_max_wait_ms=250
         )
         
         await self.kafka.create_consumer(
             topics=['alert.triggered'],
             group_id='alert-engine-notifications',
-            message_handler=self._handle_alert_triggered
+            message_handler=self._handle_alert_triggered,
+            max_in_flight=16
         )
         
         logger.info("Alert engine consumers set up")
     
     async def _handle_change_detected(self, message: KafkaMessage, context: Dict[str, Any]):
-        """Handle change detection events"""
+        """Handle a single change detection event"""
+        await self._handle_change_detected_batch([message], [context])
+    
+    async def _handle_change_detected_batch(self, 
+                                            messages: List[KafkaMessage], 
+                                            contexts: List[Dict[str, Any]]):
+        """Handle a batch of change detection events"""
         try:
-            data = message.data
-            config_id = data.get('config_id')
-            change_type = data.get('change_type')
-            change_details = data.get('change_details', {})
+            changes_by_config: Dict[str, List[Dict[str, Any]]] = {}
+            
+            for message in messages:
+                data = message.data
+                config_id = data.get('config_id')
+                change_type = data.get('change_type')
+                
+                if not config_id or not change_type:
+                    logger.warning("Invalid change detected message")
+                    continue
+                
+                changes_by_config.setdefault(config_id, []).append(data.get('change_details', {}))
             
-            if not config_id or not change_type:
-                logger.warning("Invalid change detected message")
+            if not changes_by_config:
                 return
             
-            # Get alert rules for this config
-            alert_rules = await self._get_alert_rules(config_id)
+            # Load alert rules for every config in the batch with one query
+            rules_by_config = await self._get_alert_rules_bulk(list(changes_by_config.keys()))
             
-            # Evaluate each rule
-            for rule in alert_rules:
-                if await self._evaluate_rule(rule, change_details):
-                    alert = await self._create_alert(config_id, rule, change_details)
-                    if alert:
-                        await self._trigger_alert(alert)
+            await asyncio.gather(*(
+                self._evaluate_config_changes(config_id, changes, rules_by_config.get(config_id, []))
+                for config_id, changes in changes_by_config.items()
+            ))
             
         except Exception as e:
-            logger.error(f"Error handling change detected: {e}")
+            logger.error(f"Error handling change detected batch: {e}")
             self.metrics['last_error'] = str(e)
     
+    async def _evaluate_config_changes(self, 
+                                       config_id: str, 
+                                       changes: List[Dict[str, Any]],
+                                       alert_rules: List[AlertRule]):
+        """Evaluate alert rules against the changes of one config, in order"""
+        for change_details in changes:
+            try:
+                # Evaluate each rule
+                for rule in alert_rules:
+                    if await self._evaluate_rule(rule, change_details):
+                        alert = await self._create_alert(config_id, rule, change_details)
+                        if alert:
+                            await self._trigger_alert(alert)
+                
+            except Exception as e:
+                logger.error(f"Error handling change detected for config {config_id}: {e}")
+                self.metrics['last_error'] = str(e)
+    
     async def _handle_alert_triggered(self, message: KafkaMessage, context: Dict[str, Any]):
         """Handle alert triggered events for notifications"""
         try:
@@ -584,33 +636,43 @@ class AlertEngine:
     
     async def _get_alert_rules(self, config_id: str) -> List[AlertRule]:
         """Get alert rules for a monitoring configuration"""
+        rules_by_config = await self._get_alert_rules_bulk([config_id])
+        return rules_by_config.get(config_id, [])
+    
+    async def _get_alert_rules_bulk(self, config_ids: List[str]) -> Dict[str, List[AlertRule]]:
+        """Get alert rules for many monitoring configurations in one query"""
         try:
             async with self.db_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT alert_rules FROM monitoring_configs WHERE id = $1
-                """, uuid.UUID(config_id))
-                
-                if row and row['alert_rules']:
-                    rules = []
-                    for rule_data in row['alert_rules']:
-                        rule = AlertRule(
-                            id=rule_data.get('id', str(uuid.uuid4())),
-                            name=rule_data.get('name', ''),
-                            conditions=rule_data.get('conditions', {}),
-                            severity=rule_data.get('severity', 'medium'),
-                            notification_channels=rule_data.get('notification_channels', []),
-                            enabled=rule_data.get('enabled', True),
-                            throttle_minutes=rule_data.get('throttle_minutes', 60),
-                            escalation_rules=rule_data.get('escalation_rules')
-                        )
-                        rules.append(rule)
-                    return rules
+                rows = await conn.fetch("""
+                    SELECT id, alert_rules FROM monitoring_configs WHERE id = ANY($1::uuid[])
+                """, [uuid.UUID(config_id) for config_id in config_ids])
                 
-                return []
+                return {
+                    str(row['id']): self._parse_alert_rules(row['alert_rules'])
+                    for row in rows
+                    if row['alert_rules']
+                }
                 
         except Exception as e:
             logger.error(f"Error getting alert rules: {e}")
-            return []
+            return {}
+    
+    def _parse_alert_rules(self, rules_data: List[Dict[str, Any]]) -> List[AlertRule]:
+        """Build AlertRule objects from the stored JSON rules"""
+        rules = []
+        for rule_data in rules_data:
+            rule = AlertRule(
+                id=rule_data.get('id', str(uuid.uuid4())),
+                name=rule_data.get('name', ''),
+                conditions=rule_data.get('conditions', {}),
+                severity=rule_data.get('severity', 'medium'),
+                notification_channels=rule_data.get('notification_channels', []),
+                enabled=rule_data.get('enabled', True),
+                throttle_minutes=rule_data.get('throttle_minutes', 60),
+                escalation_rules=rule_data.get('escalation_rules')
+            )
+            rules.append(rule)
+        return rules
     
     async def _evaluate_rule(self, rule: AlertRule, change_details: Dict[str, Any]) -> bool:
         """Evaluate if a rule matches the change"""
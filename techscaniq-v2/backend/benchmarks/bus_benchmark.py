@@ -0,0 +1,104 @@
+"""
+In-memory bus throughput benchmark
+Measures produce and end-to-end consume rates so pipeline benchmarks can budget for the bus
+
+Usage (from the backend directory):
+    python -m benchmarks.bus_benchmark --messages 200000 --keys 1000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from streaming.in_memory_bus import InMemoryBroker, InMemoryBus
+from streaming.kafka_client import KafkaMessage
+
+def _messages(count: int) -> List[KafkaMessage]:
+    timestamp = datetime.now(timezone.utc).isoformat()
+    return [
+        KafkaMessage(
+            id=f"msg-{i}",
+            timestamp=timestamp,
+            type='scan_completed',
+            source='benchmark',
+            data={'config_id': f"config-{i % 1000}", 'scan_id': f"scan-{i}"}
+        )
+        for i in range(count)
+    ]
+
+async def _run_case(name: str, messages: List[KafkaMessage], keys: int, codec_roundtrip: bool,
+                    **consumer_options) -> Dict[str, Any]:
+    url = f"memory://bench-{name}"
+    InMemoryBroker.reset(url)
+    bus = InMemoryBus(bootstrap_servers=url, codec_roundtrip=codec_roundtrip)
+    await bus.start()
+    
+    done = asyncio.Event()
+    received = 0
+    total = len(messages)
+    
+    async def on_message(message: KafkaMessage, context: Dict[str, Any]):
+        nonlocal received
+        received += 1
+        if received == total:
+            done.set()
+    
+    async def on_batch(batch: List[KafkaMessage], contexts: List[Dict[str, Any]]):
+        nonlocal received
+        received += len(batch)
+        if received >= total:
+            done.set()
+    
+    if consumer_options.get('batch_size'):
+        await bus.create_consumer(['bench'], f"bench-{name}", batch_handler=on_batch, **consumer_options)
+    else:
+        await bus.create_consumer(['bench'], f"bench-{name}", message_handler=on_message, **consumer_options)
+    
+    start = time.perf_counter()
+    for i, message in enumerate(messages):
+        await bus.produce_message('bench', message, key=f"key-{i % keys}" if keys else None)
+        if i % 5000 == 0:
+            # Give consumers a chance to run, as a real producer loop would
+            await asyncio.sleep(0)
+    produced_at = time.perf_counter()
+    
+    await done.wait()
+    finished_at = time.perf_counter()
+    await bus.stop()
+    
+    return {
+        'case': name,
+        'produce_per_s': total / (produced_at - start),
+        'end_to_end_per_s': total / (finished_at - start),
+    }
+
+async def run(count: int, keys: int, codec_roundtrip: bool) -> List[Dict[str, Any]]:
+    messages = _messages(count)
+    cases = [
+        ('single-lane', {'max_in_flight': 1, 'max_queue_size': 10000}),
+        ('8-lanes', {'max_in_flight': 8, 'max_queue_size': 10000}),
+        ('batch-500', {'batch_size': 500, 'batch_max_wait_ms': 5}),
+    ]
+    results = []
+    for name, options in cases:
+        results.append(await _run_case(name, messages, keys, codec_roundtrip, **options))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the in-memory bus')
+    parser.add_argument('--messages', type=int, default=200000, help='Messages per case')
+    parser.add_argument('--keys', type=int, default=1000, help='Distinct message keys (0 for unkeyed)')
+    parser.add_argument('--codec-roundtrip', action='store_true',
+                        help='Encode and decode every record like a real broker')
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args.messages, args.keys, args.codec_roundtrip))
+    
+    print(f"{'case':<14}{'produce msg/s':>16}{'end-to-end msg/s':>20}")
+    for row in results:
+        print(f"{row['case']:<14}{row['produce_per_s']:>16,.0f}{row['end_to_end_per_s']:>20,.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Codec and compression benchmark for Kafka payloads
+Compares encode/decode cost and bytes on the wire for synthetic scan.completed messages
+
+Usage (from the backend directory):
+    python -m benchmarks.codec_benchmark --messages 2000 --technologies 20 --pages 10
+"""
+
+import argparse
+import gzip
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import make_scan_completed_payloads
+from streaming.codecs import CodecRegistry
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    """Compressors matching the producer compression_type options that are installed"""
+    compressors: Dict[str, Callable[[bytes], bytes]] = {
+        'none': lambda data: data,
+        'gzip': lambda data: gzip.compress(data, compresslevel=6),
+    }
+    if lz4 is not None:
+        compressors['lz4'] = lz4.frame.compress
+    if zstandard is not None:
+        compressors['zstd'] = zstandard.ZstdCompressor(level=3).compress
+    return compressors
+
+def _time_per_item(func: Callable[[Any], Any], items: List[Any], repeat: int) -> float:
+    """Best-of-repeat average time per item, in microseconds"""
+    best: Optional[float] = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(items) * 1_000_000
+
+def _producer_batches(encoded: List[bytes], batch_bytes: int) -> List[bytes]:
+    """Group encoded records the way the producer accumulator fills a batch"""
+    batches: List[bytes] = []
+    current: List[bytes] = []
+    size = 0
+    for record in encoded:
+        current.append(record)
+        size += len(record)
+        if size >= batch_bytes:
+            batches.append(b''.join(current))
+            current, size = [], 0
+    if current:
+        batches.append(b''.join(current))
+    return batches
+
+def run(messages: int, technologies: int, pages: int, repeat: int, batch_bytes: int) -> List[Dict[str, Any]]:
+    payloads = make_scan_completed_payloads(messages, technologies=technologies, pages=pages)
+    registry = CodecRegistry()
+    compressors = _compressors()
+    
+    results = []
+    for name in registry.names():
+        codec = registry.get(name)
+        encoded = [codec.encode(p) for p in payloads]
+        raw_bytes = sum(len(e) for e in encoded)
+        
+        row = {
+            'codec': name,
+            'encode_us': _time_per_item(codec.encode, payloads, repeat),
+            'decode_us': _time_per_item(lambda data: registry.decode(data, codec.content_type),
+                                        encoded, repeat),
+            'avg_bytes': raw_bytes / len(encoded),
+        }
+        
+        batches = _producer_batches(encoded, batch_bytes)
+        for compression, compress in compressors.items():
+            if compression == 'none':
+                continue
+            start = time.perf_counter()
+            compressed = sum(len(compress(batch)) for batch in batches)
+            row[f'{compression}_bytes'] = compressed / len(encoded)
+            row[f'{compression}_us'] = (time.perf_counter() - start) / len(encoded) * 1_000_000
+        
+        results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Kafka payload codecs')
+    parser.add_argument('--messages', type=int, default=2000, help='Synthetic scan.completed messages')
+    parser.add_argument('--technologies', type=int, default=20, help='Technologies per scan summary')
+    parser.add_argument('--pages', type=int, default=10, help='Pages per scan summary')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (best is reported)')
+    parser.add_argument('--batch-bytes', type=int, default=16384,
+                        help='Producer batch size used when measuring compression')
+    args = parser.parse_args()
+    
+    results = run(args.messages, args.technologies, args.pages, args.repeat, args.batch_bytes)
+    compressions = [c for c in _compressors() if c != 'none']
+    
+    header = f"{'codec':<10}{'encode us':>11}{'decode us':>11}{'bytes':>9}"
+    header += ''.join(f"{c + ' bytes':>13}{c + ' us':>10}" for c in compressions)
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        line = f"{row['codec']:<10}{row['encode_us']:>11.1f}{row['decode_us']:>11.1f}{row['avg_bytes']:>9.0f}"
+        line += ''.join(f"{row[c + '_bytes']:>13.0f}{row[c + '_us']:>10.1f}" for c in compressions)
+        print(line)
+
+if __name__ == '__main__':
+    main()
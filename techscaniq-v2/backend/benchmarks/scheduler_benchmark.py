@@ -0,0 +1,125 @@
+"""
+Scan scheduler benchmark
+Schedules a large fleet of configs and replays simulated hours of ticks to measure memory and tick latency
+
+Usage (from the backend directory):
+    python -m benchmarks.scheduler_benchmark --configs 100000 --hours 6
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from pipeline.scan_scheduler import ScanScheduler, compile_schedule
+from streaming.kafka_client import LatencyTracker
+
+# Schedule mix resembling monitoring_configs: a few popular crons plus intervals
+SCHEDULES = [
+    ({'type': 'cron', 'expression': '0 */6 * * *'}, 30),
+    ({'type': 'cron', 'expression': '0 * * * *'}, 15),
+    ({'type': 'cron', 'expression': '*/15 * * * *'}, 10),
+    ({'type': 'cron', 'expression': '0 9 * * 1-5', 'timezone': 'America/New_York'}, 5),
+    ({'type': 'interval', 'minutes': 60}, 20),
+    ({'type': 'interval', 'minutes': 30}, 10),
+    ({'type': 'interval', 'minutes': 1440}, 10),
+]
+
+async def _noop(job_id: str, planned: float):
+    pass
+
+def run(configs: int, hours: float, tick_seconds: float, churn: float, seed: int,
+        jitter_window: float = 0.0) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    definitions = [definition for definition, _ in SCHEDULES]
+    weights = [weight for _, weight in SCHEDULES]
+    config_ids = [f"config-{i}" for i in range(configs)]
+    assigned = rng.choices(definitions, weights=weights, k=configs)
+    
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    
+    scheduler = ScanScheduler(_noop, jitter_window=jitter_window)
+    start = time.perf_counter()
+    scheduler.add_many((config_id, compile_schedule(definition), None)
+                       for config_id, definition in zip(config_ids, assigned))
+    bulk_add_s = time.perf_counter() - start
+    
+    current, peak = tracemalloc.get_traced_memory()
+    loaded = tracemalloc.take_snapshot()
+    scheduler_bytes = sum(stat.size_diff for stat in loaded.compare_to(baseline, 'filename'))
+    tracemalloc.stop()
+    
+    # Replay ticks in simulated time; each tick also reschedules a slice of configs
+    tick_latency = LatencyTracker(window=100000)
+    fired = 0
+    busy_ms = 0.0
+    max_due = 0
+    max_heap = len(scheduler._heap)
+    now = time.time()
+    end = now + hours * 3600
+    churn_per_tick = configs * churn * tick_seconds / 3600
+    churn_due = 0.0
+    
+    while now < end:
+        now += tick_seconds
+        tick_start = time.perf_counter()
+        due = scheduler.pop_due(now)
+        churn_due += churn_per_tick
+        if churn_due >= 1:
+            changed = rng.sample(config_ids, int(churn_due))
+            churn_due -= len(changed)
+            scheduler.add_many(
+                [(config_id, compile_schedule(rng.choices(definitions, weights=weights)[0]), None)
+                 for config_id in changed],
+                now=now
+            )
+        elapsed_ms = (time.perf_counter() - tick_start) * 1000
+        tick_latency.record(elapsed_ms)
+        if due:
+            busy_ms += elapsed_ms
+        fired += len(due)
+        max_due = max(max_due, len(due))
+        max_heap = max(max_heap, len(scheduler._heap))
+    
+    return {
+        'configs': configs,
+        'bulk_add_s': bulk_add_s,
+        'bytes_per_job': scheduler_bytes / configs,
+        'peak_mb': peak / 1e6,
+        'ticks': tick_latency.count,
+        'fired': fired,
+        'us_per_fired_job': busy_ms * 1000 / fired if fired else None,
+        'max_due_per_tick': max_due,
+        'max_heap_entries': max_heap,
+        'tick_latency': tick_latency.snapshot(),
+        'stats': scheduler.stats()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scan scheduler')
+    parser.add_argument('--configs', type=int, default=100000, help='Scheduled configs')
+    parser.add_argument('--hours', type=float, default=6, help='Simulated hours to replay')
+    parser.add_argument('--tick-seconds', type=float, default=1.0, help='Simulated time between ticks')
+    parser.add_argument('--churn', type=float, default=0.05,
+                        help='Fraction of configs rescheduled per simulated hour')
+    parser.add_argument('--jitter-window', type=float, default=0.0,
+                        help='Seconds to spread runs sharing a fire time over')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    result = run(args.configs, args.hours, args.tick_seconds, args.churn, args.seed, args.jitter_window)
+    latency = result['tick_latency']
+    
+    print(f"configs            {result['configs']:>12,}")
+    print(f"bulk add           {result['bulk_add_s']:>12.3f} s")
+    print(f"memory per job     {result['bytes_per_job']:>12.0f} B (peak {result['peak_mb']:.1f} MB)")
+    print(f"ticks              {result['ticks']:>12,}")
+    print(f"scans fired        {result['fired']:>12,} (max {result['max_due_per_tick']:,} in one tick)")
+    print(f"cost per fired job {result['us_per_fired_job']:>12.2f} us")
+    print(f"heap entries       {result['max_heap_entries']:>12,} max (compactions {result['stats']['compactions']})")
+    print(f"tick latency       p50 {latency['p50_ms']} ms, p99 {latency['p99_ms']} ms, max {latency['max_ms']} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Synthetic monitoring data for benchmarks
+Generates scan summaries shaped like the scanner output the pipeline carries
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+TECHNOLOGY_CATALOG = [
+    ('React', 'JavaScript Framework'), ('Vue.js', 'JavaScript Framework'),
+    ('Angular', 'JavaScript Framework'), ('jQuery', 'JavaScript Library'),
+    ('Lodash', 'JavaScript Library'), ('Moment.js', 'JavaScript Library'),
+    ('Nginx', 'Web Server'), ('Apache', 'Web Server'), ('Cloudflare', 'CDN'),
+    ('Fastly', 'CDN'), ('Google Analytics', 'Analytics'), ('Segment', 'Analytics'),
+    ('Hotjar', 'Analytics'), ('Stripe', 'Payment Processor'), ('PayPal', 'Payment Processor'),
+    ('WordPress', 'CMS'), ('Contentful', 'CMS'), ('Node.js', 'Programming Language'),
+    ('PHP', 'Programming Language'), ('Python', 'Programming Language'),
+    ('Bootstrap', 'UI Framework'), ('Tailwind CSS', 'UI Framework'),
+    ('Sentry', 'Monitoring'), ('Datadog', 'Monitoring'), ('Intercom', 'Live Chat'),
+    ('HubSpot', 'Marketing Automation'), ('Auth0', 'Authentication'), ('Okta', 'Authentication'),
+]
+
+PERFORMANCE_ISSUES = [
+    'render-blocking-resources', 'unminified-javascript', 'unused-css-rules',
+    'uses-long-cache-ttl', 'offscreen-images', 'large-network-payloads',
+    'dom-size', 'third-party-summary', 'legacy-javascript',
+]
+
+SECURITY_HEADERS = [
+    'strict-transport-security', 'content-security-policy', 'x-frame-options',
+    'x-content-type-options', 'referrer-policy', 'permissions-policy',
+]
+
+def make_scan_summary(rng: random.Random, technologies: int = 20, pages: int = 10) -> Dict[str, Any]:
+    """Build one realistic scan result_summary"""
+    detected = []
+    for name, category in rng.sample(TECHNOLOGY_CATALOG, min(technologies, len(TECHNOLOGY_CATALOG))):
+        detected.append({
+            'name': name,
+            'category': category,
+            'version': f"{rng.randint(1, 18)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}",
+            'confidence': round(rng.uniform(0.5, 1.0), 3),
+            'evidence': [f"script[src*='{name.lower().replace(' ', '-')}']", 'header:x-powered-by'],
+        })
+    
+    vulnerabilities = []
+    for _ in range(rng.randint(0, 4)):
+        vulnerabilities.append({
+            'id': f"VULN-{rng.randint(1000, 9999)}",
+            'type': rng.choice(['xss', 'outdated-library', 'mixed-content', 'open-redirect']),
+            'severity': rng.choice(['low', 'medium', 'high', 'critical']),
+            'description': 'Detected a known issue in a third-party dependency loaded on this page',
+            'cve_ids': [f"CVE-2024-{rng.randint(10000, 99999)}"],
+            'remediation': 'Upgrade the affected dependency to the latest patched release',
+        })
+    
+    started = datetime.now(timezone.utc) - timedelta(seconds=rng.randint(30, 600))
+    return {
+        'technologies': {
+            'detected': detected,
+            'total': len(detected),
+        },
+        'performance': {
+            'load_time': rng.randint(400, 6000),
+            'ttfb': rng.randint(40, 900),
+            'fcp': rng.randint(300, 3000),
+            'lcp': rng.randint(600, 7000),
+            'cls': round(rng.uniform(0, 0.4), 3),
+            'fid': rng.randint(5, 300),
+            'lighthouse_score': rng.randint(20, 100),
+            'issues': rng.sample(PERFORMANCE_ISSUES, rng.randint(0, 5)),
+        },
+        'security': {
+            'vulnerabilities': vulnerabilities,
+            'security_headers': {
+                header: rng.choice(['present', 'missing', 'misconfigured'])
+                for header in SECURITY_HEADERS
+            },
+            'ssl': {'grade': rng.choice(['A+', 'A', 'B', 'C']), 'expires_in_days': rng.randint(1, 365)},
+        },
+        'pages': [
+            {
+                'url': f"https://example-{rng.randint(1, 999)}.com/{segment}",
+                'status': rng.choice([200, 200, 200, 301, 404]),
+                'bytes': rng.randint(10_000, 3_000_000),
+                'requests': rng.randint(10, 250),
+            }
+            for segment in (f"page-{i}" for i in range(pages))
+        ],
+        'started_at': started.isoformat(),
+        'duration_ms': rng.randint(30_000, 600_000),
+        'scanner_version': '2.4.1',
+    }
+
+def make_scan_completed_payloads(count: int, seed: int = 42, **summary_kwargs) -> List[Dict[str, Any]]:
+    """Build scan.completed message dicts as they are handed to the codec"""
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        scan_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        payloads.append({
+            'id': scan_id,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'type': 'scan_completed',
+            'source': 'scanner',
+            'data': {
+                'config_id': str(uuid.UUID(int=rng.getrandbits(128))),
+                'scan_id': scan_id,
+                'result_summary': make_scan_summary(rng, **summary_kwargs),
+                'full_result_url': None,
+                'completed_at': datetime.now(timezone.utc).isoformat(),
+            },
+            'metadata': None,
+        })
+    return payloads
@@ -0,0 +1,111 @@
+"""
+Technology diff benchmark
+Times the change detector's technology diff against the previous per-name rescan on stacks of growing size
+
+Usage (from the backend directory):
+    python -m benchmarks.tech_diff_benchmark --sizes 10 100 500 1000 2000
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import TECHNOLOGY_CATALOG
+from detection.tech_diff import diff_technologies
+
+def make_stack_pair(rng: random.Random, size: int, churn: float) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Old and new detections of size technologies, with churn of them added, removed or re-versioned"""
+    old = []
+    for i in range(size):
+        name, category = TECHNOLOGY_CATALOG[i % len(TECHNOLOGY_CATALOG)]
+        old.append({
+            'name': f"{name} {i // len(TECHNOLOGY_CATALOG)}" if i >= len(TECHNOLOGY_CATALOG) else name,
+            'category': category,
+            'version': f"{rng.randint(1, 18)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}",
+            'confidence': round(rng.uniform(0.5, 1.0), 3),
+        })
+
+    new = []
+    for tech in old:
+        roll = rng.random()
+        if roll < churn / 3:
+            continue
+        if roll < churn * 2 / 3:
+            tech = dict(tech, version=f"{rng.randint(19, 30)}.0.0")
+        new.append(tech)
+    for i in range(int(size * churn / 3)):
+        new.append({'name': f"Added {i}", 'category': 'Other', 'version': '1.0.0', 'confidence': 0.9})
+    rng.shuffle(new)
+    return old, new
+
+def legacy_diff(old_detected: List[Dict[str, Any]], new_detected: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """The diff as ChangeDetector did it before detection.tech_diff, without impact assessment"""
+    old_keys = {(t['name'], t.get('version', '')): t for t in old_detected}
+    new_keys = {(t['name'], t.get('version', '')): t for t in new_detected}
+    old_names = {name for name, _ in old_keys}
+    new_names = {name for name, _ in new_keys}
+
+    changes = []
+    for name in new_names - old_names:
+        next(t for t in new_detected if t['name'] == name)
+        changes.append(('added', name))
+    for name in old_names - new_names:
+        next(t for t in old_detected if t['name'] == name)
+        changes.append(('removed', name))
+    for name in old_names & new_names:
+        old_version = next(t for t in old_detected if t['name'] == name).get('version', '')
+        new_version = next(t for t in new_detected if t['name'] == name).get('version', '')
+        if old_version and new_version and old_version != new_version:
+            changes.append(('version_changed', name))
+    return changes
+
+def _time_per_call(func: Callable[[Any, Any], Any], pairs: List[Tuple[Any, Any]], repeat: int) -> float:
+    """Best-of-repeat average time per diff, in microseconds"""
+    best: Optional[float] = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for old, new in pairs:
+            func(old, new)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(pairs) * 1_000_000
+
+def run(sizes: List[int], pairs: int, churn: float, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        stacks = [make_stack_pair(rng, size, churn) for _ in range(pairs)]
+        legacy_us = _time_per_call(legacy_diff, stacks, repeat)
+        diff_us = _time_per_call(diff_technologies, stacks, repeat)
+        results.append({
+            'size': size,
+            'changes': sum(len(diff_technologies(old, new)) for old, new in stacks) / len(stacks),
+            'legacy_us': legacy_us,
+            'diff_us': diff_us,
+            'speedup': legacy_us / diff_us if diff_us else float('inf'),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the technology stack diff')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200, 500, 1000, 2000],
+                        help='Detections per scan')
+    parser.add_argument('--pairs', type=int, default=20, help='Scan pairs diffed per size')
+    parser.add_argument('--churn', type=float, default=0.1,
+                        help='Fraction of technologies added, removed or re-versioned between scans')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (best is reported)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.pairs, args.churn, args.repeat, args.seed)
+
+    header = f"{'size':>6}{'changes':>9}{'legacy us':>12}{'diff us':>10}{'speedup':>9}"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        print(f"{row['size']:>6}{row['changes']:>9.1f}{row['legacy_us']:>12.1f}"
+              f"{row['diff_us']:>10.1f}{row['speedup']:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+-- TechScanIQ Queue Metrics: consumer lag and handler latency
+-- Migration: 003_queue_metrics_lag.sql
+-- Description: Extends queue_metrics with per-consumer-group lag and processing-time percentiles
+
+ALTER TABLE queue_metrics
+    ADD COLUMN IF NOT EXISTS consumer_group VARCHAR(255), -- NULL for producer-side rows
+    ADD COLUMN IF NOT EXISTS client_id VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS max_partition_lag INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS partition_lag JSONB DEFAULT '{}', -- {"<partition>": lag}
+    ADD COLUMN IF NOT EXISTS p50_processing_time_ms DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS p95_processing_time_ms DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS p99_processing_time_ms DOUBLE PRECISION;
+
+-- Lag per consumer group over time
+CREATE INDEX IF NOT EXISTS idx_queue_metrics_group_time ON queue_metrics (consumer_group, queue_name, time DESC);
+
+-- Latest lag per topic and consumer group, for scaling decisions
+CREATE OR REPLACE VIEW queue_lag_latest AS
+SELECT DISTINCT ON (queue_name, consumer_group)
+    queue_name,
+    consumer_group,
+    time,
+    queue_depth AS total_lag,
+    max_partition_lag,
+    partition_lag,
+    throughput_per_second,
+    p95_processing_time_ms
+FROM queue_metrics
+WHERE consumer_group IS NOT NULL
+  AND time > NOW() - INTERVAL '1 hour'
+ORDER BY queue_name, consumer_group, time DESC;
+
+-- Five-minute lag and throughput rollup
+CREATE OR REPLACE FUNCTION get_queue_lag_trend(
+    p_queue_name VARCHAR(100),
+    p_consumer_group VARCHAR(255),
+    p_hours INTEGER DEFAULT 6
+)
+RETURNS TABLE (
+    bucket TIMESTAMPTZ,
+    avg_lag DOUBLE PRECISION,
+    max_lag INTEGER,
+    consumed BIGINT,
+    avg_throughput DOUBLE PRECISION,
+    max_p95_processing_time_ms DOUBLE PRECISION
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        time_bucket('5 minutes', qm.time) AS bucket,
+        AVG(qm.queue_depth)::DOUBLE PRECISION AS avg_lag,
+        MAX(qm.max_partition_lag) AS max_lag,
+        SUM(qm.messages_consumed)::BIGINT AS consumed,
+        AVG(qm.throughput_per_second) AS avg_throughput,
+        MAX(qm.p95_processing_time_ms) AS max_p95_processing_time_ms
+    FROM queue_metrics qm
+    WHERE qm.queue_name = p_queue_name
+      AND qm.consumer_group = p_consumer_group
+      AND qm.time > NOW() - INTERVAL '1 hour' * p_hours
+    GROUP BY 1
+    ORDER BY 1;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON VIEW queue_lag_latest IS 'Most recent consumer lag per topic and consumer group';
+COMMENT ON FUNCTION get_queue_lag_trend IS 'Five-minute consumer lag and throughput trend for a topic and group';
@@ -0,0 +1,55 @@
+-- TechScanIQ Monitoring: config change feed
+-- Migration: 004_config_change_feed.sql
+-- Description: Tracks definition changes to monitoring_configs and announces them over LISTEN/NOTIFY
+
+-- updated_at is also bumped by next_scan_at bookkeeping, so definition changes get their own watermark
+ALTER TABLE monitoring_configs
+    ADD COLUMN IF NOT EXISTS definition_updated_at TIMESTAMPTZ DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_monitoring_configs_definition_updated ON monitoring_configs(definition_updated_at);
+
+-- Bump definition_updated_at only when a column that affects scheduling or alerting changes
+CREATE OR REPLACE FUNCTION track_monitoring_config_definition()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        NEW.definition_updated_at := clock_timestamp();
+    ELSIF (NEW.organization_id, NEW.name, NEW.url, NEW.schedule, NEW.scan_config, NEW.alert_rules, NEW.enabled)
+          IS DISTINCT FROM
+          (OLD.organization_id, OLD.name, OLD.url, OLD.schedule, OLD.scan_config, OLD.alert_rules, OLD.enabled) THEN
+        NEW.definition_updated_at := clock_timestamp();
+    END IF;
+    
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS monitoring_configs_track_definition ON monitoring_configs;
+CREATE TRIGGER monitoring_configs_track_definition
+    BEFORE INSERT OR UPDATE ON monitoring_configs
+    FOR EACH ROW
+    EXECUTE FUNCTION track_monitoring_config_definition();
+
+-- Notify listeners with {"op": "insert|update|delete", "id": "<config id>"} after definition changes
+CREATE OR REPLACE FUNCTION notify_monitoring_config_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('monitoring_config_changes', json_build_object('op', 'delete', 'id', OLD.id)::text);
+    ELSIF TG_OP = 'INSERT' THEN
+        PERFORM pg_notify('monitoring_config_changes', json_build_object('op', 'insert', 'id', NEW.id)::text);
+    ELSIF NEW.definition_updated_at IS DISTINCT FROM OLD.definition_updated_at THEN
+        PERFORM pg_notify('monitoring_config_changes', json_build_object('op', 'update', 'id', NEW.id)::text);
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS monitoring_configs_notify_change ON monitoring_configs;
+CREATE TRIGGER monitoring_configs_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON monitoring_configs
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_monitoring_config_change();
+
+COMMENT ON COLUMN monitoring_configs.definition_updated_at IS 'Last change to the definition (schedule, scan config, alert rules, enabled); watermark for incremental reloads';
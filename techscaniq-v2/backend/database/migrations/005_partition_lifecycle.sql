@@ -0,0 +1,255 @@
+-- TechScanIQ Monitoring: partition lifecycle
+-- Migration: 005_partition_lifecycle.sql
+-- Description: Monthly range partitions for scan results, changes, alerts and notifications, kept ahead and retired by policy
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+-- One row per partitioned table: how far ahead partitions exist and how long attached ones are kept
+CREATE TABLE IF NOT EXISTS partition_policies (
+    parent_table VARCHAR(63) PRIMARY KEY,
+    partition_column VARCHAR(63) NOT NULL,
+    premake_months INTEGER NOT NULL DEFAULT 3, -- Future months kept created, beyond the current one
+    retention INTERVAL NOT NULL, -- Partitions ending before NOW() - retention are detached into the archive schema
+    archive_retention INTERVAL, -- Archived partitions are dropped this long after detaching; NULL keeps them
+    enabled BOOLEAN DEFAULT true,
+    last_maintained_at TIMESTAMPTZ,
+    
+    CONSTRAINT valid_premake CHECK (premake_months >= 1),
+    CONSTRAINT valid_retention CHECK (retention > INTERVAL '0')
+);
+
+-- Detached partitions, so archived ranges stay known after they leave the parent
+CREATE TABLE IF NOT EXISTS archived_partitions (
+    partition_name VARCHAR(63) PRIMARY KEY,
+    parent_table VARCHAR(63) NOT NULL,
+    range_start TIMESTAMPTZ, -- NULL for a partition from MINVALUE
+    range_end TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    dropped_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_archived_partitions_pending_drop ON archived_partitions(archived_at) WHERE dropped_at IS NULL;
+
+INSERT INTO partition_policies (parent_table, partition_column, premake_months, retention) VALUES
+    ('scan_results', 'scan_timestamp', 3, INTERVAL '13 months'),
+    ('technology_changes', 'detected_at', 3, INTERVAL '25 months'),
+    ('performance_changes', 'detected_at', 3, INTERVAL '13 months'),
+    ('security_changes', 'detected_at', 3, INTERVAL '25 months'),
+    ('monitoring_alerts', 'triggered_at', 3, INTERVAL '13 months'),
+    ('alert_notifications', 'created_at', 3, INTERVAL '6 months')
+ON CONFLICT (parent_table) DO NOTHING;
+
+-- Attached partitions of a table with their range; NULL bounds stand for MINVALUE / MAXVALUE
+CREATE OR REPLACE FUNCTION partition_ranges(p_parent TEXT)
+RETURNS TABLE (partition_name TEXT, range_start TIMESTAMPTZ, range_end TIMESTAMPTZ, detach_pending BOOLEAN) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        c.relname::TEXT,
+        NULLIF(substring(pg_get_expr(c.relpartbound, c.oid) FROM 'FROM \(''([^'']+)''\)'), '')::TIMESTAMPTZ,
+        NULLIF(substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)'), '')::TIMESTAMPTZ,
+        i.inhdetachpending
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = p_parent::regclass
+    ORDER BY 3 NULLS LAST;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Create the monthly partition starting at p_start (UTC month), named <parent>_YYYY_MM
+CREATE OR REPLACE FUNCTION create_monthly_partition(p_parent TEXT, p_start TIMESTAMPTZ)
+RETURNS TEXT AS $$
+DECLARE
+    month_start TIMESTAMPTZ := date_trunc('month', p_start AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    partition_name TEXT := p_parent || '_' || to_char(p_start AT TIME ZONE 'UTC', 'YYYY_MM');
+BEGIN
+    -- Indexes and row triggers are inherited from the parent
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                   partition_name, p_parent, month_start, month_start + INTERVAL '1 month');
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create every missing month from the end of the newest partition through premake_months ahead
+CREATE OR REPLACE FUNCTION premake_partitions(p_parent TEXT, p_premake_months INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    current_month TIMESTAMPTZ := date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    horizon TIMESTAMPTZ := current_month + INTERVAL '1 month' * (p_premake_months + 1);
+    next_start TIMESTAMPTZ;
+    created INTEGER := 0;
+BEGIN
+    SELECT MAX(range_end) INTO next_start FROM partition_ranges(p_parent);
+    next_start := COALESCE(next_start, current_month);
+    
+    WHILE next_start < horizon LOOP
+        PERFORM create_monthly_partition(p_parent, next_start);
+        next_start := next_start + INTERVAL '1 month';
+        created := created + 1;
+    END LOOP;
+    
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Attached partitions whose whole range is older than their table's retention
+CREATE OR REPLACE FUNCTION expired_partitions()
+RETURNS TABLE (parent_table TEXT, partition_name TEXT, range_start TIMESTAMPTZ, range_end TIMESTAMPTZ, detach_pending BOOLEAN) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT p.parent_table::TEXT, r.partition_name, r.range_start, r.range_end, r.detach_pending
+    FROM partition_policies p
+    CROSS JOIN LATERAL partition_ranges(p.parent_table) r
+    WHERE p.enabled
+      AND r.range_end IS NOT NULL
+      AND r.range_end <= NOW() - p.retention
+    ORDER BY r.range_end;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Turn a plain table into one partitioned by month on p_column. The existing table is kept,
+-- as <table>_legacy, for a single partition covering everything up to the month after its newest row.
+CREATE OR REPLACE FUNCTION convert_to_monthly_partitions(p_table TEXT, p_column TEXT)
+RETURNS void AS $$
+DECLARE
+    legacy TEXT := p_table || '_legacy';
+    legacy_end TIMESTAMPTZ;
+    idx RECORD;
+    fk RECORD;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = p_table::regclass) THEN
+        RETURN;
+    END IF;
+    
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_table, legacy);
+    
+    -- Free the index names for the partitioned table; matching legacy indexes are attached, not rebuilt
+    FOR idx IN
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = legacy::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', idx.relname, left(idx.relname, 56) || '_legacy');
+    END LOOP;
+    
+    -- Range partitions have no place for NULL keys
+    EXECUTE format('UPDATE %I SET %I = NOW() WHERE %I IS NULL', legacy, p_column, p_column);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', legacy, p_column);
+    EXECUTE format('SELECT GREATEST(date_trunc(''month'', NOW() AT TIME ZONE ''UTC''), date_trunc(''month'', MAX(%I) AT TIME ZONE ''UTC'')) AT TIME ZONE ''UTC'' + INTERVAL ''1 month'' FROM %I',
+                   p_column, legacy) INTO legacy_end;
+    
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS) PARTITION BY RANGE (%I)',
+                   p_table, legacy, p_column);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', p_table, p_column);
+    
+    -- Unique constraints on a partitioned table must include the partition column
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, %I)', p_table, p_column);
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (MINVALUE) TO (%L)',
+                   p_table, legacy, legacy_end);
+    
+    -- LIKE does not copy foreign keys; recreating them on the parent adopts the legacy ones
+    FOR fk IN
+        SELECT conname, pg_get_constraintdef(oid) AS definition FROM pg_constraint
+        WHERE conrelid = legacy::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s', p_table, fk.conname, fk.definition);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions are detached and archived on their own, so nothing may reference rows in them.
+-- Foreign keys to monitoring_configs stay.
+ALTER TABLE technology_changes DROP CONSTRAINT IF EXISTS technology_changes_scan_id_fkey;
+ALTER TABLE performance_changes DROP CONSTRAINT IF EXISTS performance_changes_scan_id_fkey;
+ALTER TABLE security_changes DROP CONSTRAINT IF EXISTS security_changes_scan_id_fkey;
+ALTER TABLE alert_notifications DROP CONSTRAINT IF EXISTS alert_notifications_alert_id_fkey;
+
+SELECT convert_to_monthly_partitions('technology_changes', 'detected_at');
+SELECT convert_to_monthly_partitions('performance_changes', 'detected_at');
+SELECT convert_to_monthly_partitions('security_changes', 'detected_at');
+SELECT convert_to_monthly_partitions('monitoring_alerts', 'triggered_at');
+SELECT convert_to_monthly_partitions('alert_notifications', 'created_at');
+
+-- Indexes from 001, now per partition, so (config_id, <time> DESC) scans only touch the months they need
+CREATE INDEX IF NOT EXISTS idx_technology_changes_config_detected ON technology_changes(config_id, detected_at DESC);
+CREATE INDEX IF NOT EXISTS idx_technology_changes_type ON technology_changes(change_type);
+CREATE INDEX IF NOT EXISTS idx_technology_changes_unacknowledged ON technology_changes(config_id) WHERE acknowledged = false;
+CREATE INDEX IF NOT EXISTS idx_technology_changes_technology ON technology_changes(technology_name);
+
+CREATE INDEX IF NOT EXISTS idx_performance_changes_config_detected ON performance_changes(config_id, detected_at DESC);
+CREATE INDEX IF NOT EXISTS idx_performance_changes_metric ON performance_changes(metric_name);
+CREATE INDEX IF NOT EXISTS idx_performance_changes_severity ON performance_changes(severity);
+CREATE INDEX IF NOT EXISTS idx_performance_changes_unacknowledged ON performance_changes(config_id) WHERE acknowledged = false;
+
+CREATE INDEX IF NOT EXISTS idx_security_changes_config_detected ON security_changes(config_id, detected_at DESC);
+CREATE INDEX IF NOT EXISTS idx_security_changes_severity ON security_changes(severity);
+CREATE INDEX IF NOT EXISTS idx_security_changes_unresolved ON security_changes(config_id) WHERE resolved = false;
+CREATE INDEX IF NOT EXISTS idx_security_changes_cve ON security_changes USING GIN(cve_ids);
+
+CREATE INDEX IF NOT EXISTS idx_monitoring_alerts_config_triggered ON monitoring_alerts(config_id, triggered_at DESC);
+CREATE INDEX IF NOT EXISTS idx_monitoring_alerts_severity ON monitoring_alerts(severity);
+CREATE INDEX IF NOT EXISTS idx_monitoring_alerts_unresolved ON monitoring_alerts(config_id) WHERE resolved = false;
+CREATE INDEX IF NOT EXISTS idx_monitoring_alerts_notification_pending ON monitoring_alerts(triggered_at)
+    WHERE notification_sent = false AND notification_attempts < 3;
+
+CREATE INDEX IF NOT EXISTS idx_alert_notifications_alert_id ON alert_notifications(alert_id);
+CREATE INDEX IF NOT EXISTS idx_alert_notifications_status ON alert_notifications(status);
+CREATE INDEX IF NOT EXISTS idx_alert_notifications_failed ON alert_notifications(created_at) WHERE status = 'failed';
+
+-- Views bind to tables, not names, so re-point the one that read the renamed tables
+CREATE OR REPLACE VIEW recent_changes_summary AS
+SELECT
+    mc.id as config_id,
+    mc.name as config_name,
+    mc.url,
+    COUNT(tc.id) as technology_changes,
+    COUNT(pc.id) as performance_changes,
+    COUNT(sc.id) as security_changes,
+    MAX(GREATEST(
+        COALESCE(tc.detected_at, '1970-01-01'::timestamptz),
+        COALESCE(pc.detected_at, '1970-01-01'::timestamptz),
+        COALESCE(sc.detected_at, '1970-01-01'::timestamptz)
+    )) as last_change_at
+FROM monitoring_configs mc
+LEFT JOIN technology_changes tc ON mc.id = tc.config_id
+    AND tc.detected_at > NOW() - INTERVAL '24 hours'
+LEFT JOIN performance_changes pc ON mc.id = pc.config_id
+    AND pc.detected_at > NOW() - INTERVAL '24 hours'
+LEFT JOIN security_changes sc ON mc.id = sc.config_id
+    AND sc.detected_at > NOW() - INTERVAL '24 hours'
+WHERE mc.enabled = true
+GROUP BY mc.id, mc.name, mc.url;
+
+-- The 001 helpers now go through the generic ones. Partitions are whole UTC months,
+-- so create_scan_results_partition only accepts a range of exactly one calendar month.
+CREATE OR REPLACE FUNCTION create_scan_results_partition(start_date DATE, end_date DATE)
+RETURNS void AS $$
+BEGIN
+    IF start_date <> date_trunc('month', start_date::TIMESTAMP)::DATE OR end_date <> (start_date + INTERVAL '1 month')::DATE THEN
+        RAISE EXCEPTION 'scan_results partitions are monthly: % to % is not one calendar month', start_date, end_date;
+    END IF;
+    
+    PERFORM create_monthly_partition('scan_results', start_date::TIMESTAMP AT TIME ZONE 'UTC');
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_scan_results_partitions()
+RETURNS void AS $$
+BEGIN
+    PERFORM premake_partitions(parent_table, premake_months)
+    FROM partition_policies
+    WHERE enabled;
+    
+    UPDATE partition_policies SET last_maintained_at = NOW() WHERE enabled;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cover the current month and those ahead right away; the pipeline keeps it that way
+SELECT premake_partitions(parent_table, premake_months) FROM partition_policies WHERE enabled;
+
+COMMENT ON TABLE technology_changes IS 'Detected changes in technology stack over time, partitioned by month of detected_at';
+COMMENT ON TABLE performance_changes IS 'Detected changes in performance metrics, partitioned by month of detected_at';
+COMMENT ON TABLE security_changes IS 'Detected security-related changes and vulnerabilities, partitioned by month of detected_at';
+COMMENT ON TABLE monitoring_alerts IS 'Alert instances triggered by monitoring rules, partitioned by month of triggered_at';
+COMMENT ON TABLE alert_notifications IS 'Log of notification attempts for alerts, partitioned by month of created_at';
+COMMENT ON TABLE partition_policies IS 'Premake horizon and retention of each monthly partitioned table, applied by the pipeline';
+COMMENT ON TABLE archived_partitions IS 'Partitions detached past retention into the archive schema';
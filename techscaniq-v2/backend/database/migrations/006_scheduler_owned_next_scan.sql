@@ -0,0 +1,23 @@
+-- TechScanIQ Monitoring: scheduler-owned next_scan_at
+-- Migration: 006_scheduler_owned_next_scan.sql
+-- Description: Stops completed scans from overwriting the next_scan_at the scheduler resumes from
+
+-- The scheduler writes next_scan_at with spread and adaptive offsets and resumes from it after a
+-- restart, so a completed scan only moves last_scan_at forward. The 001 version reset next_scan_at
+-- to NOW() + interval (or + 1 hour for cron) on every completed insert, fan-out copies included.
+CREATE OR REPLACE FUNCTION trigger_update_next_scan()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.status = 'completed' THEN
+        UPDATE monitoring_configs
+        SET last_scan_at = NEW.scan_timestamp
+        WHERE id = NEW.config_id
+          AND (last_scan_at IS NULL OR last_scan_at < NEW.scan_timestamp);
+    END IF;
+    
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION trigger_update_next_scan() IS 'Records last_scan_at for completed scans; next_scan_at belongs to the scheduler';
+COMMENT ON FUNCTION update_next_scan_time(UUID) IS 'Schedule-only estimate of next_scan_at for manual use; no longer called on scan completion';
@@ -19,13 +19,39 @@ import aioredis
 from deepdiff import DeepDiff
 
 from streaming.kafka_client import (
+    CONFIG_ID_HEADER,
     KafkaClient, 
+    create_kafka_client,
     create_change_detected_message,
-    KafkaMessage
+    KafkaMessage,
+    ProduceRecord
 )
+from streaming.topic_router import TopicRouter
+from streaming.blob_store import ClaimCheck, create_blob_store
+from detection.snapshot_store import SnapshotStore, snapshot_from_row
+from detection.tech_diff import diff_technologies
 
 logger = logging.getLogger(__name__)
 
+# Table and copied columns per change type; columns not listed keep their defaults
+CHANGE_TABLES = {
+    'technology_change': ('technology_changes', [
+        'id', 'config_id', 'scan_id', 'detected_at', 'change_type',
+        'technology_name', 'technology_category', 'old_version',
+        'new_version', 'confidence_score', 'evidence', 'impact_assessment'
+    ]),
+    'performance_change': ('performance_changes', [
+        'id', 'config_id', 'scan_id', 'detected_at', 'metric_name',
+        'old_value', 'new_value', 'change_percent', 'threshold_exceeded',
+        'severity', 'evidence'
+    ]),
+    'security_change': ('security_changes', [
+        'id', 'config_id', 'scan_id', 'detected_at', 'change_type',
+        'vulnerability_type', 'severity', 'description', 'evidence',
+        'cve_ids', 'remediation_advice'
+    ])
+}
+
 @dataclass
 class ChangeDetection:
     """Result of change detection analysis"""
@@ -78,15 +104,28 @@ class ChangeDetector:
     def __init__(self, 
                  db_url: str,
                  redis_url: str = "redis://localhost:6379",
-                 kafka_servers: str = "localhost:29092"):
+                 kafka_servers: str = "localhost:29092",
+                 kafka: Optional[KafkaClient] = None,
+                 router: Optional[TopicRouter] = None,
+                 claim_check: Optional[ClaimCheck] = None,
+                 snapshot_capacity: int = 10000):
         self.db_url = db_url
         self.redis_url = redis_url
         self.kafka_servers = kafka_servers
         
-        # Core components
+        # Core components; a shared Kafka client and router may be injected
         self.db_pool: Optional[asyncpg.Pool] = None
         self.redis: Optional[aioredis.Redis] = None
-        self.kafka: Optional[KafkaClient] = None
+        self.kafka: Optional[KafkaClient] = kafka
+        self.router: Optional[TopicRouter] = router
+        self._owns_kafka = kafka is None
+        
+        # Large scan summaries arrive as claim-check references to the blob store
+        self.claim_check = claim_check or ClaimCheck(create_blob_store())
+        
+        # Latest scan of each config, to compare the next one against without reading scan_results
+        self.snapshot_capacity = snapshot_capacity
+        self.snapshots: Optional[SnapshotStore] = None
         
         # Configuration
         self.noise_filters = self._load_noise_filters()
@@ -100,6 +139,8 @@ class ChangeDetector:
             'security_changes': 0,
             'false_positives_filtered': 0,
             'processing_time_total_ms': 0,
+            'change_publish_failures': 0,
+            'previous_scan_db_lookups': 0,
             'last_error': None
         }
         
@@ -122,13 +163,21 @@ class ChangeDetector:
             self.redis = aioredis.from_url(self.redis_url)
             await self.redis.ping()
             
+            # Warm the snapshot store; configs it misses are looked up on first use
+            self.snapshots = SnapshotStore(self.redis, self.claim_check, capacity=self.snapshot_capacity)
+            try:
+                await self.snapshots.warm(self.db_pool)
+            except Exception as e:
+                logger.error(f"Failed to warm scan snapshots: {e}")
+            
             # Initialize Kafka
-            self.kafka = KafkaClient(
-                bootstrap_servers=self.kafka_servers,
-                redis_url=self.redis_url,
-                client_id="change-detector"
-            )
-            await self.kafka.start()
+            if self._owns_kafka:
+                self.kafka = create_kafka_client(
+                    bootstrap_servers=self.kafka_servers,
+                    redis_url=self.redis_url,
+                    client_id="change-detector"
+                )
+                await self.kafka.start()
             
             # Set up Kafka consumers
             await self._setup_consumers()
@@ -147,7 +196,7 @@ class ChangeDetector:
         self.running = False
         
         try:
-            if self.kafka:
+            if self.kafka and self._owns_kafka:
                 await self.kafka.stop()
             if self.redis:
                 await self.redis.close()
@@ -159,55 +208,159 @@ class ChangeDetector:
     
     async def _setup_consumers(self):
         """Set up Kafka consumers"""
+        if self.router:
+            self.router.register('scan.completed', 'change-detector.scan-completed', 
+                                 batch_handler=self._handle_scan_completed_batch)
+            logger.info("Change detector handlers registered with topic router")
+            return
+        
         await self.kafka.create_consumer(
             topics=['scan.completed'],
             group_id='change-detector',
-            message_handler=self._handle_scan_completed
+            batch_handler=self._handle_scan_completed_batch,
+            batch_size=100,
+            batch_max_wait_ms=250
         )
         
         logger.info("Change detector consumers set up")
     
     async def _handle_scan_completed(self, message: KafkaMessage, context: Dict[str, Any]):
-        """Handle scan completion events"""
-        try:
-            data = message.data
-            config_id = data.get('config_id')
-            scan_id = data.get('scan_id')
-            result_summary = data.get('result_summary', {})
-            
-            if not config_id or not result_summary:
+        """Handle a single scan completion event"""
+        await self._handle_scan_completed_batch([message], [context])
+    
+    async def _handle_scan_completed_batch(self, 
+                                           messages: List[KafkaMessage], 
+                                           contexts: List[Dict[str, Any]]):
+        """
+        Handle a batch of scan completion events
+        
+        A config's baseline in the snapshot store only advances past scans
+        whose changes were stored. Failing to store them fails the batch into
+        the retry tiers once every other config is done, and the redelivered
+        batch resumes each config after its last stored scan.
+        """
+        messages_by_config: Dict[str, List[KafkaMessage]] = {}
+        for message, context in zip(messages, contexts):
+            config_id = context.get('headers', {}).get(CONFIG_ID_HEADER) or message.data.get('config_id')
+            if not config_id:
+                logger.warning("Invalid scan completed message")
+                continue
+            messages_by_config.setdefault(config_id, []).append(message)
+        
+        if not messages_by_config:
+            return
+        
+        batch = [(config_id, message) for config_id, config_messages in messages_by_config.items() 
+                 for message in config_messages]
+        
+        # Fetch offloaded summaries up front; a blob store outage fails the batch into the retry tiers
+        summaries = await asyncio.gather(*(
+            self.claim_check.resolve(message.data.get('result_summary', {})) for _, message in batch
+        ))
+        
+        scans_by_config: Dict[str, List[Dict[str, Any]]] = {}
+        references: Dict[str, Any] = {}
+        for (config_id, message), result_summary in zip(batch, summaries):
+            if not result_summary:
                 logger.warning("Invalid scan completed message")
-                return
+                continue
             
-            # Get previous scan for comparison
-            previous_scan = await self._get_previous_scan(config_id)
+            scan = {**message.data, 'result_summary': result_summary}
+            scans_by_config.setdefault(config_id, []).append(scan)
+            stored = message.data.get('result_summary')
+            if ClaimCheck.is_reference(stored):
+                references[scan.get('scan_id')] = stored
+        
+        # Previous scan of every config in the batch from the snapshot store;
+        # scan.completed messages use the scan id as their message id
+        previous_scans = await self._get_previous_snapshots(
+            list(scans_by_config.keys()), 
+            [message.id for _, message in batch]
+        )
+        
+        # A redelivered batch resumes after the last scan whose changes were stored
+        for config_id, scans in scans_by_config.items():
+            previous = previous_scans.get(config_id)
+            if previous:
+                stored_at = [i for i, scan in enumerate(scans) if scan.get('scan_id') == previous['scan_id']]
+                if stored_at:
+                    scans_by_config[config_id] = scans[stored_at[-1] + 1:]
+        
+        # Configs are independent; scans of the same config stay in order
+        processed: Dict[str, Dict[str, Any]] = {}
+        results = await asyncio.gather(*(
+            self._detect_config_scans(config_id, scans, previous_scans.get(config_id), processed)
+            for config_id, scans in scans_by_config.items()
+        ), return_exceptions=True)
+        
+        # The last processed scan of each config is what its next one is compared against,
+        # lone first scans included
+        if self.snapshots and processed:
+            await self.snapshots.put_many(processed, {
+                config_id: references[snapshot['scan_id']]
+                for config_id, snapshot in processed.items()
+                if snapshot['scan_id'] in references
+            })
+        
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            logger.error(f"Error handling scan completed batch: {len(errors)} configs failed: {errors[0]}")
+            self.metrics['last_error'] = str(errors[0])
+            raise errors[0]
+    
+    async def _detect_config_scans(self, 
+                                   config_id: str, 
+                                   scans: List[Dict[str, Any]],
+                                   previous_scan: Optional[Dict[str, Any]],
+                                   processed: Dict[str, Dict[str, Any]]):
+        """
+        Run change detection for consecutive scans of one config
+        
+        Each scan is recorded in processed once its changes are stored. A
+        failure to store them is raised, leaving the scan and later ones
+        unprocessed.
+        """
+        for data in scans:
+            scan_id = data.get('scan_id')
+            result_summary = data['result_summary']
             
             if previous_scan:
-                # Detect changes
-                start_time = datetime.now()
-                detection_result = await self.detect_changes(
-                    previous_scan['result_summary'],
-                    result_summary,
-                    config_id
-                )
-                processing_time = (datetime.now() - start_time).total_seconds() * 1000
-                
-                self.metrics['processing_time_total_ms'] += processing_time
+                try:
+                    # Detect changes
+                    start_time = datetime.now()
+                    detection_result = await self.detect_changes(
+                        previous_scan['result_summary'],
+                        result_summary,
+                        config_id
+                    )
+                    processing_time = (datetime.now() - start_time).total_seconds() * 1000
+                    
+                    self.metrics['processing_time_total_ms'] += processing_time
+                    
+                except Exception as e:
+                    # A scan that cannot be compared would fail the same way on retry
+                    logger.error(f"Error detecting changes for config {config_id}: {e}")
+                    self.metrics['last_error'] = str(e)
+                    detection_result = None
                 
-                if detection_result.has_changes:
+                if detection_result and detection_result.has_changes:
                     await self._process_detected_changes(
                         config_id, scan_id, detection_result
                     )
                     
                     logger.info(f"Detected {len(detection_result.changes)} changes for config {config_id}")
-                else:
+                elif detection_result:
                     logger.debug(f"No changes detected for config {config_id}")
             else:
                 logger.debug(f"No previous scan found for config {config_id}, skipping change detection")
             
-        except Exception as e:
-            logger.error(f"Error handling scan completed: {e}")
-            self.metrics['last_error'] = str(e)
+            # A later scan of the same config compares against this one
+            previous_scan = {
+                'result_summary': result_summary,
+                'scan_timestamp': data.get('completed_at'),
+                'scan_id': scan_id
+            }
+            processed[config_id] = previous_scan
     
     async def detect_changes(self, 
                            old_scan: Dict[str, Any], 
@@ -286,61 +439,46 @@ class ChangeDetector:
         changes = []
         
         try:
-            old_detected = {
-                (t['name'], t.get('version', '')): t 
-                for t in old_tech.get('detected', [])
-            }
-            new_detected = {
-                (t['name'], t.get('version', '')): t 
-                for t in new_tech.get('detected', [])
-            }
-            
-            old_names = {name for name, version in old_detected.keys()}
-            new_names = {name for name, version in new_detected.keys()}
-            
-            # Added technologies
-            for name in new_names - old_names:
-                tech_data = next(t for t in new_tech['detected'] if t['name'] == name)
-                changes.append({
-                    'type': 'technology_change',
-                    'change_type': 'added',
-                    'technology_name': name,
-                    'technology_category': tech_data.get('category', 'unknown'),
-                    'new_version': tech_data.get('version'),
-                    'confidence': tech_data.get('confidence', 1.0),
-                    'impact_assessment': self._assess_tech_impact(name),
-                    'evidence': {
-                        'detection_method': tech_data.get('detection_method'),
-                        'indicators': tech_data.get('indicators', [])
-                    }
-                })
-            
-            # Removed technologies
-            for name in old_names - new_names:
-                tech_data = next(t for t in old_tech['detected'] if t['name'] == name)
-                changes.append({
-                    'type': 'technology_change',
-                    'change_type': 'removed',
-                    'technology_name': name,
-                    'technology_category': tech_data.get('category', 'unknown'),
-                    'old_version': tech_data.get('version'),
-                    'confidence': 1.0,
-                    'impact_assessment': self._assess_tech_impact(name),
-                    'evidence': {
-                        'last_seen': old_tech.get('scan_timestamp'),
-                        'detection_method': tech_data.get('detection_method')
-                    }
-                })
-            
-            # Version changes for existing technologies
-            for name in old_names & new_names:
-                old_tech_data = next(t for t in old_tech['detected'] if t['name'] == name)
-                new_tech_data = next(t for t in new_tech['detected'] if t['name'] == name)
+            for diff in diff_technologies(old_tech.get('detected', []), new_tech.get('detected', [])):
+                name = diff.name
                 
-                old_version = old_tech_data.get('version', '')
-                new_version = new_tech_data.get('version', '')
+                if diff.change_type == 'added':
+                    tech_data = diff.new
+                    changes.append({
+                        'type': 'technology_change',
+                        'change_type': 'added',
+                        'technology_name': name,
+                        'technology_category': tech_data.get('category', 'unknown'),
+                        'new_version': tech_data.get('version'),
+                        'confidence': tech_data.get('confidence', 1.0),
+                        'impact_assessment': self._assess_tech_impact(name),
+                        'evidence': {
+                            'detection_method': tech_data.get('detection_method'),
+                            'indicators': tech_data.get('indicators', [])
+                        }
+                    })
+                
+                elif diff.change_type == 'removed':
+                    tech_data = diff.old
+                    changes.append({
+                        'type': 'technology_change',
+                        'change_type': 'removed',
+                        'technology_name': name,
+                        'technology_category': tech_data.get('category', 'unknown'),
+                        'old_version': tech_data.get('version'),
+                        'confidence': 1.0,
+                        'impact_assessment': self._assess_tech_impact(name),
+                        'evidence': {
+                            'last_seen': old_tech.get('scan_timestamp'),
+                            'detection_method': tech_data.get('detection_method')
+                        }
+                    })
                 
-                if old_version and new_version and old_version != new_version:
+                else:
+                    old_tech_data, new_tech_data = diff.old, diff.new
+                    old_version = str(old_tech_data['version'])
+                    new_version = str(new_tech_data['version'])
+                    
                     # Only report if it's a significant version change
                     if self._is_significant_version_change(old_version, new_version):
                         changes.append({
@@ -923,30 +1061,91 @@ class ChangeDetector:
             }
         }
     
-    async def _get_previous_scan(self, config_id: str) -> Optional[Dict[str, Any]]:
-        """Get the most recent scan result for comparison"""
+    async def _get_previous_snapshots(self,
+                                      config_ids: List[str],
+                                      exclude_scan_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the latest processed scan of each config, reading scan_results only for configs the snapshot store misses
+        
+        A stored snapshot may be one of the batch's own scans if the batch is
+        redelivered; scan_results already holds all of them, so they are
+        excluded there.
+        """
+        previous = await self.snapshots.get_many(config_ids) if self.snapshots else {}
+        
+        missing = [config_id for config_id in config_ids if config_id not in previous]
+        if missing:
+            self.metrics['previous_scan_db_lookups'] += len(missing)
+            previous.update(await self._get_previous_scans(missing, exclude_scan_ids))
+        return previous
+    
+    async def _get_previous_scans(self, 
+                                  config_ids: List[str], 
+                                  exclude_scan_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the most recent earlier scan result for each config in one query"""
         try:
+            excluded = []
+            for scan_id in exclude_scan_ids:
+                try:
+                    excluded.append(uuid.UUID(scan_id))
+                except (TypeError, ValueError):
+                    continue
+            
             async with self.db_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT result_summary, scan_timestamp, id
+                rows = await conn.fetch("""
+                    SELECT DISTINCT ON (config_id) 
+                           config_id, result_summary, scan_timestamp, id
                     FROM scan_results 
-                    WHERE config_id = $1 AND status = 'completed'
-                    ORDER BY scan_timestamp DESC 
-                    LIMIT 2
-                """, uuid.UUID(config_id))
-                
-                if row:
-                    return {
-                        'result_summary': row['result_summary'],
-                        'scan_timestamp': row['scan_timestamp'].isoformat(),
-                        'scan_id': str(row['id'])
-                    }
+                    WHERE config_id = ANY($1::uuid[]) 
+                      AND status = 'completed'
+                      AND NOT (id = ANY($2::uuid[]))
+                    ORDER BY config_id, scan_timestamp DESC
+                """, [uuid.UUID(c) for c in config_ids], excluded)
                 
-                return None
+                return {str(row['config_id']): snapshot_from_row(row) for row in rows}
                 
         except Exception as e:
-            logger.error(f"Error getting previous scan: {e}")
-            return None
+            # Treating the configs as first scans would rebaseline them; fail the batch into the retry tiers instead
+            logger.error(f"Error getting previous scans: {e}")
+            raise
+    
+    @staticmethod
+    def _change_row(change_id: uuid.UUID,
+                    config_id: uuid.UUID,
+                    scan_id: uuid.UUID,
+                    detected_at: datetime,
+                    change: Dict[str, Any]) -> Optional[Tuple]:
+        """Row of a change in its table's CHANGE_TABLES column order, or None for changes without a table"""
+        change_type = change.get('type')
+        evidence = json.dumps(change.get('evidence', {}))
+        
+        if change_type == 'technology_change':
+            return (
+                change_id, config_id, scan_id, detected_at,
+                change.get('change_type'), change.get('technology_name'),
+                change.get('technology_category'), change.get('old_version'),
+                change.get('new_version'), change.get('confidence', 1.0),
+                evidence, change.get('impact_assessment', 'unknown')
+            )
+        
+        if change_type == 'performance_change':
+            return (
+                change_id, config_id, scan_id, detected_at,
+                change.get('metric_name'), change.get('old_value'),
+                change.get('new_value'), change.get('change_percent'),
+                change.get('threshold_exceeded', False),
+                change.get('severity', 'info'), evidence
+            )
+        
+        if change_type == 'security_change':
+            return (
+                change_id, config_id, scan_id, detected_at,
+                change.get('change_type'), change.get('vulnerability_type'),
+                change.get('severity', 'medium'), change.get('description', ''),
+                evidence, change.get('cve_ids', []), change.get('remediation_advice', '')
+            )
+        
+        return None
     
     async def _get_performance_thresholds(self, config_id: str) -> Dict[str, float]:
         """Get performance change thresholds for a config"""
@@ -985,73 +1184,43 @@ class ChangeDetector:
                                       detection_result: ChangeDetection):
         """Process and store detected changes"""
         try:
-            async with self.db_pool.acquire() as conn:
-                async with conn.transaction():
-                    for change in detection_result.changes:
-                        change_id = str(uuid.uuid4())
-                        
-                        # Store in appropriate table based on change type
-                        change_type = change.get('type')
-                        
-                        if change_type == 'technology_change':
-                            await conn.execute("""
-                                INSERT INTO technology_changes 
-                                (id, config_id, scan_id, detected_at, change_type, 
-                                 technology_name, technology_category, old_version, 
-                                 new_version, confidence_score, evidence, impact_assessment)
-                                VALUES ($1, $2, $3, NOW(), $4, $5, $6, $7, $8, $9, $10, $11)
-                            """, 
-                            uuid.UUID(change_id), uuid.UUID(config_id), uuid.UUID(scan_id),
-                            change.get('change_type'), change.get('technology_name'),
-                            change.get('technology_category'), change.get('old_version'),
-                            change.get('new_version'), change.get('confidence', 1.0),
-                            json.dumps(change.get('evidence', {})), 
-                            change.get('impact_assessment', 'unknown')
-                            )
-                        
-                        elif change_type == 'performance_change':
-                            await conn.execute("""
-                                INSERT INTO performance_changes 
-                                (id, config_id, scan_id, detected_at, metric_name, 
-                                 old_value, new_value, change_percent, threshold_exceeded, 
-                                 severity, evidence)
-                                VALUES ($1, $2, $3, NOW(), $4, $5, $6, $7, $8, $9, $10)
-                            """, 
-                            uuid.UUID(change_id), uuid.UUID(config_id), uuid.UUID(scan_id),
-                            change.get('metric_name'), change.get('old_value'),
-                            change.get('new_value'), change.get('change_percent'),
-                            change.get('threshold_exceeded', False),
-                            change.get('severity', 'info'),
-                            json.dumps(change.get('evidence', {}))
-                            )
-                        
-                        elif change_type == 'security_change':
-                            await conn.execute("""
-                                INSERT INTO security_changes 
-                                (id, config_id, scan_id, detected_at, change_type, 
-                                 vulnerability_type, severity, description, evidence, 
-                                 cve_ids, remediation_advice)
-                                VALUES ($1, $2, $3, NOW(), $4, $5, $6, $7, $8, $9, $10)
-                            """, 
-                            uuid.UUID(change_id), uuid.UUID(config_id), uuid.UUID(scan_id),
-                            change.get('change_type'), change.get('vulnerability_type'),
-                            change.get('severity', 'medium'), change.get('description', ''),
-                            json.dumps(change.get('evidence', {})),
-                            change.get('cve_ids', []), change.get('remediation_advice', '')
-                            )
-                        
-                        # Send change detected message to Kafka
-                        message = await create_change_detected_message(
-                            config_id=config_id,
-                            change_type=change_type,
-                            change_details=change
-                        )
-                        
-                        await self.kafka.produce_message(
-                            topic='change.detected',
-                            message=message,
-                            key=config_id
-                        )
+            records = []
+            rows_by_type: Dict[str, List[Tuple]] = {}
+            config_uuid, scan_uuid = uuid.UUID(config_id), uuid.UUID(scan_id)
+            detected_at = datetime.now(timezone.utc)
+            
+            for change in detection_result.changes:
+                change_type = change.get('type')
+                row = self._change_row(uuid.uuid4(), config_uuid, scan_uuid, detected_at, change)
+                if row is not None:
+                    rows_by_type.setdefault(change_type, []).append(row)
+                
+                # Queue change detected message for Kafka
+                message = await create_change_detected_message(
+                    config_id=config_id,
+                    change_type=change_type,
+                    change_details=change
+                )
+                records.append(ProduceRecord(
+                    topic='change.detected',
+                    message=message,
+                    key=config_id
+                ))
+            
+            # One COPY per change table in a short transaction, with nothing else in between
+            if rows_by_type:
+                async with self.db_pool.acquire() as conn:
+                    async with conn.transaction():
+                        for change_type, rows in rows_by_type.items():
+                            table, columns = CHANGE_TABLES[change_type]
+                            await conn.copy_records_to_table(table, records=rows, columns=columns)
+            
+            # Publish once the transaction has committed, as a single batch
+            results = await self.kafka.produce_batch(records)
+            failed = sum(1 for r in results if not r.success)
+            if failed:
+                self.metrics['change_publish_failures'] += failed
+                logger.warning(f"Failed to publish {failed}/{len(results)} change events for config {config_id}")
             
             self.metrics['changes_detected'] += len(detection_result.changes)
             logger.info(f"Processed {len(detection_result.changes)} changes for config {config_id}")
@@ -0,0 +1,275 @@
+"""
+Scan snapshot store for the TechScanIQ change detector
+Latest completed scan summary per config, in an in-process LRU backed by Redis, so detection needs no database reads
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import aioredis
+import asyncpg
+
+from streaming.blob_store import ClaimCheck
+
+logger = logging.getLogger(__name__)
+
+# Replace each config's snapshot unless the stored one is from a later scan.
+# ARGV: prefix, ttl ms, then per config: config id, scan epoch seconds, scan id, scan timestamp, summary.
+# Returns how many snapshots were written.
+PUT_SCRIPT = """
+local prefix = ARGV[1]
+local written = 0
+for a = 3, #ARGV, 5 do
+    local key = prefix .. ARGV[a]
+    local current = redis.call('HGET', key, 'epoch')
+    if not current or tonumber(current) <= tonumber(ARGV[a + 1]) then
+        redis.call('HSET', key, 'epoch', ARGV[a + 1], 'scan_id', ARGV[a + 2],
+                   'scan_timestamp', ARGV[a + 3], 'summary', ARGV[a + 4])
+        redis.call('PEXPIRE', key, ARGV[2])
+        written = written + 1
+    end
+end
+return written
+"""
+
+# Newest completed scan per enabled config, recent enough for its partitions to be pruned to the lookback.
+# $1: lookback days.
+WARM_SQL = """
+    SELECT DISTINCT ON (s.config_id)
+           s.config_id, s.result_summary, s.scan_timestamp, s.id
+    FROM scan_results s
+    JOIN monitoring_configs c ON c.id = s.config_id AND c.enabled = true
+    WHERE s.status = 'completed'
+      AND s.scan_timestamp > NOW() - INTERVAL '1 day' * $1
+    ORDER BY s.config_id, s.scan_timestamp DESC
+"""
+
+def _epoch(timestamp: Any) -> float:
+    """Seconds since the epoch of a datetime or ISO timestamp; 0 if there is none"""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if timestamp:
+        try:
+            return datetime.fromisoformat(str(timestamp).replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+def snapshot_from_row(row: Any) -> Dict[str, Any]:
+    """Snapshot of a scan_results row with config_id, result_summary, scan_timestamp and id"""
+    summary = row['result_summary']
+    return {
+        'result_summary': json.loads(summary) if isinstance(summary, str) else summary,
+        'scan_timestamp': row['scan_timestamp'].isoformat(),
+        'scan_id': str(row['id'])
+    }
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+class SnapshotStore:
+    """
+    Latest completed scan of each config, as the change detector compares against
+    
+    Snapshots are {'result_summary', 'scan_timestamp', 'scan_id'}. Redis holds
+    one hash per config, written only if it is not older than the stored scan,
+    so redelivered or reordered scans never roll a config back. An LRU of
+    capacity configs keeps decoded summaries in process; a lookup still asks
+    Redis for the scan id, which is cheap, so a snapshot replaced by another
+    replica after a rebalance is refetched rather than served stale. Summaries
+    offloaded to the blob store are kept in Redis as their claim-check
+    reference and resolved on read.
+    """
+    
+    def __init__(self,
+                 redis: aioredis.Redis,
+                 claim_check: Optional[ClaimCheck] = None,
+                 capacity: int = 10000,
+                 ttl: float = 30 * 24 * 3600,
+                 key_prefix: str = 'scan_snapshot'):
+        self.redis = redis
+        self.claim_check = claim_check
+        self.capacity = capacity
+        self.ttl = ttl
+        self.key_prefix = f"{key_prefix}:"
+        self._put_script = redis.register_script(PUT_SCRIPT)
+        
+        self._lru: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        
+        # Metrics
+        self.metrics = {
+            'local_hits': 0,
+            'redis_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'stale_writes': 0,
+            'redis_errors': 0,
+            'warmed': 0
+        }
+    
+    async def get_many(self, config_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Snapshots of the given configs in one Redis round-trip (two if another replica replaced some)
+        
+        Returns:
+            Snapshots by config id; configs without one are absent
+        """
+        config_ids = list(dict.fromkeys(config_ids))
+        found: Dict[str, Dict[str, Any]] = {}
+        
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for config_id in config_ids:
+                if config_id in self._lru:
+                    pipe.hget(self._key(config_id), 'scan_id')
+                else:
+                    pipe.hmget(self._key(config_id), 'scan_id', 'scan_timestamp', 'summary')
+            replies = await pipe.execute()
+        
+        except Exception as e:
+            # Without Redis, serve what is local and let the caller look up the rest
+            self.metrics['redis_errors'] += 1
+            logger.error(f"Failed to read scan snapshots from Redis: {e}")
+            for config_id in config_ids:
+                if config_id in self._lru:
+                    found[config_id] = self._touch(config_id)
+            self.metrics['local_hits'] += len(found)
+            self.metrics['misses'] += len(config_ids) - len(found)
+            return found
+        
+        refetch: List[str] = []
+        fetched: Dict[str, List[Any]] = {}
+        for config_id, reply in zip(config_ids, replies):
+            if config_id in self._lru:
+                scan_id = _decode(reply)
+                if scan_id is None or scan_id == self._lru[config_id]['scan_id']:
+                    found[config_id] = self._touch(config_id)
+                    self.metrics['local_hits'] += 1
+                else:
+                    refetch.append(config_id)
+            elif reply[0] is not None:
+                fetched[config_id] = reply
+        
+        if refetch:
+            pipe = self.redis.pipeline(transaction=False)
+            for config_id in refetch:
+                pipe.hmget(self._key(config_id), 'scan_id', 'scan_timestamp', 'summary')
+            for config_id, reply in zip(refetch, await pipe.execute()):
+                if reply[0] is not None:
+                    fetched[config_id] = reply
+                else:
+                    found[config_id] = self._touch(config_id)
+        
+        if fetched:
+            summaries = await asyncio.gather(*(self._load_summary(reply[2]) for reply in fetched.values()))
+            for (config_id, reply), summary in zip(fetched.items(), summaries):
+                snapshot = {
+                    'result_summary': summary,
+                    'scan_timestamp': _decode(reply[1]),
+                    'scan_id': _decode(reply[0])
+                }
+                self._remember(config_id, snapshot)
+                found[config_id] = snapshot
+            self.metrics['redis_hits'] += len(fetched)
+        
+        self.metrics['misses'] += len(config_ids) - len(found)
+        return found
+    
+    async def put_many(self,
+                       snapshots: Dict[str, Dict[str, Any]],
+                       references: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Record each config's latest scan, unless a later one is already stored
+        
+        Args:
+            snapshots: Snapshots by config id, with resolved summaries
+            references: Claim-check references to store in Redis instead of the summary, by config id
+        
+        Returns:
+            How many snapshots replaced the stored ones
+        """
+        if not snapshots:
+            return 0
+        references = references or {}
+        
+        args: List[Any] = [self.key_prefix, int(self.ttl * 1000)]
+        for config_id, snapshot in snapshots.items():
+            epoch = _epoch(snapshot.get('scan_timestamp'))
+            current = self._lru.get(config_id)
+            if current is None or _epoch(current.get('scan_timestamp')) <= epoch:
+                self._remember(config_id, snapshot)
+            
+            summary = references.get(config_id) or snapshot['result_summary']
+            args.extend([
+                config_id,
+                repr(epoch),
+                str(snapshot.get('scan_id') or ''),
+                str(snapshot.get('scan_timestamp') or ''),
+                json.dumps(summary, separators=(',', ':'), default=str)
+            ])
+        
+        try:
+            written = await self._put_script(keys=[], args=args)
+        except Exception as e:
+            self.metrics['redis_errors'] += 1
+            logger.error(f"Failed to write {len(snapshots)} scan snapshots to Redis: {e}")
+            return 0
+        
+        self.metrics['writes'] += written
+        self.metrics['stale_writes'] += len(snapshots) - written
+        return written
+    
+    async def warm(self, pool: asyncpg.Pool, lookback_days: int = 35, chunk_size: int = 500) -> int:
+        """
+        Load the newest completed scan of every enabled config from the database in one query
+        
+        Returns:
+            How many snapshots were loaded
+        """
+        loaded = 0
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                chunk: Dict[str, Dict[str, Any]] = {}
+                async for row in conn.cursor(WARM_SQL, lookback_days, prefetch=chunk_size):
+                    chunk[str(row['config_id'])] = snapshot_from_row(row)
+                    if len(chunk) >= chunk_size:
+                        await self.put_many(chunk)
+                        loaded += len(chunk)
+                        chunk = {}
+                if chunk:
+                    await self.put_many(chunk)
+                    loaded += len(chunk)
+        
+        self.metrics['warmed'] += loaded
+        logger.info(f"Warmed {loaded} scan snapshots from the last {lookback_days} days")
+        return loaded
+    
+    async def _load_summary(self, stored: Any) -> Dict[str, Any]:
+        summary = json.loads(_decode(stored))
+        if self.claim_check and ClaimCheck.is_reference(summary):
+            summary = await self.claim_check.resolve(summary)
+        return summary
+    
+    def _touch(self, config_id: str) -> Dict[str, Any]:
+        self._lru.move_to_end(config_id)
+        return self._lru[config_id]
+    
+    def _remember(self, config_id: str, snapshot: Dict[str, Any]):
+        self._lru[config_id] = snapshot
+        self._lru.move_to_end(config_id)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+    
+    def _key(self, config_id: str) -> str:
+        return f"{self.key_prefix}{config_id}"
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cached': len(self._lru),
+            'capacity': self.capacity,
+            **self.metrics
+        }
@@ -0,0 +1,93 @@
+"""
+Technology stack diff for the TechScanIQ change detector
+Compares two scans' detected technologies in linear time, keyed by normalized name and aware of multiple versions
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_VERSION_SPLIT = re.compile(r'[.\-+_]')
+
+class TechDiff(NamedTuple):
+    """One technology change: the old and/or new detection it was derived from"""
+    change_type: str  # 'added', 'removed' or 'version_changed'
+    name: str
+    old: Optional[Dict[str, Any]]
+    new: Optional[Dict[str, Any]]
+
+def normalize_name(name: str) -> str:
+    """Name as detections are matched on: case-folded, whitespace collapsed"""
+    return ' '.join(str(name).split()).casefold()
+
+def version_key(version: str) -> Tuple:
+    """Sort key ordering versions numerically by component, e.g. 1.9 before 1.10"""
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in _VERSION_SPLIT.split(version))
+
+def _index(detected: Iterable[Dict[str, Any]]) -> Dict[str, Tuple[str, Dict[str, Dict[str, Any]]]]:
+    """
+    Group detections by normalized name in scan order, keeping the first of duplicate versions
+    
+    Returns:
+        Normalized name -> (name as first detected, version -> detection); '' holds an unversioned detection
+    """
+    index: Dict[str, Tuple[str, Dict[str, Dict[str, Any]]]] = {}
+    for tech in detected:
+        name = tech.get('name')
+        if not name:
+            continue
+        key = normalize_name(name)
+        entry = index.get(key)
+        if entry is None:
+            entry = index[key] = (name, {})
+        entry[1].setdefault(str(tech.get('version') or '').strip(), tech)
+    return index
+
+def diff_technologies(old_detected: Iterable[Dict[str, Any]],
+                      new_detected: Iterable[Dict[str, Any]]) -> List[TechDiff]:
+    """
+    Diff two lists of detected technologies
+    
+    Each side is indexed once, so the diff is linear in the number of
+    detections. A technology present on both sides compares its version
+    sets: versions seen on both are unchanged, and the rest are paired in
+    version order as version_changed, with any left over reported as added
+    or removed at that version. An unversioned detection is compatible with
+    any version, so a technology whose version could not be read on one
+    side does not register as changed. A technology new to the scan is
+    added once, at its first detection.
+    
+    Returns:
+        Changes for technologies in the new scan, in its order, then removals in the old scan's order
+    """
+    old_index = _index(old_detected)
+    new_index = _index(new_detected)
+    changes: List[TechDiff] = []
+    
+    for key, (name, new_versions) in new_index.items():
+        old = old_index.get(key)
+        if old is None:
+            changes.append(TechDiff('added', name, None, next(iter(new_versions.values()))))
+            continue
+        
+        old_name, old_versions = old
+        if old_versions.keys() == new_versions.keys():
+            continue
+        
+        gone = sorted((v for v in old_versions if v and v not in new_versions), key=version_key)
+        came = sorted((v for v in new_versions if v and v not in old_versions), key=version_key)
+        
+        for old_version, new_version in zip(gone, came):
+            changes.append(TechDiff('version_changed', name, old_versions[old_version], new_versions[new_version]))
+        
+        if len(came) > len(gone) and '' not in old_versions:
+            for version in came[len(gone):]:
+                changes.append(TechDiff('added', name, None, new_versions[version]))
+        elif len(gone) > len(came) and '' not in new_versions:
+            for version in gone[len(came):]:
+                changes.append(TechDiff('removed', old_name, old_versions[version], None))
+    
+    for key, (name, old_versions) in old_index.items():
+        if key not in new_index:
+            changes.append(TechDiff('removed', name, next(iter(old_versions.values())), None))
+    
+    return changes
@@ -0,0 +1,88 @@
+"""
+Adaptive scan frequency for the TechScanIQ monitoring pipeline
+Derives each opted-in config's effective scan interval from its recorded change history
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from pipeline.scan_scheduler import Schedule
+
+# Newest change and number of changes in the lookback window per config, across all change tables.
+# $1: config ids, $2: lookback start. Configs without changes fall back to their creation time.
+CHANGE_HISTORY_SQL = """
+    WITH changes AS (
+        SELECT config_id, detected_at FROM technology_changes
+        WHERE config_id = ANY($1::uuid[]) AND detected_at >= $2
+        UNION ALL
+        SELECT config_id, detected_at FROM performance_changes
+        WHERE config_id = ANY($1::uuid[]) AND detected_at >= $2
+        UNION ALL
+        SELECT config_id, detected_at FROM security_changes
+        WHERE config_id = ANY($1::uuid[]) AND detected_at >= $2
+    )
+    SELECT c.id::text AS config_id,
+           GREATEST(MAX(ch.detected_at), c.created_at) AS last_change_at,
+           COUNT(ch.detected_at) AS change_count
+    FROM monitoring_configs c
+    LEFT JOIN changes ch ON ch.config_id = c.id
+    WHERE c.id = ANY($1::uuid[])
+    GROUP BY c.id, c.created_at
+"""
+
+# Upper bound when a schedule opts in with "adaptive": true
+DEFAULT_MAX_INTERVAL = 7 * 24 * 3600
+
+@dataclass
+class AdaptiveBounds:
+    """User-set range a config's effective interval may move within, in seconds"""
+    min_seconds: float
+    max_seconds: float
+
+def adaptive_bounds(schedule: Dict[str, Any], nominal: Schedule) -> Optional[AdaptiveBounds]:
+    """
+    Bounds from a schedule's "adaptive" setting, or None if the config does not opt in
+    
+    "adaptive": true ranges from the schedule's own period up to a week;
+    {"min_minutes": m, "max_minutes": M} sets the range explicitly, either end
+    defaulting the same way.
+    
+    Raises:
+        ValueError: If the bounds are not positive or min exceeds max
+    """
+    setting = schedule.get('adaptive')
+    if not setting:
+        return None
+    if setting is True:
+        setting = {}
+    
+    min_seconds = float(setting['min_minutes']) * 60 if 'min_minutes' in setting else nominal.min_period
+    max_seconds = float(setting['max_minutes']) * 60 if 'max_minutes' in setting else DEFAULT_MAX_INTERVAL
+    if min_seconds <= 0 or max_seconds < min_seconds:
+        raise ValueError(f"Invalid adaptive bounds {setting}")
+    return AdaptiveBounds(min_seconds, max_seconds)
+
+def effective_interval(bounds: AdaptiveBounds,
+                       quiet_seconds: float,
+                       change_count: int = 0,
+                       lookback_seconds: float = 0.0) -> float:
+    """
+    Effective scan interval for a config that last changed quiet_seconds ago
+    
+    The interval doubles from the minimum for every doubling of the quiet
+    period and stays within half of it, so a stable site backs off
+    exponentially and a change snaps it back to the minimum. Sites that
+    change often are held to half their average gap between changes.
+    Intervals are powers of two times the minimum, so configs with equal
+    bounds share a handful of schedules.
+    """
+    level = max(0, int(math.log2(max(quiet_seconds, 1.0) / 2 / bounds.min_seconds)))
+    interval = bounds.min_seconds * 2 ** level
+    
+    if change_count and lookback_seconds:
+        mean_gap = lookback_seconds / change_count
+        while interval > bounds.min_seconds and interval > mean_gap / 2:
+            interval /= 2
+    
+    return min(interval, bounds.max_seconds)
@@ -0,0 +1,178 @@
+"""
+Config state writer for the TechScanIQ monitoring pipeline
+Coalesces next_scan_at and last_scan_at bookkeeping per config and writes it behind in one statement per flush
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from streaming.kafka_client import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# One row per config: unnest() zips the arrays, NULL leaves a column as it is.
+# last_scan_at never moves backwards, and updated_at is only bumped with next_scan_at as before.
+FLUSH_SQL = """
+    UPDATE monitoring_configs AS c
+    SET next_scan_at = COALESCE(u.next_scan_at, c.next_scan_at),
+        last_scan_at = GREATEST(c.last_scan_at, u.last_scan_at),
+        updated_at = CASE WHEN u.next_scan_at IS NULL THEN c.updated_at ELSE NOW() END
+    FROM unnest($1::uuid[], $2::timestamptz[], $3::timestamptz[]) AS u(id, next_scan_at, last_scan_at)
+    WHERE c.id = u.id
+"""
+
+class ConfigStateWriter:
+    """
+    Write-behind buffer for monitoring_configs scan bookkeeping
+    
+    Updates are kept per config, the newest next_scan_at and latest
+    last_scan_at winning, and written every flush_interval (or sooner once
+    flush_size configs are pending) as a single UPDATE ... FROM unnest(...).
+    A config is therefore at most one flush interval stale in the database,
+    however many scans it went through. Failed flushes are merged back under
+    newer updates and retried; stop() flushes what is left.
+    """
+    
+    def __init__(self,
+                 pool: asyncpg.Pool,
+                 flush_interval: float = 1.0,
+                 flush_size: int = 1000):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        
+        # config id -> [next_scan_at, last_scan_at], and when the oldest pending update arrived
+        self.pending: Dict[uuid.UUID, List[Optional[datetime]]] = {}
+        self._oldest: Optional[float] = None
+        self.running = False
+        
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.staleness = LatencyTracker()
+        self.metrics = {
+            'updates_buffered': 0,
+            'updates_coalesced': 0,
+            'rows_written': 0,
+            'flushes': 0,
+            'flush_failures': 0,
+            'last_flush_at': None
+        }
+    
+    async def start(self):
+        """Start periodic flushing"""
+        self.running = True
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+        logger.info(f"Config state writer started (flush every {self.flush_interval}s)")
+    
+    async def stop(self):
+        """Flush what is buffered"""
+        self.running = False
+        
+        for task in (self._flush_task, self._pending_flush):
+            if task and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        
+        await self.flush()
+        if self.pending:
+            logger.warning(f"Config state writer stopped with {len(self.pending)} unwritten configs")
+        logger.info("Config state writer stopped")
+    
+    def set_next_scan(self, config_id: str, next_scan_at: datetime):
+        """Record a config's next scan time"""
+        self._add(config_id, next_scan_at, None)
+    
+    def set_last_scan(self, config_id: str, last_scan_at: datetime):
+        """Record that a config finished a scan"""
+        self._add(config_id, None, last_scan_at)
+    
+    def _add(self, config_id: str, next_scan_at: Optional[datetime], last_scan_at: Optional[datetime]):
+        """Coalesce an update into the pending row of its config"""
+        key = uuid.UUID(config_id)
+        self.metrics['updates_buffered'] += 1
+        
+        row = self.pending.get(key)
+        if row is None:
+            self.pending[key] = [next_scan_at, last_scan_at]
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+        else:
+            self.metrics['updates_coalesced'] += 1
+            if next_scan_at is not None:
+                row[0] = next_scan_at
+            if last_scan_at is not None and (row[1] is None or last_scan_at > row[1]):
+                row[1] = last_scan_at
+        
+        if len(self.pending) >= self.flush_size and self.running and (
+                self._pending_flush is None or self._pending_flush.done()):
+            self._pending_flush = asyncio.create_task(self.flush())
+    
+    async def flush(self) -> int:
+        """Write every pending config in one statement, returning how many were written"""
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+            
+            # Sorted ids keep row lock order the same across replicas
+            rows: List[Tuple[uuid.UUID, List[Optional[datetime]]]] = sorted(self.pending.items())
+            oldest = self._oldest
+            self.pending = {}
+            self._oldest = None
+            
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.execute(
+                        FLUSH_SQL,
+                        [config_id for config_id, _ in rows],
+                        [row[0] for _, row in rows],
+                        [row[1] for _, row in rows]
+                    )
+                
+                if oldest is not None:
+                    self.staleness.record((time.monotonic() - oldest) * 1000)
+                self.metrics['rows_written'] += len(rows)
+                self.metrics['flushes'] += 1
+                self.metrics['last_flush_at'] = datetime.now(timezone.utc).isoformat()
+                return len(rows)
+            
+            except Exception as e:
+                self.metrics['flush_failures'] += 1
+                logger.error(f"Failed to write scan state of {len(rows)} configs: {e}")
+                
+                # Merge back under anything recorded meanwhile, which is newer
+                for config_id, (next_scan_at, last_scan_at) in rows:
+                    row = self.pending.setdefault(config_id, [None, None])
+                    if row[0] is None:
+                        row[0] = next_scan_at
+                    if last_scan_at is not None and (row[1] is None or last_scan_at > row[1]):
+                        row[1] = last_scan_at
+                if oldest is not None:
+                    self._oldest = oldest
+                return 0
+    
+    async def _flush_periodically(self):
+        """Flush on a fixed interval"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error flushing config scan state: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self.pending),
+            'staleness': self.staleness.snapshot(),
+            **self.metrics
+        }
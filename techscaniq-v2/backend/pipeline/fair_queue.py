@@ -0,0 +1,193 @@
+"""
+Fair scan queue for the TechScanIQ monitoring pipeline
+Strict-priority lanes, each shared between organizations by weighted start-time fair queuing
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from streaming.kafka_client import LatencyTracker
+
+class Dequeued(NamedTuple):
+    """An item taken from the queue with its lane, organization and time spent queued"""
+    key: str
+    item: Any
+    lane: str
+    org: str
+    wait: float
+
+class _Entry:
+    __slots__ = ('key', 'item', 'org', 'start', 'enqueued')
+    
+    def __init__(self, key: str, item: Any, org: str, start: float, enqueued: float):
+        self.key = key
+        self.item = item
+        self.org = org
+        self.start = start
+        self.enqueued = enqueued
+
+class _Lane:
+    """Per-organization FIFOs of one lane, served in order of their head's start tag"""
+    __slots__ = ('name', 'virtual_time', 'flows', 'finish', 'heads', 'wait')
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.virtual_time = 0.0
+        self.flows: Dict[str, deque] = {}
+        self.finish: Dict[str, float] = {}
+        self.heads: List[Tuple[float, int, str]] = []
+        self.wait = LatencyTracker()
+    
+    def __len__(self) -> int:
+        return sum(len(flow) for flow in self.flows.values())
+
+class FairQueue:
+    """
+    Orders queued scans by priority lane, then fairly across organizations
+    
+    Lanes are served in strict priority: an item is only taken from a lane
+    when every lane before it is empty. Within a lane each organization has
+    its own FIFO, and items carry a start tag of max(lane virtual time, the
+    organization's previous finish tag), with each item advancing its
+    organization's finish tag by 1/weight. Serving the lowest start tag first
+    gives every organization with queued scans a share of dispatches in
+    proportion to its weight, however many it enqueued, so one organization
+    with thousands of configs cannot push the others to the back.
+    
+    A key is queued at most once; putting it again while queued is a no-op.
+    """
+    
+    def __init__(self,
+                 lanes: Iterable[str],
+                 weights: Optional[Dict[str, float]] = None,
+                 default_weight: float = 1.0,
+                 org_wait_window: int = 256):
+        self.lanes: Dict[str, _Lane] = {name: _Lane(name) for name in lanes}
+        if not self.lanes:
+            raise ValueError("FairQueue needs at least one lane")
+        self.weights: Dict[str, float] = dict(weights or {})
+        self.default_weight = default_weight
+        self.org_wait_window = org_wait_window
+        
+        self._queued: Dict[str, str] = {}
+        self._seq = itertools.count()
+        self._nonempty = asyncio.Event()
+        
+        # Queue wait per organization, across lanes
+        self.org_wait: Dict[str, LatencyTracker] = {}
+        
+        # Metrics
+        self.metrics = {
+            'enqueued': 0,
+            'dequeued': 0,
+            'duplicates': 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._queued)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._queued
+    
+    def set_weight(self, org: str, weight: float):
+        """Change an organization's share; applies to items enqueued from now on"""
+        if weight <= 0:
+            raise ValueError(f"Weight must be positive, got {weight}")
+        self.weights[org] = weight
+    
+    def put(self, key: str, item: Any, lane: str, org: str) -> bool:
+        """
+        Queue an item in a lane on behalf of an organization
+        
+        Returns:
+            False if the key is already queued
+        
+        Raises:
+            ValueError: If the lane is unknown
+        """
+        target = self.lanes.get(lane)
+        if target is None:
+            raise ValueError(f"Unknown lane '{lane}'")
+        if key in self._queued:
+            self.metrics['duplicates'] += 1
+            return False
+        
+        start = max(target.virtual_time, target.finish.get(org, 0.0))
+        target.finish[org] = start + 1.0 / self.weights.get(org, self.default_weight)
+        entry = _Entry(key, item, org, start, time.monotonic())
+        
+        flow = target.flows.get(org)
+        if flow is None:
+            flow = target.flows[org] = deque()
+            heapq.heappush(target.heads, (start, next(self._seq), org))
+        flow.append(entry)
+        
+        self._queued[key] = lane
+        self.metrics['enqueued'] += 1
+        self._nonempty.set()
+        return True
+    
+    def pop(self, limit: int = 1) -> List[Dequeued]:
+        """Take up to limit items in service order, recording how long each waited"""
+        taken: List[Dequeued] = []
+        now = time.monotonic()
+        
+        for lane in self.lanes.values():
+            while lane.heads and len(taken) < limit:
+                _, _, org = heapq.heappop(lane.heads)
+                flow = lane.flows[org]
+                entry = flow.popleft()
+                lane.virtual_time = entry.start
+                
+                if flow:
+                    heapq.heappush(lane.heads, (flow[0].start, next(self._seq), org))
+                else:
+                    # An organization that drains gets no credit for idle time
+                    del lane.flows[org]
+                    del lane.finish[org]
+                
+                wait = now - entry.enqueued
+                lane.wait.record(wait * 1000)
+                org_wait = self.org_wait.get(org)
+                if org_wait is None:
+                    org_wait = self.org_wait[org] = LatencyTracker(window=self.org_wait_window)
+                org_wait.record(wait * 1000)
+                
+                del self._queued[entry.key]
+                taken.append(Dequeued(entry.key, entry.item, lane.name, org, wait))
+        
+        self.metrics['dequeued'] += len(taken)
+        if not self._queued:
+            self._nonempty.clear()
+        return taken
+    
+    async def wait(self):
+        """Wait until the queue has items"""
+        await self._nonempty.wait()
+    
+    def stats(self, top_orgs: int = 20) -> Dict[str, Any]:
+        """Depth and queue wait per lane, and for the organizations waiting longest"""
+        slowest = sorted(
+            self.org_wait.items(),
+            key=lambda item: item[1].percentile(95) or 0.0,
+            reverse=True
+        )[:top_orgs]
+        
+        return {
+            'queued': len(self._queued),
+            'lanes': {
+                name: {
+                    'queued': len(lane),
+                    'organizations': len(lane.flows),
+                    'wait': lane.wait.snapshot()
+                }
+                for name, lane in self.lanes.items()
+            },
+            'organizations': len(self.org_wait),
+            'slowest_organizations': {org: tracker.snapshot() for org, tracker in slowest},
+            **self.metrics
+        }
@@ -5,28 +5,58 @@ Manages the continuous monitoring system with scheduling, rate limiting, and mes
 
 import asyncio
 import logging
+import time
 import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass, replace
 import json
 
 import asyncpg
 import aioredis
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from croniter import croniter
 
 from streaming.kafka_client import (
     KafkaClient, 
+    create_kafka_client,
     create_scan_scheduled_message,
     create_scan_completed_message,
-    KafkaMessage
+    KafkaMessage,
+    ProduceRecord,
+    CONFIG_ID_HEADER
 )
+from streaming.topic_router import TopicRouter
+from pipeline.adaptive_schedule import AdaptiveBounds, CHANGE_HISTORY_SQL, adaptive_bounds, effective_interval
+from pipeline.config_state_writer import ConfigStateWriter
+from pipeline.fair_queue import Dequeued, FairQueue
+from pipeline.partition_maintenance import PartitionMaintainer
+from pipeline.scan_coalescer import FAN_OUT_SQL, ScanCoalescer, coalesce_key
+from pipeline.scan_scheduler import ScanScheduler, compile_schedule
+from pipeline.shard_coordinator import ShardCoordinator
 
 logger = logging.getLogger(__name__)
 
+CONFIG_COLUMNS = ('id, organization_id, name, url, schedule, scan_config, alert_rules, enabled, '
+                  'last_scan_at, next_scan_at, definition_updated_at')
+
+# Channel notified by the monitoring_configs triggers of migration 004
+CONFIG_CHANGES_CHANNEL = 'monitoring_config_changes'
+
+SCAN_SCHEDULED_TOPIC = 'scan.scheduled'
+
+# Seconds before a scan that could not be published is tried again, with every config waiting on it
+PUBLISH_RETRY_SECONDS = 30
+
+# Priority lanes in service order and, with priority_topics on, the topic each is published to;
+# unknown priorities use 'normal'. Otherwise every lane goes to scan.scheduled with a priority header.
+PRIORITY_TOPICS = {
+    'high': 'scan.scheduled.high',
+    'normal': 'scan.scheduled',
+    'low': 'scan.scheduled.low'
+}
+
 @dataclass
 class MonitoringConfig:
     """Monitoring configuration data structure"""
@@ -50,36 +80,102 @@ class ScanJob:
     scan_config: Dict[str, Any]
     scheduled_time: datetime
     priority: str = 'normal'
+    organization_id: Optional[str] = None
+    planned_at: Optional[datetime] = None
+
+# GCRA over any number of keys per request, one request after another, in a single round-trip.
+# KEYS: the keys of every request in order. ARGV: request count, then per request its key count
+# followed by (emission interval ms, burst) for each key. Returns the retry-after ms per request,
+# 0 when allowed; a request only consumes from its keys if every one of them allows it.
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local results = {}
+local k = 1
+local a = 2
+for r = 1, tonumber(ARGV[1]) do
+    local nkeys = tonumber(ARGV[a])
+    a = a + 1
+    local retry = 0
+    local tats = {}
+    for i = 0, nkeys - 1 do
+        local interval = tonumber(ARGV[a + 2 * i])
+        local burst = tonumber(ARGV[a + 2 * i + 1])
+        local tat = math.max(tonumber(redis.call('GET', KEYS[k + i]) or now_ms), now_ms)
+        local allow_at = tat + interval - burst * interval
+        if allow_at > now_ms then
+            retry = math.max(retry, allow_at - now_ms)
+        end
+        tats[i] = tat + interval
+    end
+    if retry == 0 then
+        for i = 0, nkeys - 1 do
+            redis.call('SET', KEYS[k + i], tats[i], 'PX', tats[i] - now_ms)
+        end
+    end
+    results[r] = retry
+    k = k + nkeys
+    a = a + 2 * nkeys
+end
+return results
+"""
+
+@dataclass
+class RateLimit:
+    """One scan per interval on average, with up to burst scans back to back"""
+    interval_seconds: float
+    burst: int = 1
+
+@dataclass
+class RateDecision:
+    """Outcome of a rate limit check; retry_after is 0 when allowed"""
+    allowed: bool
+    retry_after: float = 0.0
 
 class RateLimiter:
-    """Rate limiter for managing scan frequency per domain"""
+    """
+    Atomic per-domain and per-organization scan quotas (GCRA)
+    
+    Each key stores its theoretical arrival time, so a check and its
+    consumption happen in one Lua call with no race between replicas. A scan
+    consumes from the domain and organization buckets only if both allow it;
+    otherwise the caller gets how long to wait.
+    """
     
-    def __init__(self, redis: aioredis.Redis):
+    def __init__(self, 
+                 redis: aioredis.Redis,
+                 domain_limit: Optional[RateLimit] = None,
+                 org_limit: Optional[RateLimit] = None,
+                 key_prefix: str = 'scan_rate'):
         self.redis = redis
+        self.domain_limit = domain_limit or RateLimit(interval_seconds=300)
+        self.org_limit = org_limit
+        self.key_prefix = key_prefix
+        self._script = redis.register_script(GCRA_SCRIPT)
     
-    async def is_allowed(self, url: str, min_interval_minutes: int = 5) -> bool:
-        """Check if a scan is allowed for the given URL"""
-        domain = self._extract_domain(url)
-        rate_limit_key = f"scan_rate:{domain}"
-        
-        last_scan = await self.redis.get(rate_limit_key)
-        if last_scan:
-            last_scan_time = datetime.fromisoformat(last_scan.decode())
-            if datetime.now(timezone.utc) - last_scan_time < timedelta(minutes=min_interval_minutes):
-                return False
-        
-        return True
+    async def acquire(self, url: str, organization_id: Optional[str] = None) -> RateDecision:
+        """Consume a scan for the URL's domain and organization if both allow it"""
+        return (await self.acquire_many([(url, organization_id)]))[0]
     
-    async def record_scan(self, url: str, ttl_minutes: int = 5):
-        """Record that a scan was performed for rate limiting"""
-        domain = self._extract_domain(url)
-        rate_limit_key = f"scan_rate:{domain}"
+    async def acquire_many(self, requests: List[Tuple[str, Optional[str]]]) -> List[RateDecision]:
+        """Check and consume many (url, organization_id) scans in one round-trip, in order"""
+        if not requests:
+            return []
         
-        await self.redis.setex(
-            rate_limit_key,
-            ttl_minutes * 60,
-            datetime.now(timezone.utc).isoformat()
-        )
+        keys: List[str] = []
+        args: List[Any] = [len(requests)]
+        for url, organization_id in requests:
+            limits = [(f"{self.key_prefix}:domain:{self._extract_domain(url)}", self.domain_limit)]
+            if self.org_limit and organization_id:
+                limits.append((f"{self.key_prefix}:org:{organization_id}", self.org_limit))
+            
+            args.append(len(limits))
+            for key, limit in limits:
+                keys.append(key)
+                args.extend([int(limit.interval_seconds * 1000), limit.burst])
+        
+        retries = await self._script(keys=keys, args=args)
+        return [RateDecision(allowed=not retry, retry_after=int(retry) / 1000) for retry in retries]
     
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL for rate limiting"""
@@ -99,29 +195,107 @@ class MonitoringPipeline:
     def __init__(self, 
                  db_url: str,
                  redis_url: str = "redis://localhost:6379",
-                 kafka_servers: str = "localhost:29092"):
+                 kafka_servers: str = "localhost:29092",
+                 kafka: Optional[KafkaClient] = None,
+                 router: Optional[TopicRouter] = None,
+                 config_poll_interval: int = 30,
+                 config_watermark_overlap: int = 60,
+                 config_notify_debounce: float = 0.5,
+                 schedule_jitter_window: float = 0.0,
+                 scan_admission_rate: Optional[float] = None,
+                 scheduler_shards: int = 0,
+                 replica_id: Optional[str] = None,
+                 domain_rate_limit: Optional[RateLimit] = None,
+                 org_rate_limit: Optional[RateLimit] = None,
+                 scan_dispatch_rate: Optional[float] = None,
+                 scan_dispatch_batch: int = 100,
+                 org_weights: Optional[Dict[str, float]] = None,
+                 state_flush_interval: float = 1.0,
+                 adaptive_scheduling: bool = False,
+                 adaptive_lookback_days: int = 30,
+                 adaptive_refresh_interval: int = 900,
+                 scan_coalesce_window: float = 0.0,
+                 catch_up_rate: Optional[float] = 10.0,
+                 partition_maintenance_interval: Optional[float] = 6 * 3600,
+                 priority_topics: bool = False):
         self.db_url = db_url
         self.redis_url = redis_url
         self.kafka_servers = kafka_servers
+        self.config_poll_interval = config_poll_interval
+        self.config_watermark_overlap = config_watermark_overlap
+        self.config_notify_debounce = config_notify_debounce
+        self.schedule_jitter_window = schedule_jitter_window
+        self.scan_admission_rate = scan_admission_rate
+        self.scheduler_shards = scheduler_shards
+        self.replica_id = replica_id
+        self.domain_rate_limit = domain_rate_limit
+        self.org_rate_limit = org_rate_limit
+        self.scan_dispatch_rate = scan_dispatch_rate
+        self.scan_dispatch_batch = scan_dispatch_batch
+        self.state_flush_interval = state_flush_interval
+        self.adaptive_scheduling = adaptive_scheduling
+        self.adaptive_lookback_days = adaptive_lookback_days
+        self.adaptive_refresh_interval = adaptive_refresh_interval
+        self.scan_coalesce_window = scan_coalesce_window
+        self.catch_up_rate = catch_up_rate
+        self.partition_maintenance_interval = partition_maintenance_interval
+        self.priority_topics = priority_topics
         
-        # Core components
+        # Core components; a shared Kafka client and router may be injected
         self.db_pool: Optional[asyncpg.Pool] = None
         self.redis: Optional[aioredis.Redis] = None
-        self.kafka: Optional[KafkaClient] = None
+        self.kafka: Optional[KafkaClient] = kafka
+        self.router: Optional[TopicRouter] = router
+        self._owns_kafka = kafka is None
         self.scheduler: Optional[AsyncIOScheduler] = None
+        self.scan_scheduler: Optional[ScanScheduler] = None
+        self.shards: Optional[ShardCoordinator] = None
         self.rate_limiter: Optional[RateLimiter] = None
+        self.state_writer: Optional[ConfigStateWriter] = None
+        self.coalescer: Optional[ScanCoalescer] = None
+        self.partition_maintainer: Optional[PartitionMaintainer] = None
+        self.config_listener: Optional[asyncpg.Connection] = None
         
         # State
         self.running = False
         self.active_configs: Dict[str, MonitoringConfig] = {}
         
+        # Config change feed: newest definition_updated_at applied, and ids notified since the last sync
+        self.config_watermark: Optional[datetime] = None
+        self._pending_config_ids: Set[str] = set()
+        self._config_changed = asyncio.Event()
+        self._config_sync_task: Optional[asyncio.Task] = None
+        
+        # Triggered scans wait here, by priority lane and fairly across organizations, until dispatched
+        self.scan_queue = FairQueue(PRIORITY_TOPICS, weights=org_weights)
+        self._dispatch_task: Optional[asyncio.Task] = None
+        
+        # Effective scan interval in seconds of configs on adaptive schedules, derived from change history
+        self.adaptive_intervals: Dict[str, float] = {}
+        
+        # Schedules of shards taken over from another replica, being restored from next_scan_at
+        self._restore_tasks: Set[asyncio.Task] = set()
+        
         # Metrics
         self.metrics = {
             'scans_scheduled': 0,
             'scans_rate_limited': 0,
+            'scans_deferred': 0,
+            'scans_already_queued': 0,
+            'scans_dropped': 0,
+            'scans_coalesced': 0,
+            'scan_fanouts': 0,
             'scans_completed': 0,
             'scans_failed': 0,
             'configs_loaded': 0,
+            'config_full_reloads': 0,
+            'config_changes_applied': 0,
+            'config_notifications': 0,
+            'scans_not_owned': 0,
+            'adaptive_refreshes': 0,
+            'adaptive_intervals_changed': 0,
+            'adaptive_tightened': 0,
+            'startup_seconds': None,
             'last_error': None
         }
     
@@ -129,6 +303,7 @@ class MonitoringPipeline:
         """Initialize and start the monitoring pipeline"""
         try:
             logger.info("Starting TechScanIQ Monitoring Pipeline...")
+            started = time.monotonic()
             
             # Initialize database connection pool
             self.db_pool = await asyncpg.create_pool(
@@ -139,37 +314,69 @@ class MonitoringPipeline:
             )
             logger.info("Database connection pool created")
             
+            # next_scan_at / last_scan_at bookkeeping is written behind, coalesced per config
+            self.state_writer = ConfigStateWriter(self.db_pool, flush_interval=self.state_flush_interval)
+            await self.state_writer.start()
+            if self.partition_maintenance_interval:
+                self.partition_maintainer = PartitionMaintainer(self.db_pool)
+            
             # Initialize Redis
             self.redis = aioredis.from_url(self.redis_url)
             await self.redis.ping()
-            self.rate_limiter = RateLimiter(self.redis)
+            self.rate_limiter = RateLimiter(self.redis, self.domain_rate_limit, self.org_rate_limit)
+            if self.scan_coalesce_window:
+                self.coalescer = ScanCoalescer(self.redis, window=self.scan_coalesce_window)
             logger.info("Redis connection established")
             
             # Initialize Kafka client
-            self.kafka = KafkaClient(
-                bootstrap_servers=self.kafka_servers,
-                redis_url=self.redis_url,
-                client_id="monitoring-pipeline"
-            )
-            await self.kafka.start()
-            logger.info("Kafka client started")
+            if self._owns_kafka:
+                self.kafka = create_kafka_client(
+                    bootstrap_servers=self.kafka_servers,
+                    redis_url=self.redis_url,
+                    client_id="monitoring-pipeline"
+                )
+                await self.kafka.start()
+                logger.info("Kafka client started")
             
-            # Initialize scheduler
+            # Initialize schedulers: APScheduler for maintenance tasks, the scan scheduler for configs
             self.scheduler = AsyncIOScheduler(timezone='UTC')
             self.scheduler.start()
+            self.scan_scheduler = ScanScheduler(
+                self._run_scheduled_scan,
+                jitter_window=self.schedule_jitter_window,
+                admission_rate=self.scan_admission_rate
+            )
             logger.info("Scheduler started")
             
+            # With several replicas, each schedules only the config shards it holds a lease on
+            if self.scheduler_shards:
+                self.shards = ShardCoordinator(
+                    self.redis,
+                    replica_id=self.replica_id,
+                    shard_count=self.scheduler_shards,
+                    on_change=self._on_shards_changed
+                )
+                await self.shards.start()
+            
             # Set up Kafka consumers
             await self._setup_consumers()
             
-            # Load monitoring configurations
-            await self._load_monitoring_configs()
+            # Load monitoring configurations and resume their schedules, then follow changes incrementally
+            await self._listen_for_config_changes()
+            await self._load_monitoring_configs(restore=True)
+            if self.adaptive_scheduling:
+                await self._refresh_adaptive_intervals()
+            await self.scan_scheduler.start()
             
             # Start periodic tasks
             self._start_periodic_tasks()
             
             self.running = True
-            logger.info("Monitoring Pipeline started successfully")
+            self._config_sync_task = asyncio.create_task(self._process_config_notifications())
+            self._dispatch_task = asyncio.create_task(self._dispatch_scans())
+            
+            self.metrics['startup_seconds'] = round(time.monotonic() - started, 3)
+            logger.info(f"Monitoring Pipeline started successfully in {self.metrics['startup_seconds']}s")
             
         except Exception as e:
             logger.error(f"Failed to start monitoring pipeline: {e}")
@@ -182,11 +389,34 @@ class MonitoringPipeline:
         self.running = False
         
         try:
+            if self._config_sync_task:
+                self._config_sync_task.cancel()
+                await asyncio.gather(self._config_sync_task, return_exceptions=True)
+            
+            for task in list(self._restore_tasks):
+                task.cancel()
+            await asyncio.gather(*self._restore_tasks, return_exceptions=True)
+            
+            if self._dispatch_task:
+                self._dispatch_task.cancel()
+                await asyncio.gather(self._dispatch_task, return_exceptions=True)
+                if self.scan_queue:
+                    logger.info(f"Dropped {len(self.scan_queue)} queued scans; they run on their next schedule")
+            
+            if self.config_listener:
+                await self.config_listener.close()
+            
+            if self.scan_scheduler:
+                await self.scan_scheduler.stop()
+            
+            if self.shards:
+                await self.shards.stop()
+            
             if self.scheduler:
                 self.scheduler.shutdown(wait=True)
                 logger.info("Scheduler stopped")
             
-            if self.kafka:
+            if self.kafka and self._owns_kafka:
                 await self.kafka.stop()
                 logger.info("Kafka client stopped")
             
@@ -194,6 +424,9 @@ class MonitoringPipeline:
                 await self.redis.close()
                 logger.info("Redis connection closed")
             
+            if self.state_writer:
+                await self.state_writer.stop()
+            
             if self.db_pool:
                 await self.db_pool.close()
                 logger.info("Database pool closed")
@@ -203,6 +436,18 @@ class MonitoringPipeline:
     
     async def _setup_consumers(self):
         """Set up Kafka consumers for pipeline messages"""
+        if self.router:
+            self.router.register('scan.completed', 'pipeline.scan-completed', 
+                                 message_handler=self._handle_scan_completed)
+            self.router.register('system.health', 'pipeline.system-health', 
+                                 message_handler=self._handle_system_health)
+            if self.adaptive_scheduling:
+                self.router.register('change.detected', 'pipeline.adaptive-schedule',
+                                     message_handler=self._handle_change_detected,
+                                     header_filter=self._is_adaptive_change)
+            logger.info("Pipeline handlers registered with topic router")
+            return
+        
         # Consumer for scan completion events
         await self.kafka.create_consumer(
             topics=['scan.completed'],
@@ -214,156 +459,544 @@ class MonitoringPipeline:
         await self.kafka.create_consumer(
             topics=['system.health'],
             group_id='monitoring-pipeline-health',
-            message_handler=self._handle_system_health
+            message_handler=self._handle_system_health,
+            retry_tiers=[]
         )
         
+        # Detected changes tighten adaptive schedules; the periodic refresh catches anything missed
+        if self.adaptive_scheduling:
+            await self.kafka.create_consumer(
+                topics=['change.detected'],
+                group_id='monitoring-pipeline-adaptive',
+                message_handler=self._handle_change_detected,
+                header_filter=self._is_adaptive_change,
+                retry_tiers=[]
+            )
+        
         logger.info("Kafka consumers set up")
     
-    async def _load_monitoring_configs(self):
-        """Load all active monitoring configurations from database"""
+    async def _load_monitoring_configs(self, restore: bool = False):
+        """
+        Reconcile all active monitoring configurations with the database
+        
+        Args:
+            restore: Resume schedules from the persisted next_scan_at and catch up missed scans, on startup
+        """
         try:
             async with self.db_pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT id, organization_id, name, url, schedule, scan_config, 
-                           alert_rules, enabled, last_scan_at, next_scan_at
+                rows = await conn.fetch(f"""
+                    SELECT {CONFIG_COLUMNS}
                     FROM monitoring_configs 
                     WHERE enabled = true
                 """)
-                
-                self.active_configs.clear()
-                
-                for row in rows:
-                    config = MonitoringConfig(
-                        id=str(row['id']),
-                        organization_id=str(row['organization_id']),
-                        name=row['name'],
-                        url=row['url'],
-                        schedule=row['schedule'],
-                        scan_config=row['scan_config'],
-                        alert_rules=row['alert_rules'],
-                        enabled=row['enabled'],
-                        last_scan_at=row['last_scan_at'],
-                        next_scan_at=row['next_scan_at']
-                    )
-                    
-                    self.active_configs[config.id] = config
-                    await self._schedule_config(config)
-                
-                self.metrics['configs_loaded'] = len(self.active_configs)
-                logger.info(f"Loaded {len(self.active_configs)} monitoring configurations")
-                
+            
+            configs = {config.id: config for config in map(self._row_to_config, rows)}
+            
+            # Jobs whose schedule is unchanged keep their next run
+            self.scan_scheduler.remove_many([
+                config_id for config_id in self.active_configs if config_id not in configs
+            ])
+            self.active_configs = configs
+            entries = [entry for entry in map(self._schedule_entry, configs.values()) if entry]
+            if restore:
+                self._restore_schedules(
+                    (config_id, schedule, self._persisted_next_scan(configs[config_id].next_scan_at))
+                    for config_id, schedule, _ in entries
+                )
+            else:
+                self.scan_scheduler.add_many(entries)
+            self._advance_config_watermark(rows)
+            
+            self.metrics['configs_loaded'] = len(self.active_configs)
+            self.metrics['config_full_reloads'] += 1
+            logger.info(f"Loaded {len(self.active_configs)} monitoring configurations")
+            
         except Exception as e:
             logger.error(f"Failed to load monitoring configurations: {e}")
             raise
     
-    async def _schedule_config(self, config: MonitoringConfig):
-        """Schedule a monitoring configuration"""
+    def _row_to_config(self, row: asyncpg.Record) -> MonitoringConfig:
+        """Build a MonitoringConfig from a monitoring_configs row"""
+        return MonitoringConfig(
+            id=str(row['id']),
+            organization_id=str(row['organization_id']),
+            name=row['name'],
+            url=row['url'],
+            schedule=row['schedule'],
+            scan_config=row['scan_config'],
+            alert_rules=row['alert_rules'],
+            enabled=row['enabled'],
+            last_scan_at=row['last_scan_at'],
+            next_scan_at=row['next_scan_at']
+        )
+    
+    def _advance_config_watermark(self, rows: List[asyncpg.Record]):
+        """Move the change-feed watermark to the newest definition change seen"""
+        latest = max((row['definition_updated_at'] for row in rows if row['definition_updated_at']), default=None)
+        if latest and (self.config_watermark is None or latest > self.config_watermark):
+            self.config_watermark = latest
+    
+    def _apply_config_rows(self, rows: List[asyncpg.Record], config_ids: Optional[List[str]] = None) -> int:
+        """
+        Apply changed monitoring_configs rows to the active set and the scan scheduler
+        
+        Args:
+            rows: Changed rows, including disabled ones
+            config_ids: Ids that were looked up; any without a row were deleted
+            
+        Returns:
+            Number of configs added, updated or removed
+        """
+        removed = [str(row['id']) for row in rows if not row['enabled']]
+        if config_ids is not None:
+            found = {str(row['id']) for row in rows}
+            removed.extend(config_id for config_id in config_ids if config_id not in found)
+        
+        changed = 0
+        for config_id in removed:
+            if self.active_configs.pop(config_id, None) is not None:
+                changed += 1
+        self.scan_scheduler.remove_many(removed)
+        
+        entries = []
+        for config in map(self._row_to_config, (row for row in rows if row['enabled'])):
+            current = self.active_configs.get(config.id)
+            if current is not None and replace(current, last_scan_at=None, next_scan_at=None) == replace(
+                    config, last_scan_at=None, next_scan_at=None):
+                continue
+            
+            self.active_configs[config.id] = config
+            entry = self._schedule_entry(config)
+            if entry:
+                entries.append(entry)
+            changed += 1
+        self.scan_scheduler.add_many(entries)
+        
+        self.metrics['configs_loaded'] = len(self.active_configs)
+        self.metrics['config_changes_applied'] += changed
+        return changed
+    
+    async def _sync_configs(self, config_ids: List[str]):
+        """Reload specific monitoring configurations, e.g. after a change notification"""
+        ids = []
+        for config_id in config_ids:
+            try:
+                ids.append(uuid.UUID(config_id))
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid config id {config_id}")
+        
+        if not ids:
+            return
+        
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT {CONFIG_COLUMNS}
+                FROM monitoring_configs 
+                WHERE id = ANY($1::uuid[])
+            """, ids)
+        
+        changed = self._apply_config_rows(rows, [str(config_id) for config_id in ids])
+        self._advance_config_watermark(rows)
+        if changed:
+            logger.info(f"Applied {changed} monitoring configuration changes")
+    
+    async def _poll_config_changes(self):
+        """Apply definition changes newer than the watermark; catches notifications missed while disconnected"""
         try:
-            job_id = f"scan_{config.id}"
-            
-            # Remove existing job if it exists
-            if self.scheduler.get_job(job_id):
-                self.scheduler.remove_job(job_id)
-            
-            schedule = config.schedule
-            if schedule['type'] == 'cron':
-                # Parse cron expression
-                trigger = CronTrigger.from_crontab(
-                    schedule['expression'],
-                    timezone=schedule.get('timezone', 'UTC')
-                )
+            if self.config_listener is None or self.config_listener.is_closed():
+                await self._listen_for_config_changes()
+            
+            if self.config_watermark is None:
+                return
+            
+            # Overlap the watermark so rows committed slightly out of order are not skipped
+            async with self.db_pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT {CONFIG_COLUMNS}
+                    FROM monitoring_configs 
+                    WHERE definition_updated_at > $1
+                """, self.config_watermark - timedelta(seconds=self.config_watermark_overlap))
+            
+            changed = self._apply_config_rows(rows)
+            self._advance_config_watermark(rows)
+            if changed:
+                logger.info(f"Applied {changed} monitoring configuration changes from the change feed")
+            
+        except Exception as e:
+            logger.error(f"Failed to poll monitoring configuration changes: {e}")
+    
+    async def _listen_for_config_changes(self):
+        """Open a dedicated connection that LISTENs for monitoring_configs changes"""
+        try:
+            self.config_listener = await asyncpg.connect(self.db_url)
+            await self.config_listener.add_listener(CONFIG_CHANGES_CHANNEL, self._on_config_notification)
+            logger.info(f"Listening for monitoring configuration changes on {CONFIG_CHANGES_CHANNEL}")
+        except Exception as e:
+            self.config_listener = None
+            logger.warning(f"Config change notifications unavailable, relying on polling: {e}")
+    
+    def _on_config_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str):
+        """Queue the config named in a notification for the next sync"""
+        try:
+            self._pending_config_ids.add(json.loads(payload)['id'])
+            self.metrics['config_notifications'] += 1
+            self._config_changed.set()
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed config change notification {payload!r}: {e}")
+    
+    async def _process_config_notifications(self):
+        """Sync notified configs, debounced so a burst of edits is applied in one query"""
+        while self.running:
+            try:
+                await self._config_changed.wait()
+                await asyncio.sleep(self.config_notify_debounce)
+                self._config_changed.clear()
                 
-            elif schedule['type'] == 'interval':
-                # Parse interval
-                minutes = schedule.get('minutes', 60)
-                trigger = IntervalTrigger(minutes=minutes)
+                config_ids = list(self._pending_config_ids)
+                self._pending_config_ids.clear()
+                try:
+                    await self._sync_configs(config_ids)
+                except Exception:
+                    # Keep them for the next attempt; polling and the full reload also cover them
+                    self._pending_config_ids.update(config_ids)
+                    raise
                 
-            else:
-                logger.error(f"Unknown schedule type: {schedule['type']}")
-                return
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Failed to apply config change notifications: {e}")
+                await asyncio.sleep(self.config_poll_interval)
+    
+    def _owns_config(self, config_id: str) -> bool:
+        """Whether this replica schedules a config; always true without sharding"""
+        return self.shards is None or self.shards.owns(config_id)
+    
+    def _on_shards_changed(self, acquired: Set[int], released: Set[int]):
+        """Move the configs of shards that changed hands into or out of the scan scheduler"""
+        self.scan_scheduler.remove_many([
+            config_id for config_id in self.active_configs if self.shards.shard_of(config_id) in released
+        ])
+        entries = [entry for entry in map(self._schedule_entry, (
+            config for config in self.active_configs.values() if self.shards.shard_of(config.id) in acquired
+        )) if entry]
+        self.scan_scheduler.add_many(entries)
+        
+        # The previous owner may have missed scans before its leases expired
+        if entries and self.running:
+            task = asyncio.create_task(self._restore_taken_over([config_id for config_id, _, _ in entries]))
+            self._restore_tasks.add(task)
+            task.add_done_callback(self._restore_tasks.discard)
+    
+    async def _restore_taken_over(self, config_ids: List[str]):
+        """Resume configs of shards taken over from another replica at their persisted next_scan_at"""
+        try:
+            async with self.db_pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT id, next_scan_at
+                    FROM monitoring_configs 
+                    WHERE id = ANY($1::uuid[])
+                """, [uuid.UUID(config_id) for config_id in config_ids])
             
-            # Add job to scheduler
-            self.scheduler.add_job(
-                func=self._trigger_scan,
-                trigger=trigger,
-                id=job_id,
-                args=[config],
-                max_instances=1,  # Prevent overlapping scans
-                coalesce=True,    # Coalesce missed runs
-                misfire_grace_time=300  # 5 minutes grace time
-            )
+            entries = []
+            for row in rows:
+                config = self.active_configs.get(str(row['id']))
+                entry = self._schedule_entry(config) if config else None
+                if entry:
+                    entries.append((entry[0], entry[1], self._persisted_next_scan(row['next_scan_at'])))
+            self._restore_schedules(entries)
             
-            logger.debug(f"Scheduled monitoring config: {config.name} ({config.id})")
+        except Exception as e:
+            logger.error(f"Failed to restore schedules of {len(config_ids)} taken over configs: {e}")
+    
+    def _restore_schedules(self, entries):
+        """Add scheduler entries at their persisted next fire time, replaying missed scans at catch_up_rate"""
+        caught_up, missed = self.scan_scheduler.restore_many(entries, catch_up_rate=self.catch_up_rate)
+        if caught_up:
+            rate = f"{self.catch_up_rate:g}/s" if self.catch_up_rate else "once"
+            logger.warning(f"{caught_up} configs missed {missed} scheduled scans; catching up {rate}")
+    
+    @staticmethod
+    def _persisted_next_scan(next_scan_at: Optional[datetime]) -> Optional[float]:
+        return next_scan_at.timestamp() if next_scan_at else None
+    
+    def _schedule_entry(self, config: MonitoringConfig):
+        """Scan scheduler entry for a monitoring configuration, or None if it is not ours or its schedule is invalid"""
+        if not self._owns_config(config.id):
+            return None
+        try:
+            schedule = compile_schedule(config.schedule)
+            
+            # Adaptive configs run on their effective interval, or their own schedule when at its period
+            interval = self.adaptive_intervals.get(config.id)
+            bounds = self._adaptive_bounds(config) if interval is not None else None
+            if bounds:
+                interval = min(max(interval, bounds.min_seconds), bounds.max_seconds)
+                if interval != schedule.min_period:
+                    schedule = compile_schedule({'type': 'interval', 'minutes': interval / 60})
             
+            return config.id, schedule, None
         except Exception as e:
             logger.error(f"Failed to schedule config {config.id}: {e}")
+            return None
     
-    async def _trigger_scan(self, config: MonitoringConfig):
-        """Trigger a scheduled scan"""
+    def _adaptive_bounds(self, config: MonitoringConfig) -> Optional[AdaptiveBounds]:
+        """Interval bounds of a config on an adaptive schedule, or None if adaptive mode or the config opts out"""
+        if not self.adaptive_scheduling:
+            return None
         try:
-            # Check rate limiting
-            if not await self.rate_limiter.is_allowed(config.url):
-                self.metrics['scans_rate_limited'] += 1
-                logger.info(f"Scan rate limited for {config.url}")
-                return
+            return adaptive_bounds(config.schedule, compile_schedule(config.schedule))
+        except Exception as e:
+            logger.error(f"Invalid adaptive schedule for config {config.id}: {e}")
+            return None
+    
+    async def _refresh_adaptive_intervals(self, chunk_size: int = 5000):
+        """Recompute effective intervals of this replica's adaptive configs from their change history"""
+        try:
+            candidates: Dict[str, AdaptiveBounds] = {}
+            for config_id, config in self.active_configs.items():
+                bounds = self._adaptive_bounds(config) if self._owns_config(config_id) else None
+                if bounds:
+                    candidates[config_id] = bounds
+            
+            now = datetime.now(timezone.utc)
+            lookback = timedelta(days=self.adaptive_lookback_days)
+            config_ids = list(candidates)
+            
+            intervals: Dict[str, float] = {}
+            async with self.db_pool.acquire() as conn:
+                for i in range(0, len(config_ids), chunk_size):
+                    rows = await conn.fetch(
+                        CHANGE_HISTORY_SQL,
+                        [uuid.UUID(config_id) for config_id in config_ids[i:i + chunk_size]],
+                        now - lookback
+                    )
+                    for row in rows:
+                        last_change_at = row['last_change_at']
+                        quiet = (now - last_change_at).total_seconds() if last_change_at else lookback.total_seconds()
+                        intervals[row['config_id']] = effective_interval(
+                            candidates[row['config_id']], quiet, row['change_count'], lookback.total_seconds()
+                        )
+            
+            changed = [config_id for config_id, interval in intervals.items()
+                       if self.adaptive_intervals.get(config_id) != interval]
+            dropped = [config_id for config_id in self.adaptive_intervals if config_id not in intervals]
+            self.adaptive_intervals = intervals
+            self._reschedule_configs(changed + dropped)
+            
+            self.metrics['adaptive_refreshes'] += 1
+            self.metrics['adaptive_intervals_changed'] += len(changed)
+            if changed:
+                logger.info(f"Adaptive scheduling: {len(changed)} of {len(intervals)} configs changed interval")
+                
+        except Exception as e:
+            logger.error(f"Failed to refresh adaptive scan intervals: {e}")
+            self.metrics['last_error'] = str(e)
+    
+    def _reschedule_configs(self, config_ids: List[str]):
+        """Re-add active configs to the scan scheduler after their effective schedule changed"""
+        self.scan_scheduler.add_many(
+            entry for entry in map(self._schedule_entry, (
+                self.active_configs[config_id] for config_id in config_ids if config_id in self.active_configs
+            )) if entry
+        )
+    
+    def _is_adaptive_change(self, headers: Dict[str, str]) -> bool:
+        """Header filter: a detected change for an adaptive config this replica schedules"""
+        config = self.active_configs.get(headers.get(CONFIG_ID_HEADER))
+        return config is not None and self._owns_config(config.id) and self._adaptive_bounds(config) is not None
+    
+    async def _handle_change_detected(self, message: KafkaMessage, context: Dict[str, Any]):
+        """Snap an adaptive config back to its minimum interval after a detected change"""
+        config_id = context.get('headers', {}).get(CONFIG_ID_HEADER) or message.data.get('config_id')
+        config = self.active_configs.get(config_id)
+        bounds = self._adaptive_bounds(config) if config else None
+        if not bounds or self.adaptive_intervals.get(config_id) == bounds.min_seconds:
+            return
+        
+        self.adaptive_intervals[config_id] = bounds.min_seconds
+        self.metrics['adaptive_tightened'] += 1
+        self._reschedule_configs([config_id])
+        logger.info(f"Change detected for {config_id}; scanning every {bounds.min_seconds / 60:.0f} minutes")
+    
+    async def _schedule_config(self, config: MonitoringConfig):
+        """Schedule a monitoring configuration"""
+        entry = self._schedule_entry(config)
+        if entry:
+            self.scan_scheduler.add(*entry)
+            logger.debug(f"Scheduled monitoring config: {config.name} ({config.id})")
+    
+    async def _run_scheduled_scan(self, config_id: str, planned: float):
+        """Scan scheduler callback"""
+        # Shards can move between scheduling and firing; only the current lease holder scans
+        if not self._owns_config(config_id):
+            self.metrics['scans_not_owned'] += 1
+            return
+        
+        config = self.active_configs.get(config_id)
+        if config:
+            await self._trigger_scan(config, planned_at=datetime.fromtimestamp(planned, timezone.utc))
+    
+    async def _trigger_scan(self, config: MonitoringConfig, planned_at: Optional[datetime] = None):
+        """Queue a scheduled scan in its priority lane"""
+        try:
+            priority = config.scan_config.get('priority', 'normal')
+            if priority not in PRIORITY_TOPICS:
+                priority = 'normal'
             
-            # Create scan job
-            job_id = str(uuid.uuid4())
             scan_job = ScanJob(
-                job_id=job_id,
+                job_id=str(uuid.uuid4()),
                 config_id=config.id,
                 url=config.url,
                 scan_config=config.scan_config,
                 scheduled_time=datetime.now(timezone.utc),
-                priority=config.scan_config.get('priority', 'normal')
+                priority=priority,
+                organization_id=config.organization_id,
+                planned_at=planned_at
             )
             
-            # Create Kafka message
-            message = await create_scan_scheduled_message(
-                config_id=config.id,
-                url=config.url,
-                scan_config=config.scan_config
-            )
-            
-            # Send to Kafka
-            success = await self.kafka.produce_message(
-                topic='scan.scheduled',
-                message=message,
-                key=config.url  # Use URL as key for consistent partitioning
-            )
-            
-            if success:
-                # Record rate limiting
-                await self.rate_limiter.record_scan(config.url)
-                
-                # Update metrics
-                self.metrics['scans_scheduled'] += 1
-                
-                # Update database
-                await self._update_scan_scheduled(config.id, scan_job)
-                
-                logger.info(f"Scan scheduled for {config.name}: {job_id}")
-            else:
-                logger.error(f"Failed to schedule scan for {config.name}")
+            # A config still waiting from its previous run is not queued twice
+            if not self.scan_queue.put(config.id, scan_job, priority, config.organization_id or ''):
+                self.metrics['scans_already_queued'] += 1
                 
         except Exception as e:
             logger.error(f"Error triggering scan for config {config.id}: {e}")
             self.metrics['last_error'] = str(e)
     
-    async def _update_scan_scheduled(self, config_id: str, scan_job: ScanJob):
-        """Update database when scan is scheduled"""
-        try:
-            async with self.db_pool.acquire() as conn:
-                # Calculate next scan time
-                config = self.active_configs[config_id]
-                next_scan_time = self._calculate_next_scan_time(config)
+    async def _dispatch_scans(self):
+        """Publish queued scans in lane and fair-share order, at most scan_dispatch_rate per second"""
+        while self.running:
+            try:
+                await self.scan_queue.wait()
                 
-                await conn.execute("""
-                    UPDATE monitoring_configs 
-                    SET next_scan_at = $1, updated_at = NOW()
-                    WHERE id = $2
-                """, next_scan_time, uuid.UUID(config_id))
+                limit = self.scan_dispatch_batch
+                if self.scan_dispatch_rate:
+                    limit = max(1, min(limit, int(self.scan_dispatch_rate)))
+                
+                batch = self.scan_queue.pop(limit)
+                await self._publish_scans(batch)
+                
+                if self.scan_dispatch_rate:
+                    await asyncio.sleep(len(batch) / self.scan_dispatch_rate)
                 
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error dispatching scans: {e}")
+                self.metrics['last_error'] = str(e)
+                await asyncio.sleep(1)
+    
+    async def _publish_scans(self, batch: List[Dequeued]):
+        """Coalesce a batch of queued scans, check their quotas in one call and publish them to their lane topics"""
+        # Configs can be removed, or move to another replica, while their scan is queued
+        live = [queued for queued in batch if queued.key in self.active_configs and self._owns_config(queued.key)]
+        self.metrics['scans_dropped'] += len(batch) - len(live)
+        if not live:
+            return
+        
+        # Scans of the same site with the same options travel as one; the first in service order leads
+        groups: Dict[str, List[Dequeued]] = {}
+        for queued in live:
+            key = coalesce_key(queued.item.url, queued.item.scan_config) if self.coalescer else queued.key
+            groups.setdefault(key, []).append(queued)
+        
+        if self.coalescer:
+            leaders = await self.coalescer.claim([
+                (key, members[0].item.job_id, members[0].key, [queued.key for queued in members[1:]])
+                for key, members in groups.items()
+            ])
+            for (key, members), leader in zip(list(groups.items()), leaders):
+                if leader is not None:
+                    # Another config's scan of this site is under way; its result fans out to these
+                    del groups[key]
+                    self.metrics['scans_coalesced'] += len(members)
+                    for queued in members:
+                        self._update_scan_scheduled(queued.key, queued.item)
+        
+        if not groups:
+            return
+        
+        decisions = await self.rate_limiter.acquire_many(
+            [(members[0].item.url, members[0].item.organization_id) for members in groups.values()]
+        )
+        
+        records: List[ProduceRecord] = []
+        published: List[Tuple[str, List[Dequeued]]] = []
+        for (key, members), decision in zip(groups.items(), decisions):
+            if not decision.allowed:
+                await self._defer_rate_limited(key, members, decision.retry_after)
+                continue
+            
+            leader = members[0]
+            scan_job = leader.item
+            message = await create_scan_scheduled_message(
+                config_id=scan_job.config_id,
+                url=scan_job.url,
+                scan_config=scan_job.scan_config,
+                planned_at=scan_job.planned_at,
+                priority=leader.lane,
+                queue_wait_ms=leader.wait * 1000,
+                config_ids=[queued.key for queued in members] if len(members) > 1 else None,
+                job_id=scan_job.job_id
+            )
+            records.append(ProduceRecord(
+                topic=PRIORITY_TOPICS[leader.lane] if self.priority_topics else SCAN_SCHEDULED_TOPIC,
+                message=message,
+                key=scan_job.url  # Use URL as key for consistent partitioning
+            ))
+            published.append((key, members))
+        
+        if not records:
+            return
+        
+        results = await self.kafka.produce_batch(records)
+        for (key, members), result in zip(published, results):
+            scan_job = members[0].item
+            if result.success:
+                self.metrics['scans_scheduled'] += 1
+                self.metrics['scans_coalesced'] += len(members) - 1
+                for queued in members:
+                    self._update_scan_scheduled(queued.key, queued.item)
+                logger.info(f"Scan scheduled for {scan_job.config_id} ({scan_job.priority}, "
+                            f"{len(members)} configs): {scan_job.job_id}")
+            else:
+                # The configs' next runs are already scheduled past this one, so retry it instead of skipping it
+                deferred = await self._defer_scan(key, members, PUBLISH_RETRY_SECONDS)
+                logger.error(f"Failed to schedule scan for {scan_job.config_id}: {result.error}; "
+                             f"{deferred} configs retry in {PUBLISH_RETRY_SECONDS}s")
+    
+    async def _defer_rate_limited(self, key: str, members: List[Dequeued], retry_after: float):
+        """Retry a rate limited scan, and every config waiting on it, once the quota allows"""
+        self.metrics['scans_rate_limited'] += 1
+        deferred = await self._defer_scan(key, members, retry_after)
+        logger.info(f"Scan rate limited for {members[0].item.url}; {deferred} configs retry in {retry_after:.0f}s")
+    
+    async def _defer_scan(self, key: str, members: List[Dequeued], retry_after: float) -> int:
+        """Give up the claim of a scan that was not published and retry it for every config waiting on it"""
+        config_ids = [queued.key for queued in members]
+        if self.coalescer:
+            # Configs that subscribed since the claim have no scan to wait for either
+            config_ids += await self.coalescer.release(key, members[0].item.job_id)
+        
+        deferred = 0
+        for config_id in dict.fromkeys(config_ids):
+            # Unless the next regular run comes first
+            if self.scan_scheduler and self._owns_config(config_id) and self.scan_scheduler.defer(
+                    config_id, time.time() + retry_after):
+                deferred += 1
+        
+        self.metrics['scans_deferred'] += deferred
+        return deferred
+    
+    def _update_scan_scheduled(self, config_id: str, scan_job: ScanJob):
+        """Record the config's next scan time for the next state flush"""
+        try:
+            # Next scan time as scheduled, falling back to the schedule definition
+            next_scan_time = self.scan_scheduler.next_run_time(config_id) if self.scan_scheduler else None
+            if next_scan_time is None:
+                next_scan_time = self._calculate_next_scan_time(self.active_configs[config_id])
+            
+            self.state_writer.set_next_scan(config_id, next_scan_time)
+            
         except Exception as e:
             logger.error(f"Failed to update scan scheduled for config {config_id}: {e}")
     
@@ -399,19 +1032,79 @@ class MonitoringPipeline:
             # Update metrics
             self.metrics['scans_completed'] += 1
             
-            # Update database
-            async with self.db_pool.acquire() as conn:
-                await conn.execute("""
-                    UPDATE monitoring_configs 
-                    SET last_scan_at = NOW()
-                    WHERE id = $1
-                """, uuid.UUID(config_id))
+            # Written behind with the next state flush
+            self.state_writer.set_last_scan(config_id, datetime.now(timezone.utc))
             
             logger.info(f"Scan completed for config {config_id}: {scan_id}")
             
         except Exception as e:
             logger.error(f"Error handling scan completed: {e}")
             self.metrics['scans_failed'] += 1
+            return
+        
+        # A fan-out failure fails the message into the retry tiers; subscribers are kept until it succeeds
+        if self.coalescer and not data.get('coalesced_from'):
+            await self._fan_out_scan(message)
+    
+    async def _fan_out_scan(self, message: KafkaMessage):
+        """Deliver a completed scan to the configs that subscribed to it as their own scan.completed"""
+        leader_id = message.data['config_id']
+        scan_id = message.data['scan_id']
+        job_id = message.data.get('job_id')
+        config = self.active_configs.get(leader_id)
+        if config is None:
+            return
+        if not job_id:
+            # Subscribers are kept per scheduled job; a worker that does not echo job_id cannot be matched
+            logger.warning(f"Scan {scan_id} of {leader_id} completed without job_id; not fanned out")
+            return
+        
+        subscribers = await self.coalescer.subscribers(coalesce_key(config.url, config.scan_config), job_id)
+        followers = [config_id for config_id in dict.fromkeys(subscribers)
+                     if config_id != leader_id and config_id in self.active_configs]
+        if not followers:
+            await self.coalescer.forget(job_id)
+            return
+        
+        # Deterministic ids keep a retried fan-out idempotent
+        follower_scan_ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"{scan_id}:{config_id}")) for config_id in followers]
+        
+        try:
+            leader_scan_id = uuid.UUID(scan_id)
+        except ValueError:
+            leader_scan_id = None
+        if leader_scan_id:
+            async with self.db_pool.acquire() as conn:
+                await conn.execute(
+                    FAN_OUT_SQL,
+                    leader_scan_id,
+                    [uuid.UUID(follower_scan_id) for follower_scan_id in follower_scan_ids],
+                    [uuid.UUID(config_id) for config_id in followers]
+                )
+        
+        data = {k: v for k, v in message.data.items() if k not in ('config_ids', 'job_id')}
+        results = await self.kafka.produce_batch([
+            ProduceRecord(
+                topic='scan.completed',
+                message=KafkaMessage(
+                    id=follower_scan_id,
+                    timestamp=message.timestamp,
+                    type=message.type,
+                    source=message.source,
+                    data={**data, 'config_id': config_id, 'scan_id': follower_scan_id, 'coalesced_from': scan_id}
+                ),
+                key=config_id
+            )
+            for config_id, follower_scan_id in zip(followers, follower_scan_ids)
+        ])
+        
+        failed = sum(1 for result in results if not result.success)
+        if failed:
+            raise RuntimeError(f"Failed to fan out scan {scan_id} to {failed}/{len(followers)} configs")
+        
+        await self.coalescer.forget(job_id)
+        self.metrics['scan_fanouts'] += len(followers)
+        logger.info(f"Scan {scan_id} of {leader_id} fanned out to {len(followers)} configs")
     
     async def _handle_system_health(self, message: KafkaMessage, context: Dict[str, Any]):
         """Handle system health events"""
@@ -453,7 +1146,34 @@ class MonitoringPipeline:
             max_instances=1
         )
         
-        # Config reload every hour
+        # Incremental config changes past the watermark
+        self.scheduler.add_job(
+            func=self._poll_config_changes,
+            trigger=IntervalTrigger(seconds=self.config_poll_interval),
+            id='config_poll',
+            max_instances=1
+        )
+        
+        # Adaptive scan intervals follow the change history
+        if self.adaptive_scheduling:
+            self.scheduler.add_job(
+                func=self._refresh_adaptive_intervals,
+                trigger=IntervalTrigger(seconds=self.adaptive_refresh_interval),
+                id='adaptive_refresh',
+                max_instances=1
+            )
+        
+        # Partitions ahead of time and past retention, starting right away
+        if self.partition_maintainer:
+            self.scheduler.add_job(
+                func=self._maintain_partitions,
+                trigger=IntervalTrigger(seconds=self.partition_maintenance_interval),
+                id='partition_maintenance',
+                max_instances=1,
+                next_run_time=datetime.now(timezone.utc)
+            )
+        
+        # Full config reconciliation every hour, as a safety net for the change feed
         self.scheduler.add_job(
             func=self._reload_configs,
             trigger=IntervalTrigger(hours=1),
@@ -471,7 +1191,11 @@ class MonitoringPipeline:
                 'status': 'healthy',
                 'metrics': self.metrics.copy(),
                 'active_configs': len(self.active_configs),
-                'scheduler_jobs': len(self.scheduler.get_jobs()),
+                'scheduler_jobs': len(self.scan_scheduler),
+                'scan_scheduler': self.scan_scheduler.stats(),
+                'shards': self.shards.stats() if self.shards else None,
+                'scan_queue': self.scan_queue.stats(),
+                'config_state_writer': self.state_writer.stats() if self.state_writer else None,
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
             
@@ -512,8 +1236,16 @@ class MonitoringPipeline:
         except Exception as e:
             logger.error(f"Failed to report metrics: {e}")
     
+    async def _maintain_partitions(self):
+        """Premake, archive and drop time partitions per partition_policies"""
+        try:
+            await self.partition_maintainer.run()
+            
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+    
     async def _reload_configs(self):
-        """Reload monitoring configurations from database"""
+        """Fully reconcile monitoring configurations with the database"""
         try:
             logger.info("Reloading monitoring configurations...")
             await self._load_monitoring_configs()
@@ -543,8 +1275,8 @@ class MonitoringPipeline:
                 config_data.get('enabled', True)
                 )
             
-            # Reload configurations to pick up the new one
-            await self._load_monitoring_configs()
+            # Pick up just the new configuration
+            await self._sync_configs([config_id])
             
             logger.info(f"Added monitoring configuration: {config_data['name']} ({config_id})")
             return config_id
@@ -581,8 +1313,8 @@ class MonitoringPipeline:
                 result = await conn.execute(query, *values)
                 
                 if result == "UPDATE 1":
-                    # Reload configurations to pick up changes
-                    await self._load_monitoring_configs()
+                    # Pick up just the changed configuration
+                    await self._sync_configs([config_id])
                     logger.info(f"Updated monitoring configuration: {config_id}")
                     return True
                 else:
@@ -597,9 +1329,7 @@ class MonitoringPipeline:
         """Delete a monitoring configuration"""
         try:
             # Remove from scheduler first
-            job_id = f"scan_{config_id}"
-            if self.scheduler.get_job(job_id):
-                self.scheduler.remove_job(job_id)
+            self.scan_scheduler.remove(config_id)
             
             async with self.db_pool.acquire() as conn:
                 result = await conn.execute("""
@@ -624,7 +1354,13 @@ class MonitoringPipeline:
         return {
             'running': self.running,
             'active_configs': len(self.active_configs),
-            'scheduled_jobs': len(self.scheduler.get_jobs()) if self.scheduler else 0,
+            'scheduled_jobs': len(self.scan_scheduler) if self.scan_scheduler else 0,
+            'scan_scheduler': self.scan_scheduler.stats() if self.scan_scheduler else None,
+            'shards': self.shards.stats() if self.shards else None,
+            'scan_queue': self.scan_queue.stats(),
+            'config_state_writer': self.state_writer.stats() if self.state_writer else None,
+            'adaptive_configs': len(self.adaptive_intervals),
+            'partition_maintenance': self.partition_maintainer.stats() if self.partition_maintainer else None,
             'metrics': self.metrics.copy(),
             'kafka_health': await self.kafka.health_check() if self.kafka else None,
             'redis_connected': bool(self.redis),
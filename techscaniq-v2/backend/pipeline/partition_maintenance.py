@@ -0,0 +1,166 @@
+"""
+Partition maintenance for the TechScanIQ monitoring pipeline
+Keeps monthly partitions created ahead of time and detaches, archives and drops them past retention
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Session advisory lock held for a run, so only one replica maintains partitions at a time
+MAINTENANCE_LOCK_KEY = 0x7465636870617274
+
+# Archived partitions whose table's archive_retention has passed since they were detached
+DROPPABLE_SQL = """
+    SELECT a.partition_name
+    FROM archived_partitions a
+    JOIN partition_policies p ON p.parent_table = a.parent_table
+    WHERE a.dropped_at IS NULL
+      AND p.archive_retention IS NOT NULL
+      AND a.archived_at <= NOW() - p.archive_retention
+    ORDER BY a.archived_at
+"""
+
+def _ident(name: str) -> str:
+    """Quote an SQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+class PartitionMaintainer:
+    """
+    Applies partition_policies (migration 005) to the monthly partitioned tables
+    
+    Each run premakes missing partitions up to each table's horizon, then
+    detaches partitions whose range ended before the retention cutoff with
+    DETACH PARTITION ... CONCURRENTLY, so inserts and reads on the parent are
+    not blocked, and moves them to the archive schema. Archived partitions
+    are dropped once their table's archive_retention has passed. DDL waits at
+    most lock_timeout for its locks; whatever times out is retried next run.
+    """
+    
+    def __init__(self,
+                 pool: asyncpg.Pool,
+                 archive_schema: str = 'archive',
+                 lock_timeout: str = '5s'):
+        self.pool = pool
+        self.archive_schema = archive_schema
+        self.lock_timeout = lock_timeout
+        
+        # Metrics
+        self.metrics = {
+            'runs': 0,
+            'runs_skipped': 0,
+            'partitions_created': 0,
+            'partitions_archived': 0,
+            'partitions_dropped': 0,
+            'failures': 0,
+            'last_run_at': None
+        }
+    
+    async def run(self) -> Dict[str, int]:
+        """
+        Run one maintenance pass
+        
+        Returns:
+            Partitions created, archived and dropped; all zero if another replica holds the lock
+        """
+        result = {'created': 0, 'archived': 0, 'dropped': 0}
+        
+        async with self.pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", MAINTENANCE_LOCK_KEY):
+                self.metrics['runs_skipped'] += 1
+                return result
+            
+            try:
+                await conn.execute(f"SET lock_timeout = '{self.lock_timeout}'")
+                result['created'] = await self._premake(conn)
+                result['archived'] = await self._archive_expired(conn)
+                result['dropped'] = await self._drop_archived(conn)
+                await conn.execute("UPDATE partition_policies SET last_maintained_at = NOW() WHERE enabled")
+            finally:
+                await conn.execute("RESET lock_timeout")
+                await conn.fetchval("SELECT pg_advisory_unlock($1)", MAINTENANCE_LOCK_KEY)
+        
+        self.metrics['runs'] += 1
+        self.metrics['last_run_at'] = datetime.now(timezone.utc).isoformat()
+        if any(result.values()):
+            logger.info(f"Partition maintenance: {result['created']} created, "
+                        f"{result['archived']} archived, {result['dropped']} dropped")
+        return result
+    
+    async def _premake(self, conn: asyncpg.Connection) -> int:
+        """Create missing partitions up to each table's premake horizon"""
+        created = 0
+        policies = await conn.fetch("""
+            SELECT parent_table, premake_months FROM partition_policies WHERE enabled ORDER BY parent_table
+        """)
+        
+        for policy in policies:
+            try:
+                created += await conn.fetchval(
+                    "SELECT premake_partitions($1, $2)", policy['parent_table'], policy['premake_months']
+                )
+            except Exception as e:
+                self.metrics['failures'] += 1
+                logger.error(f"Failed to premake partitions of {policy['parent_table']}: {e}")
+        
+        self.metrics['partitions_created'] += created
+        return created
+    
+    async def _archive_expired(self, conn: asyncpg.Connection) -> int:
+        """Detach partitions past retention and move them to the archive schema"""
+        archived = 0
+        
+        for row in await conn.fetch("SELECT * FROM expired_partitions()"):
+            parent, partition = row['parent_table'], row['partition_name']
+            try:
+                # CONCURRENTLY cannot run in a transaction; an interrupted detach is left pending
+                mode = 'FINALIZE' if row['detach_pending'] else 'CONCURRENTLY'
+                await conn.execute(f"ALTER TABLE {_ident(parent)} DETACH PARTITION {_ident(partition)} {mode}")
+                
+                async with conn.transaction():
+                    await conn.execute(f"ALTER TABLE {_ident(partition)} SET SCHEMA {_ident(self.archive_schema)}")
+                    await conn.execute("""
+                        INSERT INTO archived_partitions (partition_name, parent_table, range_start, range_end)
+                        VALUES ($1, $2, $3, $4)
+                        ON CONFLICT (partition_name) DO UPDATE
+                        SET range_start = EXCLUDED.range_start, range_end = EXCLUDED.range_end,
+                            archived_at = NOW(), dropped_at = NULL
+                    """, partition, parent, row['range_start'], row['range_end'])
+                
+                archived += 1
+                logger.info(f"Archived partition {partition} of {parent} (ended {row['range_end'].isoformat()})")
+            
+            except Exception as e:
+                self.metrics['failures'] += 1
+                logger.error(f"Failed to archive partition {partition} of {parent}: {e}")
+        
+        self.metrics['partitions_archived'] += archived
+        return archived
+    
+    async def _drop_archived(self, conn: asyncpg.Connection) -> int:
+        """Drop archived partitions past their table's archive retention"""
+        dropped = 0
+        
+        for row in await conn.fetch(DROPPABLE_SQL):
+            partition = row['partition_name']
+            try:
+                async with conn.transaction():
+                    await conn.execute(f"DROP TABLE IF EXISTS {_ident(self.archive_schema)}.{_ident(partition)}")
+                    await conn.execute(
+                        "UPDATE archived_partitions SET dropped_at = NOW() WHERE partition_name = $1", partition
+                    )
+                dropped += 1
+            
+            except Exception as e:
+                self.metrics['failures'] += 1
+                logger.error(f"Failed to drop archived partition {partition}: {e}")
+        
+        self.metrics['partitions_dropped'] += dropped
+        return dropped
+    
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.metrics)
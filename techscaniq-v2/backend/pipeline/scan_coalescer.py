@@ -0,0 +1,157 @@
+"""
+Scan coalescer for the TechScanIQ monitoring pipeline
+Lets configs that target the same site share one scan, tracked with Redis claims per normalized URL
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import aioredis
+
+# scan_config keys that change how a scan is dispatched but not what it fetches
+DISPATCH_ONLY_KEYS = ('priority',)
+
+# Claim a coalescing key per group, or join the scan already claimed for it. A claim holds the token
+# of the scan it is for, and subscribers are kept per token, so scans of the same leader never share them.
+# ARGV: prefix, claim ttl ms, subscriber ttl ms, then per group: key, token, leader, follower count, followers.
+# Returns per group the token of the scan it joined, or '' when this group's scan claimed it.
+CLAIM_SCRIPT = """
+local prefix = ARGV[1]
+local results = {}
+local a = 4
+while a <= #ARGV do
+    local claim = prefix .. 'url:' .. ARGV[a]
+    local n = tonumber(ARGV[a + 3])
+    local current = redis.call('GET', claim)
+    local subscribers
+    if current then
+        subscribers = prefix .. 'subs:' .. current
+        redis.call('SADD', subscribers, ARGV[a + 2])
+        table.insert(results, current)
+    else
+        redis.call('SET', claim, ARGV[a + 1], 'PX', ARGV[2])
+        subscribers = prefix .. 'subs:' .. ARGV[a + 1]
+        table.insert(results, '')
+    end
+    for i = 1, n do
+        redis.call('SADD', subscribers, ARGV[a + 3 + i])
+    end
+    if redis.call('EXISTS', subscribers) == 1 then
+        redis.call('PEXPIRE', subscribers, ARGV[3])
+    end
+    a = a + 4 + n
+end
+return results
+"""
+
+# Drop a claim still held by a scan, returning its subscribers. ARGV: prefix, key, token, keep subscribers (0/1)
+FINISH_SCRIPT = """
+local claim = ARGV[1] .. 'url:' .. ARGV[2]
+local subscribers = ARGV[1] .. 'subs:' .. ARGV[3]
+if redis.call('GET', claim) == ARGV[3] then
+    redis.call('DEL', claim)
+end
+local members = redis.call('SMEMBERS', subscribers)
+if ARGV[4] == '0' then
+    redis.call('DEL', subscribers)
+end
+return members
+"""
+
+# Copy the leader's stored result to each follower so every config keeps its own scan history.
+# $1: leader scan id, $2: follower scan ids, $3: follower config ids. Idempotent for a retried fan-out.
+FAN_OUT_SQL = """
+    INSERT INTO scan_results (id, config_id, scan_timestamp, status, duration_ms, result_summary,
+                              full_result_url, error_message, scan_metadata)
+    SELECT f.id, f.config_id, s.scan_timestamp, s.status, s.duration_ms, s.result_summary,
+           s.full_result_url, s.error_message,
+           COALESCE(s.scan_metadata, '{}'::jsonb) || jsonb_build_object('coalesced_from', s.id)
+    FROM scan_results s
+    CROSS JOIN unnest($2::uuid[], $3::uuid[]) AS f(id, config_id)
+    WHERE s.id = $1
+      AND NOT EXISTS (SELECT 1 FROM scan_results r WHERE r.id = f.id AND r.scan_timestamp = s.scan_timestamp)
+"""
+
+def normalize_url(url: str) -> str:
+    """URL with scheme and host lowercased, default port, fragment and trailing slash removed"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not (scheme == 'http' and port == 80 or scheme == 'https' and port == 443):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path.rstrip('/'), parts.query, ''))
+
+def coalesce_key(url: str, scan_config: Dict[str, Any]) -> str:
+    """Key shared by scans that fetch the same site with the same options"""
+    options = {k: v for k, v in scan_config.items() if k not in DISPATCH_ONLY_KEYS}
+    canonical = json.dumps([normalize_url(url), options], sort_keys=True, default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+class ScanCoalescer:
+    """
+    Coalesces due scans of the same site into one scan
+    
+    The first config to dispatch a scan for a key claims it for window
+    seconds; configs that come due for the same key in that time subscribe
+    to the leader's scan instead of publishing their own. When the leader's
+    scan completes, its subscribers are read and the result fans out to them.
+    Subscriber sets are kept until the fan-out succeeds (or result_ttl
+    passes), so a failed fan-out can be retried.
+    
+    Claims and subscriber sets are identified by a token unique to the scan,
+    its job id, which travels in scan.scheduled and back in scan.completed.
+    A leader's next scan therefore never touches the subscribers of one
+    whose fan-out is still pending.
+    """
+    
+    def __init__(self,
+                 redis: aioredis.Redis,
+                 window: float = 300.0,
+                 result_ttl: float = 3600.0,
+                 key_prefix: str = 'scan_coalesce'):
+        self.redis = redis
+        self.window = window
+        self.result_ttl = max(result_ttl, window)
+        self.key_prefix = f"{key_prefix}:"
+        self._claim_script = redis.register_script(CLAIM_SCRIPT)
+        self._finish_script = redis.register_script(FINISH_SCRIPT)
+    
+    async def claim(self, groups: List[Tuple[str, str, str, List[str]]]) -> List[Optional[str]]:
+        """
+        Claim or join a scan for each (key, token, leader, followers) group in one round-trip
+        
+        Returns:
+            Per group, the token of the scan already under way that the group joined, or None if its own scan now leads
+        """
+        if not groups:
+            return []
+        
+        args: List[Any] = [self.key_prefix, int(self.window * 1000), int(self.result_ttl * 1000)]
+        for key, token, leader, followers in groups:
+            args.extend([key, token, leader, len(followers), *followers])
+        
+        results = await self._claim_script(keys=[], args=args)
+        return [self._decode(result) or None for result in results]
+    
+    async def release(self, key: str, token: str) -> List[str]:
+        """Give up a claim whose scan will not run, returning the configs that had subscribed to it"""
+        return await self._finish(key, token, keep=False)
+    
+    async def subscribers(self, key: str, token: str) -> List[str]:
+        """End a scan's claim after it completed and return its subscribers for fan-out"""
+        return await self._finish(key, token, keep=True)
+    
+    async def forget(self, token: str):
+        """Drop a scan's subscribers once its result has fanned out"""
+        await self.redis.delete(f"{self.key_prefix}subs:{token}")
+    
+    async def _finish(self, key: str, token: str, keep: bool) -> List[str]:
+        members = await self._finish_script(keys=[], args=[self.key_prefix, key, token, 1 if keep else 0])
+        return [self._decode(member) for member in members]
+    
+    @staticmethod
+    def _decode(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else value
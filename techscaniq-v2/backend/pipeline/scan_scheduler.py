@@ -0,0 +1,539 @@
+"""
+Scan scheduler for the TechScanIQ monitoring pipeline
+Min-heap of next fire times over shared, precompiled cron and interval schedules
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from croniter import croniter
+
+from streaming.kafka_client import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+class Schedule:
+    """A precompiled schedule; instances are shared by every job with the same definition"""
+    
+    # Shortest gap between two fires, which bounds how far a run may be spread
+    min_period: float = 0.0
+    
+    def first_after(self, ts: float) -> float:
+        """First fire time for a job added at ts"""
+        return self.next_after(ts)
+    
+    def next_after(self, ts: float) -> float:
+        """Fire time strictly after ts"""
+        raise NotImplementedError
+    
+    def fires_between(self, start: float, end: float, limit: int = 1000) -> int:
+        """Number of fires from the fire time start through end, counting at most limit"""
+        count = 0
+        ts = start
+        while ts <= end and count < limit:
+            count += 1
+            ts = self.next_after(ts)
+        return count
+
+class IntervalSchedule(Schedule):
+    """Fires every fixed number of seconds, starting one interval after the job is added"""
+    
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {seconds}")
+        self.seconds = seconds
+        self.min_period = seconds
+    
+    def next_after(self, ts: float) -> float:
+        return ts + self.seconds
+    
+    def fires_between(self, start: float, end: float, limit: int = 1000) -> int:
+        return min(limit, int((end - start) // self.seconds) + 1) if end >= start else 0
+    
+    def __repr__(self) -> str:
+        return f"IntervalSchedule({self.seconds})"
+
+class CronSchedule(Schedule):
+    """
+    Fires on a crontab expression in a timezone
+    
+    The fire window [previous, next) of the last lookup is kept, so every job
+    of a shared expression that asks for its next run within the same window
+    (bulk loads, or thousands of jobs due on the same minute) gets it without
+    another croniter walk.
+    """
+    
+    def __init__(self, expression: str, timezone: str = 'UTC'):
+        if not croniter.is_valid(expression):
+            raise ValueError(f"Invalid cron expression '{expression}'")
+        self.expression = expression
+        self.tz = ZoneInfo(timezone)
+        self._window: Tuple[float, float] = (0.0, 0.0)
+        
+        fires = croniter(self.expression, datetime.now(self.tz))
+        upcoming = [fires.get_next(float) for _ in range(16)]
+        self.min_period = min(b - a for a, b in zip(upcoming, upcoming[1:]))
+    
+    def next_after(self, ts: float) -> float:
+        previous, following = self._window
+        if previous <= ts < following:
+            return following
+        
+        following = croniter(self.expression, datetime.fromtimestamp(ts, self.tz)).get_next(float)
+        previous = croniter(self.expression, datetime.fromtimestamp(following, self.tz)).get_prev(float)
+        self._window = (previous, following)
+        return following
+    
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r}, {self.tz.key!r})"
+
+_schedule_cache: Dict[Tuple[Any, ...], Schedule] = {}
+
+def compile_schedule(schedule: Dict[str, Any]) -> Schedule:
+    """
+    Compile a monitoring_configs.schedule definition, reusing an identical one if already compiled
+    
+    Raises:
+        ValueError: If the schedule type or expression is invalid
+    """
+    schedule_type = schedule.get('type')
+    if schedule_type == 'cron':
+        key = ('cron', schedule.get('expression'), schedule.get('timezone', 'UTC'))
+    elif schedule_type == 'interval':
+        key = ('interval', float(schedule.get('minutes', 60)))
+    else:
+        raise ValueError(f"Unknown schedule type: {schedule_type}")
+    
+    compiled = _schedule_cache.get(key)
+    if compiled is None:
+        compiled = CronSchedule(key[1], key[2]) if schedule_type == 'cron' else IntervalSchedule(key[1] * 60)
+        _schedule_cache[key] = compiled
+    return compiled
+
+def spread_offset(job_id: str, window: float) -> float:
+    """Deterministic offset in [0, window) from a hash of the job id"""
+    if window <= 0:
+        return 0.0
+    digest = hashlib.blake2b(job_id.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64 * window
+
+class DueRun(NamedTuple):
+    """A run popped from the heap: its nominal schedule time and the spread time it fired at"""
+    job_id: str
+    planned: float
+    target: float
+
+class _Job:
+    """Schedule entry; seq identifies its live heap entry, older entries are stale"""
+    __slots__ = ('job_id', 'schedule', 'next_run', 'offset', 'seq')
+    
+    def __init__(self, job_id: str, schedule: Schedule):
+        self.job_id = job_id
+        self.schedule = schedule
+        self.next_run = 0.0
+        self.offset = 0.0
+        self.seq = -1
+    
+    def entry(self) -> Tuple[float, int, '_Job']:
+        return (self.next_run + self.offset, self.seq, self)
+
+class ScanScheduler:
+    """
+    Fires one callback per due job from a single timer task
+    
+    Jobs sit in a min-heap keyed by next fire time and hold only their id and
+    a reference to a shared compiled schedule. Removal and rescheduling leave
+    the old heap entry behind as stale and skip it when popped; the heap is
+    rebuilt once stale entries outnumber live jobs. A tick pops every due job
+    in O(k log n) and sleeps until the next fire time or an earlier insert.
+    
+    Like the APScheduler jobs this replaces, missed runs are coalesced into
+    one, runs later than misfire_grace_time are skipped, and a job whose
+    previous run is still in flight does not run again.
+    
+    Configs sharing a cron expression would all fire on the same second, so
+    each job fires a fixed offset after its nominal time, derived from a hash
+    of its id within jitter_window (capped at half the schedule's shortest
+    period). An optional admission_rate caps scan starts per second across
+    all jobs; runs over the rate wait in FIFO order. The callback receives
+    the nominal planned time, and stats() reports how far actual starts
+    trailed it.
+    """
+    
+    def __init__(self,
+                 callback: Callable[[str, float], Awaitable[Any]],
+                 misfire_grace_time: float = 300.0,
+                 max_concurrent_runs: int = 100,
+                 max_sleep: float = 60.0,
+                 jitter_window: float = 0.0,
+                 admission_rate: Optional[float] = None,
+                 admission_burst: Optional[int] = None):
+        self.callback = callback
+        self.misfire_grace_time = misfire_grace_time
+        self.max_sleep = max_sleep
+        self.jitter_window = jitter_window
+        self.admission_rate = admission_rate
+        self.admission_burst = admission_burst or max(1, int(admission_rate or 1))
+        
+        self.jobs: Dict[str, _Job] = {}
+        self._heap: List[Tuple[float, int, _Job]] = []
+        self._seq = itertools.count()
+        self._stale = 0
+        
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_runs))
+        self._in_flight: Set[str] = set()
+        self._run_tasks: Set[asyncio.Task] = set()
+        
+        # Admission token bucket and the runs waiting on it
+        self._admission: deque = deque()
+        self._admission_queued: Set[str] = set()
+        self._tokens = float(self.admission_burst)
+        self._tokens_at = time.monotonic()
+        
+        # Planned vs actual: (job_id, planned, target, started) of recent runs
+        self.recent_runs: deque = deque(maxlen=1000)
+        self._start_second = 0
+        self._starts_this_second = 0
+        
+        # Metrics
+        self.fire_delay = LatencyTracker()
+        self.start_delay = LatencyTracker()
+        self.tick_duration = LatencyTracker()
+        self.metrics = {
+            'fired': 0,
+            'misfired': 0,
+            'overlaps_skipped': 0,
+            'admission_deferred': 0,
+            'caught_up': 0,
+            'missed_runs': 0,
+            'max_starts_per_second': 0,
+            'run_failures': 0,
+            'ticks': 0,
+            'compactions': 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self.jobs)
+    
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self.jobs
+    
+    def add(self, job_id: str, schedule: Schedule, first_run: Optional[float] = None):
+        """Add or update a job; an existing job with the same schedule keeps its next run"""
+        self.add_many([(job_id, schedule, first_run)])
+    
+    def add_many(self, entries: Iterable[Tuple[str, Schedule, Optional[float]]], now: Optional[float] = None):
+        """Add or update many jobs, heapifying once when the batch is large"""
+        now = time.time() if now is None else now
+        pushed: List[Tuple[float, int, _Job]] = []
+        
+        for job_id, schedule, first_run in entries:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                if job.schedule is schedule and first_run is None:
+                    continue
+                self._stale += 1
+            else:
+                job = self.jobs[job_id] = _Job(job_id, schedule)
+            
+            job.schedule = schedule
+            job.offset = self._offset(job_id, schedule)
+            job.next_run = first_run if first_run is not None else schedule.first_after(now)
+            job.seq = next(self._seq)
+            pushed.append(job.entry())
+        
+        if not pushed:
+            return
+        
+        earliest = self._heap[0][0] if self._heap else None
+        if len(pushed) > len(self._heap) // 4:
+            self._heap.extend(pushed)
+            heapq.heapify(self._heap)
+        else:
+            for entry in pushed:
+                heapq.heappush(self._heap, entry)
+        
+        if earliest is None or self._heap[0][0] < earliest:
+            self._wakeup.set()
+        self._maybe_compact()
+    
+    def restore_many(self,
+                     entries: Iterable[Tuple[str, Schedule, Optional[float]]],
+                     now: Optional[float] = None,
+                     catch_up_rate: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Add jobs at their persisted next fire times, e.g. next_scan_at after a restart
+        
+        A job whose persisted time has passed missed at least one run. Rather
+        than firing the whole backlog at once or dropping it past the misfire
+        grace time, each overdue job gets one catch-up run, oldest first,
+        spaced catch_up_rate per second from now; a job whose next regular run
+        comes before its catch-up slot just runs then. Jobs without a
+        persisted time start fresh.
+        
+        Returns:
+            (jobs caught up, runs missed)
+        """
+        now = time.time() if now is None else now
+        placed: List[Tuple[str, Schedule, float]] = []
+        overdue: List[Tuple[str, Schedule, float]] = []
+        
+        for job_id, schedule, persisted in entries:
+            if persisted is not None and persisted <= now:
+                overdue.append((job_id, schedule, persisted))
+                continue
+            
+            # Never later than the schedule would fire now, in case it changed while we were down
+            first_run = schedule.first_after(now)
+            if persisted is not None:
+                first_run = min(first_run, persisted - self._offset(job_id, schedule))
+            placed.append((job_id, schedule, first_run))
+        
+        missed = 0
+        overdue.sort(key=lambda entry: entry[2])
+        for i, (job_id, schedule, persisted) in enumerate(overdue):
+            offset = self._offset(job_id, schedule)
+            missed += schedule.fires_between(persisted - offset, now - offset)
+            slot = now + (i / catch_up_rate if catch_up_rate else 0.0)
+            placed.append((job_id, schedule, min(slot - offset, schedule.next_after(now - offset))))
+        
+        self.add_many(placed, now=now)
+        self.metrics['caught_up'] += len(overdue)
+        self.metrics['missed_runs'] += missed
+        return len(overdue), missed
+    
+    def _offset(self, job_id: str, schedule: Schedule) -> float:
+        """Spread offset of a job, capped at half its schedule's shortest period"""
+        return spread_offset(job_id, min(self.jitter_window, schedule.min_period / 2))
+    
+    def remove(self, job_id: str) -> bool:
+        """Remove a job, returning whether it existed"""
+        return self.remove_many([job_id]) == 1
+    
+    def remove_many(self, job_ids: Iterable[str]) -> int:
+        """Remove jobs, returning how many existed"""
+        removed = 0
+        for job_id in job_ids:
+            job = self.jobs.pop(job_id, None)
+            if job is not None:
+                job.seq = -1
+                removed += 1
+        
+        self._stale += removed
+        self._maybe_compact()
+        return removed
+    
+    def defer(self, job_id: str, at: float) -> bool:
+        """Run a job again at a timestamp if that comes before its next run; the schedule resumes after it"""
+        job = self.jobs.get(job_id)
+        if job is None or at >= job.next_run + job.offset:
+            return False
+        
+        job.next_run = at - job.offset
+        job.seq = next(self._seq)
+        self._stale += 1
+        heapq.heappush(self._heap, job.entry())
+        if self._heap[0][2] is job:
+            self._wakeup.set()
+        self._maybe_compact()
+        return True
+    
+    def next_run_time(self, job_id: str) -> Optional[datetime]:
+        """Next fire time of a job, including its spread offset, as a UTC datetime"""
+        job = self.jobs.get(job_id)
+        return datetime.fromtimestamp(job.next_run + job.offset, ZoneInfo('UTC')) if job else None
+    
+    def pop_due(self, now: float) -> List[DueRun]:
+        """
+        Pop the jobs due at now and reschedule them
+        
+        Returns:
+            Runs to start; jobs past the misfire grace time are rescheduled without running
+        """
+        due: List[DueRun] = []
+        rescheduled: List[Tuple[float, int, _Job]] = []
+        
+        while self._heap and self._heap[0][0] <= now:
+            target, seq, job = heapq.heappop(self._heap)
+            if job.seq != seq:
+                self._stale -= 1
+                continue
+            
+            planned = job.next_run
+            lateness = now - target
+            if lateness > self.misfire_grace_time:
+                self.metrics['misfired'] += 1
+                logger.warning(f"Scheduled run of {job.job_id} missed by {lateness:.0f}s; skipping")
+            else:
+                due.append(DueRun(job.job_id, planned, target))
+                self.fire_delay.record(lateness * 1000)
+            
+            # Coalesce: never queue more than one run for a job that fell behind
+            next_run = job.schedule.next_after(planned)
+            if next_run + job.offset <= now:
+                next_run = job.schedule.next_after(now - job.offset)
+            
+            job.next_run = next_run
+            job.seq = next(self._seq)
+            rescheduled.append(job.entry())
+        
+        for entry in rescheduled:
+            heapq.heappush(self._heap, entry)
+        return due
+    
+    def _maybe_compact(self):
+        """Rebuild the heap from live jobs once stale entries dominate"""
+        if self._stale > max(1024, len(self.jobs)):
+            self._heap = [job.entry() for job in self.jobs.values()]
+            heapq.heapify(self._heap)
+            self._stale = 0
+            self.metrics['compactions'] += 1
+    
+    async def start(self):
+        """Start the timer task"""
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Scan scheduler started with {len(self.jobs)} jobs")
+    
+    async def stop(self):
+        """Stop firing and wait for in-flight runs"""
+        self.running = False
+        self._wakeup.set()
+        
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        
+        if self._run_tasks:
+            await asyncio.gather(*self._run_tasks, return_exceptions=True)
+        logger.info("Scan scheduler stopped")
+    
+    async def _run(self):
+        """Timer loop: fire due jobs, then sleep until the next one"""
+        while self.running:
+            try:
+                self._wakeup.clear()
+                tick_start = time.perf_counter()
+                
+                for run in self.pop_due(time.time()):
+                    if self.admission_rate:
+                        self._admit(run)
+                    else:
+                        self._dispatch(run)
+                admission_wait = self._drain_admission() if self._admission else None
+                
+                self.metrics['ticks'] += 1
+                self.tick_duration.record((time.perf_counter() - tick_start) * 1000)
+                
+                delay = self._heap[0][0] - time.time() if self._heap else self.max_sleep
+                if admission_wait is not None:
+                    delay = min(delay, admission_wait)
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, self.max_sleep))
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    # Let dispatched runs start before the next tick
+                    await asyncio.sleep(0)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in scan scheduler loop: {e}")
+                await asyncio.sleep(1)
+    
+    def _admit(self, run: DueRun):
+        """Queue a run for admission; a job already waiting is not queued twice"""
+        if run.job_id in self._admission_queued:
+            self.metrics['overlaps_skipped'] += 1
+            return
+        self._admission.append(run)
+        self._admission_queued.add(run.job_id)
+    
+    def _drain_admission(self) -> Optional[float]:
+        """Start queued runs the token bucket allows, returning seconds until the next token if any remain"""
+        now = time.monotonic()
+        self._tokens = min(self.admission_burst, self._tokens + (now - self._tokens_at) * self.admission_rate)
+        self._tokens_at = now
+        
+        while self._admission and self._tokens >= 1:
+            run = self._admission.popleft()
+            self._admission_queued.discard(run.job_id)
+            self._tokens -= 1
+            self._dispatch(run)
+        
+        if not self._admission:
+            return None
+        self.metrics['admission_deferred'] += 1
+        return (1 - self._tokens) / self.admission_rate
+    
+    def _dispatch(self, run: DueRun):
+        """Start a run unless the job's previous run is still in flight"""
+        if run.job_id in self._in_flight:
+            self.metrics['overlaps_skipped'] += 1
+            return
+        
+        started = time.time()
+        self.start_delay.record((started - run.planned) * 1000)
+        self.recent_runs.append((run.job_id, run.planned, run.target, started))
+        
+        second = int(started)
+        if second != self._start_second:
+            self._start_second, self._starts_this_second = second, 0
+        self._starts_this_second += 1
+        if self._starts_this_second > self.metrics['max_starts_per_second']:
+            self.metrics['max_starts_per_second'] = self._starts_this_second
+        
+        self._in_flight.add(run.job_id)
+        self.metrics['fired'] += 1
+        task = asyncio.create_task(self._run_job(run))
+        self._run_tasks.add(task)
+        task.add_done_callback(self._run_tasks.discard)
+    
+    async def _run_job(self, run: DueRun):
+        try:
+            async with self._semaphore:
+                await self.callback(run.job_id, run.planned)
+        except Exception as e:
+            self.metrics['run_failures'] += 1
+            logger.error(f"Scheduled run of {run.job_id} failed: {e}")
+        finally:
+            self._in_flight.discard(run.job_id)
+    
+    def planned_vs_actual(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent runs with their nominal, spread and actual start times"""
+        return [
+            {
+                'job_id': job_id,
+                'planned_at': datetime.fromtimestamp(planned, ZoneInfo('UTC')).isoformat(),
+                'spread_s': round(target - planned, 3),
+                'start_delay_s': round(started - planned, 3)
+            }
+            for job_id, planned, target, started in list(self.recent_runs)[-limit:]
+        ]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'jobs': len(self.jobs),
+            'heap_size': len(self._heap),
+            'in_flight': len(self._in_flight),
+            'admission_queue': len(self._admission),
+            'jitter_window_s': self.jitter_window,
+            'admission_rate': self.admission_rate,
+            'next_fire_in_s': round(self._heap[0][0] - time.time(), 3) if self._heap else None,
+            'fire_delay': self.fire_delay.snapshot(),
+            'start_delay': self.start_delay.snapshot(),
+            'tick_duration': self.tick_duration.snapshot(),
+            **self.metrics
+        }
@@ -0,0 +1,228 @@
+"""
+Shard coordinator for the TechScanIQ monitoring pipeline
+Splits config scheduling across pipeline replicas with Redis membership heartbeats and shard leases
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import aioredis
+
+logger = logging.getLogger(__name__)
+
+# Refresh this replica's membership and drop members whose heartbeat expired; returns live members
+HEARTBEAT_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+redis.call('ZADD', KEYS[1], now_ms + tonumber(ARGV[2]), ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms)
+return redis.call('ZRANGE', KEYS[1], 0, -1)
+"""
+
+# Acquire free shard leases and renew held ones; returns the shards this replica holds
+ACQUIRE_SCRIPT = """
+local held = {}
+for i = 3, #ARGV do
+    local key = KEYS[1] .. ARGV[i]
+    local owner = redis.call('GET', key)
+    if not owner then
+        redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+        table.insert(held, ARGV[i])
+    elseif owner == ARGV[1] then
+        redis.call('PEXPIRE', key, ARGV[2])
+        table.insert(held, ARGV[i])
+    end
+end
+return held
+"""
+
+# Release shard leases still owned by this replica
+RELEASE_SCRIPT = """
+local released = 0
+for i = 2, #ARGV do
+    local key = KEYS[1] .. ARGV[i]
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+        released = released + 1
+    end
+end
+return released
+"""
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def default_replica_id() -> str:
+    """REPLICA_ID, else hostname, pid and a random suffix so restarts never reuse a lease"""
+    return os.getenv('REPLICA_ID') or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+class ShardCoordinator:
+    """
+    Assigns config shards to live pipeline replicas
+    
+    Config ids hash into a fixed number of shards. Replicas heartbeat into a
+    Redis sorted set, and each shard belongs to the live member with the
+    highest rendezvous hash, so a join or departure moves only that member's
+    share. A replica schedules a shard only while it holds the shard's lease
+    in Redis: leases are taken when free, renewed every heartbeat, released
+    when the assignment moves, and expire with a dead replica. Between
+    renewals, ownership is trusted locally only until the lease could have
+    expired, so a replica cut off from Redis stops firing before another can
+    take its shards over.
+    """
+    
+    def __init__(self,
+                 redis: aioredis.Redis,
+                 replica_id: Optional[str] = None,
+                 shard_count: int = 64,
+                 lease_ttl: float = 15.0,
+                 heartbeat_interval: float = 5.0,
+                 key_prefix: str = 'scheduler',
+                 on_change: Optional[Callable[[Set[int], Set[int]], None]] = None):
+        if heartbeat_interval * 2 > lease_ttl:
+            raise ValueError("lease_ttl must allow at least two heartbeats")
+        
+        self.redis = redis
+        self.replica_id = replica_id or default_replica_id()
+        self.shard_count = shard_count
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.members_key = f"{key_prefix}:members"
+        self.lease_prefix = f"{key_prefix}:shard:"
+        self.on_change = on_change
+        
+        self.members: List[str] = []
+        self.owned: Set[int] = set()
+        self._valid_until = 0.0
+        
+        self._heartbeat_script = redis.register_script(HEARTBEAT_SCRIPT)
+        self._acquire_script = redis.register_script(ACQUIRE_SCRIPT)
+        self._release_script = redis.register_script(RELEASE_SCRIPT)
+        
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.metrics = {
+            'heartbeats': 0,
+            'heartbeat_failures': 0,
+            'shards_acquired': 0,
+            'shards_released': 0,
+            'last_rebalance_at': None
+        }
+    
+    def shard_of(self, key: str) -> int:
+        """Shard a config id belongs to"""
+        return _hash(key) % self.shard_count
+    
+    def owns(self, key: str) -> bool:
+        """Whether this replica may schedule a config right now"""
+        return time.monotonic() < self._valid_until and self.shard_of(key) in self.owned
+    
+    def _assigned_shards(self) -> Set[int]:
+        """Shards whose highest rendezvous hash among live members is this replica"""
+        members = self.members or [self.replica_id]
+        return {
+            shard for shard in range(self.shard_count)
+            if max(members, key=lambda member: _hash(f"{member}:{shard}")) == self.replica_id
+        }
+    
+    async def start(self):
+        """Join the replica set and take this replica's shards before returning"""
+        self.running = True
+        await self.heartbeat()
+        self._task = asyncio.create_task(self._heartbeat_periodically())
+        logger.info(f"Replica {self.replica_id} owns {len(self.owned)}/{self.shard_count} shards "
+                    f"of {len(self.members)} members")
+    
+    async def stop(self):
+        """Release held leases and leave the replica set so others take over at once"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        
+        try:
+            if self.owned:
+                await self._release_script(keys=[self.lease_prefix], args=[self.replica_id, *self.owned])
+            await self.redis.zrem(self.members_key, self.replica_id)
+        except Exception as e:
+            logger.error(f"Failed to release shards of replica {self.replica_id}: {e}")
+        
+        self._set_owned(set())
+        logger.info(f"Replica {self.replica_id} left the scheduler set")
+    
+    async def heartbeat(self):
+        """Refresh membership, then acquire, renew and release shard leases to match the assignment"""
+        started = time.monotonic()
+        ttl_ms = int(self.lease_ttl * 1000)
+        
+        members = await self._heartbeat_script(keys=[self.members_key], args=[self.replica_id, ttl_ms])
+        self.members = sorted(m.decode() if isinstance(m, bytes) else m for m in members)
+        assigned = self._assigned_shards()
+        
+        # Give up shards that moved to another member, so it can take them on its next heartbeat
+        moved = self.owned - assigned
+        if moved:
+            await self._release_script(keys=[self.lease_prefix], args=[self.replica_id, *moved])
+        
+        held: Set[int] = set()
+        if assigned:
+            held = {int(shard) for shard in await self._acquire_script(
+                keys=[self.lease_prefix], args=[self.replica_id, ttl_ms, *assigned]
+            )}
+        
+        # Trust the leases until shortly before they could expire, measured from before the renewal was sent
+        self._valid_until = started + self.lease_ttl - self.heartbeat_interval / 2
+        self.metrics['heartbeats'] += 1
+        self._set_owned(held)
+    
+    def _set_owned(self, held: Set[int]):
+        acquired = held - self.owned
+        released = self.owned - held
+        self.owned = held
+        
+        if not acquired and not released:
+            return
+        
+        self.metrics['shards_acquired'] += len(acquired)
+        self.metrics['shards_released'] += len(released)
+        self.metrics['last_rebalance_at'] = time.time()
+        logger.info(f"Replica {self.replica_id}: +{len(acquired)} -{len(released)} shards, now {len(held)}")
+        
+        if self.on_change:
+            try:
+                self.on_change(acquired, released)
+            except Exception as e:
+                logger.error(f"Shard change handler failed: {e}")
+    
+    async def _heartbeat_periodically(self):
+        """Heartbeat on a fixed interval"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.heartbeat_interval)
+                await self.heartbeat()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.metrics['heartbeat_failures'] += 1
+                logger.error(f"Shard heartbeat failed for replica {self.replica_id}: {e}")
+                if time.monotonic() >= self._valid_until:
+                    # Leases may have passed to another replica; stop scheduling until renewed
+                    self._set_owned(set())
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'replica_id': self.replica_id,
+            'members': len(self.members),
+            'shard_count': self.shard_count,
+            'shards_owned': len(self.owned),
+            'lease_valid_for_s': round(max(0.0, self._valid_until - time.monotonic()), 3),
+            **self.metrics
+        }
@@ -16,7 +16,8 @@ import aioredis
 from websockets.server import WebSocketServerProtocol
 from websockets.exceptions import ConnectionClosed, WebSocketException
 
-from streaming.kafka_client import KafkaClient, KafkaMessage
+from streaming.kafka_client import CONFIG_ID_HEADER, KafkaClient, KafkaMessage, create_kafka_client
+from streaming.topic_router import TopicRouter
 
 logger = logging.getLogger(__name__)
 
@@ -163,15 +164,20 @@ class WebSocketServer:
                  host: str = "localhost",
                  port: int = 8765,
                  redis_url: str = "redis://localhost:6379",
-                 kafka_servers: str = "localhost:29092"):
+                 kafka_servers: str = "localhost:29092",
+                 kafka: Optional[KafkaClient] = None,
+                 router: Optional[TopicRouter] = None):
         self.host = host
         self.port = port
         self.redis_url = redis_url
         self.kafka_servers = kafka_servers
         
-        # Core components
+        # Core components; a shared Kafka client and router may be injected.
+        # The router should use its own consumer group: every server broadcasts every event.
         self.redis: Optional[aioredis.Redis] = None
-        self.kafka: Optional[KafkaClient] = None
+        self.kafka: Optional[KafkaClient] = kafka
+        self.router: Optional[TopicRouter] = router
+        self._owns_kafka = kafka is None
         self.connection_manager = ConnectionManager()
         
         # WebSocket server
@@ -197,12 +203,13 @@ class WebSocketServer:
             await self.redis.ping()
             
             # Initialize Kafka client
-            self.kafka = KafkaClient(
-                bootstrap_servers=self.kafka_servers,
-                redis_url=self.redis_url,
-                client_id="websocket-server"
-            )
-            await self.kafka.start()
+            if self._owns_kafka:
+                self.kafka = create_kafka_client(
+                    bootstrap_servers=self.kafka_servers,
+                    redis_url=self.redis_url,
+                    client_id="websocket-server"
+                )
+                await self.kafka.start()
             
             # Set up Kafka consumers for real-time events
             await self._setup_kafka_consumers()
@@ -235,7 +242,7 @@ class WebSocketServer:
                 self.server.close()
                 await self.server.wait_closed()
             
-            if self.kafka:
+            if self.kafka and self._owns_kafka:
                 await self.kafka.stop()
             
             if self.redis:
@@ -246,36 +253,70 @@ class WebSocketServer:
     
     async def _setup_kafka_consumers(self):
         """Set up Kafka consumers for real-time events"""
+        if self.router:
+            self.router.register('scan.completed', 'websocket.scan-completed', 
+                                 message_handler=self._handle_scan_completed, 
+                                 header_filter=self._has_config_subscribers)
+            self.router.register('change.detected', 'websocket.change-detected', 
+                                 message_handler=self._handle_change_detected, 
+                                 header_filter=self._has_config_subscribers)
+            self.router.register('alert.triggered', 'websocket.alert-triggered', 
+                                 message_handler=self._handle_alert_triggered, 
+                                 header_filter=self._has_config_subscribers)
+            self.router.register('system.health', 'websocket.system-health', 
+                                 message_handler=self._handle_system_health, 
+                                 header_filter=self._has_connections)
+            logger.info("WebSocket handlers registered with topic router")
+            return
+        
+        # Live broadcasts are worthless minutes later, so failures skip the retry tiers
         # Consumer for scan completion events
         await self.kafka.create_consumer(
             topics=['scan.completed'],
             group_id='websocket-scan-events',
-            message_handler=self._handle_scan_completed
+            message_handler=self._handle_scan_completed,
+            retry_tiers=[],
+            header_filter=self._has_config_subscribers
         )
         
         # Consumer for change detection events
         await self.kafka.create_consumer(
             topics=['change.detected'],
             group_id='websocket-change-events',
-            message_handler=self._handle_change_detected
+            message_handler=self._handle_change_detected,
+            retry_tiers=[],
+            header_filter=self._has_config_subscribers
         )
         
         # Consumer for alert events
         await self.kafka.create_consumer(
             topics=['alert.triggered'],
             group_id='websocket-alert-events',
-            message_handler=self._handle_alert_triggered
+            message_handler=self._handle_alert_triggered,
+            retry_tiers=[],
+            header_filter=self._has_config_subscribers
         )
         
         # Consumer for system health events
         await self.kafka.create_consumer(
             topics=['system.health'],
             group_id='websocket-health-events',
-            message_handler=self._handle_system_health
+            message_handler=self._handle_system_health,
+            retry_tiers=[],
+            header_filter=self._has_connections
         )
         
         logger.info("WebSocket Kafka consumers set up")
     
+    def _has_config_subscribers(self, headers: Dict[str, str]) -> bool:
+        """Skip config events nobody is subscribed to before they are decoded"""
+        config_id = headers.get(CONFIG_ID_HEADER)
+        return config_id is None or config_id in self.connection_manager.subscriptions
+    
+    def _has_connections(self, headers: Dict[str, str]) -> bool:
+        """Skip system-wide events while no client is connected"""
+        return bool(self.connection_manager.connections)
+    
     async def _handle_connection(self, websocket: WebSocketServerProtocol, path: str):
         """Handle new WebSocket connection"""
         try:
@@ -403,6 +444,7 @@ class WebSocketServer:
                     'config_id': config_id,
                     'scan_id': data.get('scan_id'),
                     'timestamp': message.timestamp,
+                    # Offloaded summaries stay references (hash + projection); clients fetch full_result_url
                     'result_summary': data.get('result_summary', {}),
                     'full_result_url': data.get('full_result_url')
                 }
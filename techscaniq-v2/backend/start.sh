@@ -193,6 +193,18 @@ async def apply_migrations():
         with open('database/migrations/001_monitoring_core_schema.sql', 'r') as f:
             await conn.execute(f.read())
         
+        # Config change feed for incremental reloads
+        with open('database/migrations/004_config_change_feed.sql', 'r') as f:
+            await conn.execute(f.read())
+        
+        # Monthly partitions and their retention policies
+        with open('database/migrations/005_partition_lifecycle.sql', 'r') as f:
+            await conn.execute(f.read())
+        
+        # next_scan_at is left to the scheduler
+        with open('database/migrations/006_scheduler_owned_next_scan.sql', 'r') as f:
+            await conn.execute(f.read())
+        
         await conn.close()
         print("PostgreSQL migrations applied successfully")
         
@@ -202,6 +214,9 @@ async def apply_migrations():
         with open('database/migrations/002_timescale_metrics.sql', 'r') as f:
             await conn.execute(f.read())
         
+        with open('database/migrations/003_queue_metrics_lag.sql', 'r') as f:
+            await conn.execute(f.read())
+        
         await conn.close()
         print("TimescaleDB migrations applied successfully")
         
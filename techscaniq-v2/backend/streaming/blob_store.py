@@ -0,0 +1,313 @@
+"""
+Content-addressed blob storage for the TechScanIQ monitoring pipeline
+Claim-check offload of large message payloads to the local filesystem or MinIO/S3
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from minio import Minio
+    from minio.error import S3Error
+except ImportError:
+    Minio = None
+    S3Error = None
+
+logger = logging.getLogger(__name__)
+
+# Key in a message field that marks it as a claim-check reference
+CLAIM_KEY = '$claim'
+CLAIM_CONTENT_TYPE = 'application/json'
+
+DEFAULT_BLOB_STORE_URL = 'file://./data/blobs'
+
+class BlobStoreError(Exception):
+    """Raised when a blob cannot be stored or fetched"""
+    pass
+
+class BlobStore:
+    """Base class for content-addressed blob stores keyed by SHA-256 hex digest"""
+    
+    async def put(self, data: bytes) -> str:
+        """Store data if not already present and return its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        if not await self.exists(digest):
+            await self._write(digest, data)
+        return digest
+    
+    async def get(self, digest: str) -> bytes:
+        """Fetch a blob, verifying it against its digest"""
+        data = await self._read(digest)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BlobStoreError(f"Blob {digest} is corrupt")
+        return data
+    
+    async def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+    
+    async def _write(self, digest: str, data: bytes):
+        raise NotImplementedError
+    
+    async def _read(self, digest: str) -> bytes:
+        raise NotImplementedError
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under root/<aa>/<bb>/<digest>, written atomically"""
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+    
+    async def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+    
+    async def _write(self, digest: str, data: bytes):
+        await asyncio.to_thread(self._write_file, self._path(digest), data)
+    
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    
+    async def _read(self, digest: str) -> bytes:
+        try:
+            return await asyncio.to_thread(self._read_file, self._path(digest))
+        except FileNotFoundError:
+            raise BlobStoreError(f"Blob {digest} not found")
+    
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+class S3BlobStore(BlobStore):
+    """Blobs as objects in a MinIO/S3 bucket under an optional prefix"""
+    
+    def __init__(self,
+                 endpoint: str,
+                 bucket: str,
+                 access_key: Optional[str] = None,
+                 secret_key: Optional[str] = None,
+                 prefix: str = 'blobs',
+                 secure: bool = False):
+        if Minio is None:
+            raise BlobStoreError("The minio package is required for S3 blob storage")
+        
+        self.client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self._bucket_checked = False
+    
+    def _key(self, digest: str) -> str:
+        return f"{self.prefix}/{digest[:2]}/{digest}" if self.prefix else f"{digest[:2]}/{digest}"
+    
+    async def exists(self, digest: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.stat_object, self.bucket, self._key(digest))
+            return True
+        except S3Error as e:
+            if e.code in ('NoSuchKey', 'NoSuchBucket', 'NoSuchObject'):
+                return False
+            raise BlobStoreError(f"Failed to stat blob {digest}: {e}") from e
+    
+    async def _write(self, digest: str, data: bytes):
+        try:
+            if not self._bucket_checked:
+                if not await asyncio.to_thread(self.client.bucket_exists, self.bucket):
+                    await asyncio.to_thread(self.client.make_bucket, self.bucket)
+                self._bucket_checked = True
+            
+            await asyncio.to_thread(
+                self.client.put_object, self.bucket, self._key(digest), io.BytesIO(data), len(data),
+                content_type=CLAIM_CONTENT_TYPE
+            )
+        except S3Error as e:
+            raise BlobStoreError(f"Failed to store blob {digest}: {e}") from e
+    
+    async def _read(self, digest: str) -> bytes:
+        def read() -> bytes:
+            response = self.client.get_object(self.bucket, self._key(digest))
+            try:
+                return response.read()
+            finally:
+                response.close()
+                response.release_conn()
+        
+        try:
+            return await asyncio.to_thread(read)
+        except S3Error as e:
+            raise BlobStoreError(f"Failed to fetch blob {digest}: {e}") from e
+
+def create_blob_store(url: Optional[str] = None) -> BlobStore:
+    """
+    Build a blob store from a URL
+    
+    file://<path> stores on the local filesystem; s3://<bucket>[/<prefix>] stores
+    in MinIO/S3 at MINIO_ENDPOINT with MINIO_ACCESS_KEY/MINIO_SECRET_KEY.
+    Defaults to BLOB_STORE_URL, then ./data/blobs.
+    """
+    url = url or os.getenv('BLOB_STORE_URL', DEFAULT_BLOB_STORE_URL)
+    parsed = urlparse(url)
+    
+    if parsed.scheme == 'file':
+        return LocalBlobStore(os.path.abspath(parsed.netloc + parsed.path))
+    
+    if parsed.scheme == 's3':
+        return S3BlobStore(
+            endpoint=os.getenv('MINIO_ENDPOINT', 'localhost:9000'),
+            bucket=parsed.netloc,
+            access_key=os.getenv('MINIO_ACCESS_KEY', os.getenv('MINIO_ROOT_USER', 'minioadmin')),
+            secret_key=os.getenv('MINIO_SECRET_KEY', os.getenv('MINIO_ROOT_PASSWORD', 'minioadmin')),
+            prefix=parsed.path.strip('/') or 'blobs',
+            secure=os.getenv('MINIO_SECURE', 'false').lower() == 'true'
+        )
+    
+    raise BlobStoreError(f"Unsupported blob store URL '{url}'")
+
+def project_summary(value: Dict[str, Any]) -> Dict[str, Any]:
+    """Small projection of a payload: top-level scalars and the scalar fields of top-level objects"""
+    projection: Dict[str, Any] = {}
+    for key, item in value.items():
+        if isinstance(item, dict):
+            scalars = {k: v for k, v in item.items() if v is None or isinstance(v, (str, int, float, bool))}
+            if scalars:
+                projection[key] = scalars
+        elif item is None or isinstance(item, (str, int, float, bool)):
+            projection[key] = item
+    return projection
+
+class ClaimCheck:
+    """
+    Offloads large message fields to a blob store and resolves them back
+    
+    A field at or above threshold_bytes of canonical JSON is replaced by a
+    reference carrying its SHA-256 digest, its size and a small projection
+    for consumers that only need headline numbers. Identical payloads hash to
+    the same blob, so they are stored once. Resolved blobs are cached by
+    digest, and concurrent resolutions of one digest share a single fetch.
+    """
+    
+    def __init__(self,
+                 store: BlobStore,
+                 threshold_bytes: int = 64 * 1024,
+                 cache_size: int = 256):
+        self.store = store
+        self.threshold_bytes = threshold_bytes
+        self.cache_size = cache_size
+        
+        self._cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Metrics
+        self.metrics = {
+            'offloaded': 0,
+            'offloaded_bytes': 0,
+            'inlined': 0,
+            'resolved': 0,
+            'cache_hits': 0,
+            'fetches': 0
+        }
+    
+    @staticmethod
+    def is_reference(value: Any) -> bool:
+        return isinstance(value, dict) and CLAIM_KEY in value
+    
+    @staticmethod
+    def _encode(value: Dict[str, Any]) -> bytes:
+        # Canonical form so equal payloads hash equally whichever encoder is installed
+        return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+    
+    async def offload(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a reference to the stored value if it is large, else the value itself"""
+        if not value or self.is_reference(value):
+            return value
+        
+        data = self._encode(value)
+        if len(data) < self.threshold_bytes:
+            self.metrics['inlined'] += 1
+            return value
+        
+        digest = await self.store.put(data)
+        self._remember(digest, value)
+        self.metrics['offloaded'] += 1
+        self.metrics['offloaded_bytes'] += len(data)
+        
+        return {
+            CLAIM_KEY: f"sha256:{digest}",
+            'size': len(data),
+            'content_type': CLAIM_CONTENT_TYPE,
+            'projection': project_summary(value)
+        }
+    
+    async def resolve(self, value: Any) -> Any:
+        """Return the full value for a reference; anything else is returned unchanged"""
+        if not self.is_reference(value):
+            return value
+        
+        algorithm, _, digest = value[CLAIM_KEY].partition(':')
+        if algorithm != 'sha256' or not digest:
+            raise BlobStoreError(f"Unsupported claim reference {value[CLAIM_KEY]}")
+        
+        self.metrics['resolved'] += 1
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            self.metrics['cache_hits'] += 1
+            return cached
+        
+        pending = self._inflight.get(digest)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[digest] = future
+        try:
+            self.metrics['fetches'] += 1
+            data = await self.store.get(digest)
+            resolved = orjson.loads(data) if orjson is not None else json.loads(data)
+            self._remember(digest, resolved)
+            future.set_result(resolved)
+            return resolved
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters see the error; make sure an unobserved one is not reported
+            future.exception()
+            raise
+        finally:
+            del self._inflight[digest]
+    
+    def _remember(self, digest: str, value: Dict[str, Any]):
+        self._cache[digest] = value
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'threshold_bytes': self.threshold_bytes,
+            'cached': len(self._cache),
+            **self.metrics
+        }
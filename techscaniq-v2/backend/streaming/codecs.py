@@ -0,0 +1,226 @@
+"""
+Payload codecs for the TechScanIQ Kafka pipeline
+Encodes message dicts to bytes and back, negotiated through the content-type header
+"""
+
+import json
+import struct
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CONTENT_TYPE_HEADER = 'content-type'
+
+# Messages produced before codecs existed carry no content-type header
+LEGACY_CONTENT_TYPE = 'application/json'
+
+class CodecError(Exception):
+    """Raised when a payload cannot be encoded or decoded"""
+    pass
+
+def _to_primitive(value: Any) -> Any:
+    """Fallback for types the fast encoders do not know, matching json default=str"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+class Codec:
+    """Base class for payload codecs"""
+    
+    name: str = ''
+    content_type: str = ''
+    
+    @property
+    def available(self) -> bool:
+        return True
+    
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        raise NotImplementedError
+    
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        raise NotImplementedError
+
+class JsonCodec(Codec):
+    """Standard library JSON, the original wire format"""
+    
+    name = 'json'
+    content_type = 'application/json'
+    
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        return json.dumps(value, default=str).encode('utf-8')
+    
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        return json.loads(data)
+
+class OrjsonCodec(Codec):
+    """orjson: same JSON on the wire, several times cheaper to encode and decode"""
+    
+    name = 'orjson'
+    content_type = 'application/json'
+    
+    @property
+    def available(self) -> bool:
+        return orjson is not None
+    
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        return orjson.dumps(value, default=_to_primitive, option=orjson.OPT_NON_STR_KEYS)
+    
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        return orjson.loads(data)
+
+class MsgpackCodec(Codec):
+    """MessagePack: compact binary encoding of the same data model"""
+    
+    name = 'msgpack'
+    content_type = 'application/msgpack'
+    
+    @property
+    def available(self) -> bool:
+        return msgpack is not None
+    
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        return msgpack.packb(value, default=_to_primitive, use_bin_type=True)
+    
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+class EnvelopeCodec(Codec):
+    """
+    Versioned binary envelope around another codec
+    
+    Layout: magic (4 bytes) | envelope version (1 byte) | inner codec id (1 byte) | payload.
+    The envelope is self-describing, so it still decodes if headers are stripped
+    by a proxy or a replay tool.
+    """
+    
+    name = 'envelope'
+    content_type = 'application/vnd.techscaniq.envelope'
+    
+    MAGIC = b'TSQ\x00'
+    VERSION = 1
+    HEADER = struct.Struct('>4sBB')
+    
+    # Stable wire ids; never renumber
+    INNER_CODEC_IDS = {'json': 1, 'orjson': 1, 'msgpack': 2}
+    
+    def __init__(self, inner: Codec, decoders: Dict[int, Codec]):
+        self.inner = inner
+        self.decoders = decoders
+    
+    @property
+    def available(self) -> bool:
+        return self.inner.available
+    
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, self.INNER_CODEC_IDS[self.inner.name])
+        return header + self.inner.encode(value)
+    
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        if len(data) < self.HEADER.size:
+            raise CodecError("Envelope too short")
+        
+        magic, version, codec_id = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC:
+            raise CodecError("Not an envelope payload")
+        if version > self.VERSION:
+            raise CodecError(f"Unsupported envelope version {version}")
+        
+        decoder = self.decoders.get(codec_id)
+        if decoder is None:
+            raise CodecError(f"Unknown envelope codec id {codec_id}")
+        
+        return decoder.decode(memoryview(data)[self.HEADER.size:].tobytes())
+    
+    @classmethod
+    def is_envelope(cls, data: bytes) -> bool:
+        return data[:len(cls.MAGIC)] == cls.MAGIC
+
+class CodecRegistry:
+    """
+    Registry of payload codecs keyed by name and content type
+    
+    Producers encode with the configured codec and stamp its content type on
+    the record. Consumers pick the decoder from that header, so every codec
+    can be read regardless of which one this process writes. Records without
+    the header are legacy JSON.
+    """
+    
+    def __init__(self, default_codec: str = 'json'):
+        self._by_name: Dict[str, Codec] = {}
+        self._decoders: Dict[str, Codec] = {}
+        
+        json_codec = OrjsonCodec() if orjson is not None else JsonCodec()
+        msgpack_codec = MsgpackCodec()
+        
+        self.register(JsonCodec())
+        self.register(OrjsonCodec())
+        self.register(msgpack_codec)
+        
+        # JSON is decoded with orjson whenever it is installed, whatever the producer used
+        self._decoders[JsonCodec.content_type] = json_codec
+        
+        envelope_decoders: Dict[int, Codec] = {1: json_codec}
+        if msgpack_codec.available:
+            envelope_decoders[2] = msgpack_codec
+        self.register(EnvelopeCodec(msgpack_codec if msgpack_codec.available else json_codec,
+                                    envelope_decoders))
+        
+        self.default = self.get(default_codec)
+    
+    def register(self, codec: Codec):
+        """Register a codec for encoding by name and decoding by content type"""
+        self._by_name[codec.name] = codec
+        if codec.available:
+            self._decoders.setdefault(codec.content_type, codec)
+    
+    def get(self, name: str) -> Codec:
+        """Look up an available codec by name"""
+        codec = self._by_name.get(name)
+        if codec is None:
+            raise CodecError(f"Unknown codec '{name}', expected one of {self.names()}")
+        if not codec.available:
+            raise CodecError(f"Codec '{name}' is not installed")
+        return codec
+    
+    def names(self) -> List[str]:
+        return sorted(name for name, codec in self._by_name.items() if codec.available)
+    
+    def encode(self, value: Dict[str, Any], codec: Optional[str] = None) -> Tuple[bytes, str]:
+        """Encode a value, returning the bytes and the content type to put in the headers"""
+        encoder = self.get(codec) if codec else self.default
+        try:
+            return encoder.encode(value), encoder.content_type
+        except Exception as e:
+            raise CodecError(f"Failed to encode with {encoder.name}: {e}") from e
+    
+    def decode(self, data: bytes, content_type: Optional[str] = None) -> Dict[str, Any]:
+        """Decode a value using its content type; missing means legacy JSON"""
+        if content_type is None:
+            content_type = (EnvelopeCodec.content_type if EnvelopeCodec.is_envelope(data)
+                            else LEGACY_CONTENT_TYPE)
+        
+        decoder = self._decoders.get(content_type)
+        if decoder is None:
+            raise CodecError(f"No codec installed for content type '{content_type}'")
+        
+        try:
+            return decoder.decode(data)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Failed to decode {content_type} payload: {e}") from e
@@ -0,0 +1,301 @@
+"""
+Dead Letter Queue replay for the TechScanIQ monitoring pipeline
+Re-publishes parked messages to their original topic (or the failing group's retry topic) at a controlled rate
+
+Usage (from the backend directory):
+    python -m streaming.dlq_replay --topic change.detected --error-class ConnectionDoesNotExistError --since 2026-01-01T00:00:00+00:00 --rate 20 --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from aiokafka import AIOKafkaConsumer
+from aiokafka.structs import TopicPartition
+
+from streaming.kafka_client import (
+    ATTEMPT_HEADER, CONSUMER_GROUP_HEADER, DEFAULT_RETRY_TIERS, DLQ_TOPIC, NOT_BEFORE_HEADER,
+    ORIGINAL_TOPIC_HEADER, KafkaClient, KafkaMessage, RetryPolicy
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ReplayFilter:
+    """Which DLQ messages to replay"""
+    topics: Optional[Set[str]] = None
+    error_classes: Optional[Set[str]] = None
+    consumer_groups: Optional[Set[str]] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    
+    def matches(self, data: Dict[str, Any], failed_at: datetime) -> bool:
+        if self.topics and data.get('original_topic') not in self.topics:
+            return False
+        if self.error_classes and data.get('error_class') not in self.error_classes:
+            return False
+        if self.consumer_groups and data.get('consumer_group') not in self.consumer_groups:
+            return False
+        if self.since and failed_at < self.since:
+            return False
+        if self.until and failed_at > self.until:
+            return False
+        return True
+
+@dataclass
+class ReplayReport:
+    """Outcome of a replay run"""
+    scanned: int = 0
+    matched: int = 0
+    replayed: int = 0
+    failed: int = 0
+    skipped_undecodable: int = 0
+    dry_run: bool = False
+    by_topic: Dict[str, int] = field(default_factory=dict)
+
+class DLQReplayer:
+    """
+    Replays messages parked in the DLQ
+    
+    Reads the DLQ without a consumer group, from the first message at or after
+    `since` up to the end offsets captured when the run starts, so messages that
+    fail again during the replay are not picked up a second time.
+    """
+    
+    def __init__(self, kafka: KafkaClient, dlq_topic: str = DLQ_TOPIC):
+        self.kafka = kafka
+        self.dlq_topic = dlq_topic
+    
+    async def replay(self,
+                     replay_filter: ReplayFilter,
+                     rate: float = 10.0,
+                     dry_run: bool = False,
+                     to_retry: bool = False,
+                     limit: Optional[int] = None) -> ReplayReport:
+        """
+        Replay matching DLQ messages
+        
+        Args:
+            replay_filter: Which messages to replay
+            rate: Maximum messages re-published per second
+            dry_run: Only count and log what would be replayed
+            to_retry: Send to the failing group's first retry topic instead of the
+                original topic, so only that group reprocesses the message
+            limit: Stop after this many matching messages
+        
+        Returns:
+            ReplayReport: Counts of scanned, matched and replayed messages
+        """
+        report = ReplayReport(dry_run=dry_run)
+        consumer = AIOKafkaConsumer(
+            bootstrap_servers=self.kafka.bootstrap_servers,
+            client_id=f"{self.kafka.client_id}-dlq-replay",
+            group_id=None,
+            enable_auto_commit=False,
+            key_deserializer=lambda k: k.decode('utf-8') if k else None
+        )
+        await consumer.start()
+        
+        try:
+            # Load cluster metadata so the DLQ partitions are known
+            await consumer.topics()
+            partitions = [
+                TopicPartition(self.dlq_topic, p)
+                for p in sorted(consumer.partitions_for_topic(self.dlq_topic) or ())
+            ]
+            if not partitions:
+                logger.warning(f"DLQ topic {self.dlq_topic} has no partitions")
+                return report
+            
+            consumer.assign(partitions)
+            end_offsets = await consumer.end_offsets(partitions)
+            await self._seek_to_start(consumer, partitions, replay_filter.since)
+            
+            remaining = {tp for tp in partitions if await consumer.position(tp) < end_offsets[tp]}
+            interval = 1.0 / rate if rate > 0 else 0.0
+            next_send = time.monotonic()
+            
+            while remaining:
+                fetched = await consumer.getmany(*remaining, timeout_ms=1000, max_records=500)
+                
+                for tp, records in fetched.items():
+                    for record in records:
+                        if record.offset >= end_offsets[tp]:
+                            remaining.discard(tp)
+                            break
+                        
+                        report.scanned += 1
+                        message = self._decode(record)
+                        if message is None:
+                            report.skipped_undecodable += 1
+                            continue
+                        
+                        if not replay_filter.matches(message.data, self._failed_at(message, record)):
+                            continue
+                        
+                        report.matched += 1
+                        original_topic = message.data.get('original_topic', '')
+                        report.by_topic[original_topic] = report.by_topic.get(original_topic, 0) + 1
+                        
+                        if not dry_run:
+                            # Pace re-publishing so a replay cannot swamp the consumers
+                            delay = next_send - time.monotonic()
+                            if delay > 0:
+                                await asyncio.sleep(delay)
+                            next_send = max(next_send, time.monotonic()) + interval
+                            
+                            if await self._republish(message, to_retry):
+                                report.replayed += 1
+                            else:
+                                report.failed += 1
+                        
+                        if limit is not None and report.matched >= limit:
+                            return report
+                
+                for tp in list(remaining):
+                    if await consumer.position(tp) >= end_offsets[tp]:
+                        remaining.discard(tp)
+            
+            return report
+        
+        finally:
+            await consumer.stop()
+            logger.info(f"DLQ replay finished: {report}")
+    
+    async def _seek_to_start(self,
+                             consumer: AIOKafkaConsumer,
+                             partitions: List[TopicPartition],
+                             since: Optional[datetime]):
+        """Position each partition at the first message written at or after `since`"""
+        await consumer.seek_to_beginning(*partitions)
+        if not since:
+            return
+        
+        offsets = await consumer.offsets_for_times({
+            tp: int(since.timestamp() * 1000) for tp in partitions
+        })
+        for tp in partitions:
+            found = offsets.get(tp)
+            if found is None:
+                await consumer.seek_to_end(tp)
+            else:
+                consumer.seek(tp, found.offset)
+    
+    def _decode(self, record: Any) -> Optional[KafkaMessage]:
+        """Decode a DLQ record; None if it cannot be replayed"""
+        try:
+            message, _ = self.kafka._to_kafka_message(record)
+            original = message.data.get('original_message')
+        except Exception as e:
+            logger.warning(f"Skipping undecodable DLQ record at offset {record.offset}: {e}")
+            return None
+        
+        if not isinstance(original, dict) or 'undecodable' in original:
+            return None
+        return message
+    
+    @staticmethod
+    def _failed_at(message: KafkaMessage, record: Any) -> datetime:
+        failed_at = message.data.get('failed_at')
+        if failed_at:
+            try:
+                return datetime.fromisoformat(failed_at)
+            except ValueError:
+                pass
+        return datetime.fromtimestamp(record.timestamp / 1000, tz=timezone.utc)
+    
+    async def _republish(self, dlq_message: KafkaMessage, to_retry: bool) -> bool:
+        """Re-publish the original message of a DLQ entry"""
+        data = dlq_message.data
+        original = data['original_message']
+        original_topic = data.get('original_topic')
+        if not original_topic:
+            logger.warning(f"DLQ message {dlq_message.id} has no original topic")
+            return False
+        
+        message = KafkaMessage(
+            id=original.get('id', ''),
+            timestamp=original.get('timestamp', ''),
+            type=original.get('type', ''),
+            source=original.get('source', ''),
+            data=original.get('data', {}),
+            metadata=original.get('metadata')
+        )
+        headers = {'x-replayed-from': dlq_message.id}
+        
+        consumer_group = data.get('consumer_group')
+        if to_retry and consumer_group:
+            tier, _ = DEFAULT_RETRY_TIERS[0]
+            topic = RetryPolicy.topic_name(consumer_group, tier)
+            headers.update({
+                ATTEMPT_HEADER: '0',
+                ORIGINAL_TOPIC_HEADER: original_topic,
+                NOT_BEFORE_HEADER: '0',
+                CONSUMER_GROUP_HEADER: consumer_group
+            })
+        else:
+            topic = original_topic
+        
+        return await self.kafka.produce_message(topic, message, key=None, headers=headers)
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+async def main():
+    parser = argparse.ArgumentParser(description='Replay messages from the dead letter queue')
+    parser.add_argument('--kafka-servers', default=os.getenv('KAFKA_SERVERS', 'localhost:29092'))
+    parser.add_argument('--redis-url', default=os.getenv('REDIS_URL', 'redis://localhost:6379'))
+    parser.add_argument('--dlq-topic', default=DLQ_TOPIC)
+    parser.add_argument('--topic', action='append', help='Original topic to replay (repeatable)')
+    parser.add_argument('--error-class', action='append', help='Error class to replay (repeatable)')
+    parser.add_argument('--group', action='append', help='Failing consumer group to replay (repeatable)')
+    parser.add_argument('--since', type=_parse_time, help='Only messages that failed at or after this ISO time')
+    parser.add_argument('--until', type=_parse_time, help='Only messages that failed at or before this ISO time')
+    parser.add_argument('--rate', type=float, default=10.0, help='Messages per second')
+    parser.add_argument('--limit', type=int, help='Stop after this many matching messages')
+    parser.add_argument('--to-retry', action='store_true',
+                        help="Replay into the failing group's retry topic instead of the original topic")
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be replayed')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    kafka = KafkaClient(
+        bootstrap_servers=args.kafka_servers,
+        redis_url=args.redis_url,
+        client_id='dlq-replay'
+    )
+    await kafka.start()
+    
+    try:
+        replayer = DLQReplayer(kafka, dlq_topic=args.dlq_topic)
+        report = await replayer.replay(
+            ReplayFilter(
+                topics=set(args.topic) if args.topic else None,
+                error_classes=set(args.error_class) if args.error_class else None,
+                consumer_groups=set(args.group) if args.group else None,
+                since=args.since,
+                until=args.until
+            ),
+            rate=args.rate,
+            dry_run=args.dry_run,
+            to_retry=args.to_retry,
+            limit=args.limit
+        )
+        
+        print(f"Scanned {report.scanned}, matched {report.matched}, replayed {report.replayed}, "
+              f"failed {report.failed}, undecodable {report.skipped_undecodable}"
+              f"{' (dry run)' if report.dry_run else ''}")
+        for topic, count in sorted(report.by_topic.items()):
+            print(f"  {topic}: {count}")
+    finally:
+        await kafka.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
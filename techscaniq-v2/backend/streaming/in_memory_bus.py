@@ -0,0 +1,679 @@
+"""
+In-memory stand-in for the Kafka client
+Runs the produce/consume flow inside one process for tests and local benchmarks
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+import zlib
+from dataclasses import asdict
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from streaming.codecs import CodecRegistry
+from streaming.kafka_client import (
+    DLQ_TOPIC, BatchConsumerStats, KafkaMessage, KeyedDispatcher, LazyKafkaMessage, ProduceRecord,
+    ProduceResult, QueueTelemetry, message_headers
+)
+from streaming.queue_metrics import QueueMetricsWriter
+
+logger = logging.getLogger(__name__)
+
+class _Record:
+    """A record stored in an in-memory partition"""
+    __slots__ = ('topic', 'partition', 'offset', 'key', 'headers', 'timestamp', 'message')
+    
+    def __init__(self, topic: str, partition: int, offset: int, key: Optional[str],
+                 headers: Dict[str, str], timestamp: int, message: Any):
+        self.topic = topic
+        self.partition = partition
+        self.offset = offset
+        self.key = key
+        self.headers = headers
+        self.timestamp = timestamp
+        self.message = message
+
+class _Partition:
+    """Append-only log with a bounded number of retained records"""
+    __slots__ = ('log', 'base_offset', 'retention')
+    
+    def __init__(self, retention: int):
+        self.log: List[_Record] = []
+        self.base_offset = 0
+        self.retention = retention
+    
+    @property
+    def end_offset(self) -> int:
+        return self.base_offset + len(self.log)
+    
+    def trim(self):
+        """Drop the oldest records once the log holds twice the retention, keeping appends amortized O(1)"""
+        if len(self.log) >= 2 * self.retention:
+            expired = len(self.log) - self.retention
+            del self.log[:expired]
+            self.base_offset += expired
+    
+    def read(self, offset: int, max_records: int) -> List[_Record]:
+        start = max(offset, self.base_offset) - self.base_offset
+        return self.log[start:start + max_records]
+
+class _GroupMember:
+    """One consumer in a consumer group"""
+    
+    def __init__(self, consumer_id: str, topics: List[str]):
+        self.consumer_id = consumer_id
+        self.topics = topics
+        self.assigned: List[Tuple[str, int]] = []
+        self.cursor = 0
+        self.wakeup = asyncio.Event()
+
+class _ConsumerGroup:
+    """Members and committed positions of a consumer group"""
+    
+    def __init__(self, group_id: str, auto_offset_reset: str):
+        self.group_id = group_id
+        self.auto_offset_reset = auto_offset_reset
+        self.members: List[_GroupMember] = []
+        self.positions: Dict[Tuple[str, int], int] = {}
+
+class InMemoryBroker:
+    """
+    Process-wide topics, partitions and consumer groups
+    Brokers are shared by URL, so every client built with the same memory://name
+    talks to the same topics, just as clients on the same Kafka cluster do.
+    """
+    
+    _registry: Dict[str, 'InMemoryBroker'] = {}
+    
+    def __init__(self, url: str, default_partitions: int = 3, retention_messages: int = 100_000):
+        self.url = url
+        self.default_partitions = default_partitions
+        self.retention_messages = retention_messages
+        self.topics: Dict[str, List[_Partition]] = {}
+        self.groups: Dict[str, _ConsumerGroup] = {}
+        self._subscribers: Dict[str, List[_GroupMember]] = {}
+        self._round_robin: Dict[str, int] = {}
+    
+    @classmethod
+    def get(cls, url: str, **options) -> 'InMemoryBroker':
+        """Return the broker for a memory:// URL, creating it on first use"""
+        broker = cls._registry.get(url)
+        if broker is None:
+            broker = cls._registry[url] = cls(url, **options)
+        return broker
+    
+    @classmethod
+    def reset(cls, url: Optional[str] = None):
+        """Forget one broker (or all of them), e.g. between tests"""
+        if url is None:
+            cls._registry.clear()
+        else:
+            cls._registry.pop(url, None)
+    
+    def create_topic(self, topic: str, partitions: Optional[int] = None) -> List[_Partition]:
+        """Create a topic if it does not exist (topics are also auto-created on use)"""
+        existing = self.topics.get(topic)
+        if existing is None:
+            existing = self.topics[topic] = [
+                _Partition(self.retention_messages)
+                for _ in range(partitions or self.default_partitions)
+            ]
+            self._rebalance_topic(topic)
+        return existing
+    
+    def append(self, topic: str, message: Any, key: Optional[str], headers: Dict[str, str]) -> Tuple[int, int]:
+        """Append a record, returning its partition and offset"""
+        partitions = self.topics.get(topic) or self.create_topic(topic)
+        
+        if key is not None:
+            partition = zlib.crc32(key.encode('utf-8')) % len(partitions)
+        else:
+            partition = self._round_robin.get(topic, 0) % len(partitions)
+            self._round_robin[topic] = partition + 1
+        
+        log = partitions[partition]
+        offset = log.base_offset + len(log.log)
+        log.log.append(_Record(topic, partition, offset, key, headers, int(time.time() * 1000), message))
+        if offset - log.base_offset >= 2 * log.retention:
+            log.trim()
+        
+        for member in self._subscribers.get(topic, ()):
+            member.wakeup.set()
+        
+        return partition, offset
+    
+    def join(self, group_id: str, member: _GroupMember, auto_offset_reset: str = 'latest'):
+        """Add a member to a group and rebalance the group's partitions"""
+        for topic in member.topics:
+            self.create_topic(topic)
+        
+        group = self.groups.get(group_id)
+        if group is None:
+            group = self.groups[group_id] = _ConsumerGroup(group_id, auto_offset_reset)
+        group.members.append(member)
+        
+        for topic in member.topics:
+            self._subscribers.setdefault(topic, []).append(member)
+        
+        self._rebalance(group)
+    
+    def leave(self, group_id: str, member: _GroupMember):
+        """Remove a member from its group; its partitions move to the remaining members"""
+        group = self.groups.get(group_id)
+        if group is None or member not in group.members:
+            return
+        
+        group.members.remove(member)
+        for topic in member.topics:
+            subscribers = self._subscribers.get(topic, [])
+            if member in subscribers:
+                subscribers.remove(member)
+        
+        self._rebalance(group)
+    
+    def fetch(self, group_id: str, member: _GroupMember, max_records: int) -> List[_Record]:
+        """Read up to max_records from the member's partitions, advancing the group position"""
+        group = self.groups[group_id]
+        records: List[_Record] = []
+        
+        # Start from a different partition each time so a busy one cannot starve the rest
+        assigned = member.assigned
+        if assigned:
+            member.cursor = (member.cursor + 1) % len(assigned)
+            assigned = assigned[member.cursor:] + assigned[:member.cursor]
+        
+        for tp in assigned:
+            remaining = max_records - len(records)
+            if remaining <= 0:
+                break
+            
+            log = self.topics[tp[0]][tp[1]]
+            position = max(group.positions[tp], log.base_offset)
+            batch = log.read(position, remaining)
+            if batch:
+                records.extend(batch)
+                group.positions[tp] = batch[-1].offset + 1
+            else:
+                group.positions[tp] = position
+        
+        return records
+    
+    def lag(self, group_id: str) -> Dict[str, Dict[int, int]]:
+        """Records not yet fetched by a group, per topic and partition"""
+        group = self.groups.get(group_id)
+        if group is None:
+            return {}
+        
+        lag: Dict[str, Dict[int, int]] = {}
+        for (topic, partition), position in group.positions.items():
+            end_offset = self.topics[topic][partition].end_offset
+            lag.setdefault(topic, {})[partition] = max(0, end_offset - position)
+        return lag
+    
+    def _rebalance_topic(self, topic: str):
+        for group in self.groups.values():
+            if any(topic in member.topics for member in group.members):
+                self._rebalance(group)
+    
+    def _rebalance(self, group: _ConsumerGroup):
+        """Round-robin each subscribed partition across the members subscribed to its topic"""
+        for member in group.members:
+            member.assigned = []
+        
+        topics = sorted({topic for member in group.members for topic in member.topics})
+        for topic in topics:
+            eligible = [member for member in group.members if topic in member.topics]
+            for partition, log in enumerate(self.topics[topic]):
+                tp = (topic, partition)
+                if tp not in group.positions:
+                    group.positions[tp] = (log.base_offset if group.auto_offset_reset == 'earliest'
+                                           else log.end_offset)
+                eligible[partition % len(eligible)].assigned.append(tp)
+        
+        for member in group.members:
+            member.wakeup.set()
+
+class InMemoryBus:
+    """
+    In-process implementation of the KafkaClient interface
+    
+    Supports topics with keyed partitioning, consumer groups, headers, keyed
+    dispatch and batch consumers. Messages are passed by reference unless the
+    producing client sets codec_roundtrip, in which case each record is stored
+    encoded and decoded per consumer like on a real broker. Offsets live in memory, so
+    Kafka-only options (commits, retry tiers) are accepted and ignored, and
+    failed messages go straight to the DLQ topic.
+    """
+    
+    def __init__(self,
+                 bootstrap_servers: str = "memory://default",
+                 redis_url: Optional[str] = None,
+                 client_id: str = "techscaniq-monitoring",
+                 codec: Optional[str] = None,
+                 compression_type: Optional[str] = None,
+                 partitions: int = 3,
+                 codec_roundtrip: bool = False,
+                 metrics_writer: Optional[QueueMetricsWriter] = None,
+                 telemetry_interval: float = 15.0):
+        self.bootstrap_servers = bootstrap_servers
+        self.redis_url = redis_url
+        self.client_id = client_id
+        self.broker = InMemoryBroker.get(bootstrap_servers, default_partitions=partitions)
+        self.codecs = CodecRegistry(codec or 'json')
+        self.codec_roundtrip = codec_roundtrip
+        
+        self.consumers: Dict[str, _GroupMember] = {}
+        self.consumer_groups: Dict[str, str] = {}
+        self.header_filters: Dict[str, Callable[[Dict[str, str]], bool]] = {}
+        self.consumer_tasks: Dict[str, asyncio.Task] = {}
+        self.dispatchers: Dict[str, KeyedDispatcher] = {}
+        self.batch_stats: Dict[str, BatchConsumerStats] = {}
+        self.running = False
+        
+        # Same telemetry rows as KafkaClient, with lag measured against fetch positions
+        self.metrics_writer = metrics_writer
+        self.telemetry_interval = telemetry_interval
+        self.telemetry = QueueTelemetry()
+        self._telemetry_task: Optional[asyncio.Task] = None
+        
+        # Monitoring metrics
+        self.metrics = {
+            'messages_produced': 0,
+            'messages_consumed': 0,
+            'messages_filtered': 0,
+            'production_errors': 0,
+            'consumption_errors': 0,
+            'dead_lettered': 0,
+            'last_error': None
+        }
+    
+    async def start(self):
+        """Nothing to connect to; kept for interface parity"""
+        self.running = True
+        self._telemetry_task = asyncio.create_task(self._report_telemetry())
+        logger.info(f"In-memory bus started on {self.bootstrap_servers}")
+    
+    async def stop(self):
+        """Stop consumers, letting queued messages finish"""
+        self.running = False
+        
+        if self._telemetry_task:
+            self._telemetry_task.cancel()
+            await asyncio.gather(self._telemetry_task, return_exceptions=True)
+        
+        for consumer_id, member in self.consumers.items():
+            task = self.consumer_tasks.get(consumer_id)
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            
+            dispatcher = self.dispatchers.get(consumer_id)
+            if dispatcher:
+                await dispatcher.stop()
+            
+            self.broker.leave(self.consumer_groups[consumer_id], member)
+        
+        logger.info("In-memory bus stopped")
+    
+    async def produce_message(self,
+                              topic: str,
+                              message: KafkaMessage,
+                              key: Optional[str] = None,
+                              headers: Optional[Dict[str, str]] = None) -> bool:
+        """Append a message to a topic"""
+        return self._append(topic, message, key, headers).success
+    
+    async def produce(self,
+                      topic: str,
+                      message: KafkaMessage,
+                      key: Optional[str] = None,
+                      headers: Optional[Dict[str, str]] = None) -> 'asyncio.Future[ProduceResult]':
+        """Append a message and return an already completed delivery future"""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(self._append(topic, message, key, headers))
+        return future
+    
+    async def produce_batch(self, records: List[ProduceRecord]) -> List[ProduceResult]:
+        """Append many messages"""
+        return [self._append(r.topic, r.message, r.key, r.headers) for r in records]
+    
+    async def flush(self):
+        """Records are visible as soon as they are appended"""
+        pass
+    
+    def _append(self,
+                topic: str,
+                message: KafkaMessage,
+                key: Optional[str],
+                headers: Optional[Dict[str, str]]) -> ProduceResult:
+        record_headers = message_headers(message)
+        if headers:
+            record_headers.update(headers)
+        
+        try:
+            payload = message
+            if self.codec_roundtrip:
+                payload, record_headers['content-type'] = self.codecs.encode(asdict(message))
+            
+            partition, offset = self.broker.append(topic, payload, key, record_headers)
+        
+        except Exception as e:
+            self.metrics['production_errors'] += 1
+            self.metrics['last_error'] = str(e)
+            logger.error(f"Failed to produce message to {topic}: {e}")
+            return ProduceResult(topic=topic, message_id=message.id, success=False, error=str(e))
+        
+        self.metrics['messages_produced'] += 1
+        self.telemetry.record_produced(topic)
+        return ProduceResult(topic=topic, message_id=message.id, success=True,
+                             partition=partition, offset=offset)
+    
+    async def create_consumer(self,
+                            topics: List[str],
+                            group_id: str,
+                            message_handler: Optional[Callable[[KafkaMessage, Dict[str, Any]], Any]] = None,
+                            auto_offset_reset: str = 'latest',
+                            enable_auto_commit: bool = False,
+                            max_in_flight: int = 1,
+                            max_queue_size: int = 1000,
+                            batch_handler: Optional[Callable[[List[KafkaMessage], List[Dict[str, Any]]], Any]] = None,
+                            batch_size: int = 100,
+                            batch_max_wait_ms: int = 500,
+                            commit_every: int = 100,
+                            commit_interval_ms: int = 5000,
+                            retry_tiers: Optional[List[Tuple[str, int]]] = None,
+                            header_filter: Optional[Callable[[Dict[str, str]], bool]] = None) -> str:
+        """Join a consumer group; same semantics as KafkaClient.create_consumer"""
+        if (message_handler is None) == (batch_handler is None):
+            raise ValueError("Exactly one of message_handler or batch_handler is required")
+        
+        consumer_id = f"{group_id}-{len(self.consumers)}"
+        member = _GroupMember(consumer_id, list(topics))
+        self.broker.join(group_id, member, auto_offset_reset)
+        self.consumers[consumer_id] = member
+        self.consumer_groups[consumer_id] = group_id
+        if header_filter:
+            self.header_filters[consumer_id] = header_filter
+        
+        if batch_handler:
+            stats = BatchConsumerStats(batch_size, batch_max_wait_ms)
+            self.batch_stats[consumer_id] = stats
+            self.consumer_tasks[consumer_id] = asyncio.create_task(
+                self._consume_batches(group_id, member, batch_handler, stats)
+            )
+            logger.info(f"In-memory batch consumer {consumer_id} started for topics {topics}")
+            return consumer_id
+        
+        dispatcher = KeyedDispatcher(
+            name=consumer_id,
+            handler=partial(self._process_record, consumer_id=consumer_id, message_handler=message_handler),
+            max_in_flight=max_in_flight,
+            max_queue_size=max_queue_size
+        )
+        dispatcher.start()
+        self.dispatchers[consumer_id] = dispatcher
+        
+        self.consumer_tasks[consumer_id] = asyncio.create_task(
+            self._consume_messages(group_id, member, dispatcher)
+        )
+        logger.info(f"In-memory consumer {consumer_id} started for topics {topics}")
+        return consumer_id
+    
+    async def _consume_messages(self, group_id: str, member: _GroupMember, dispatcher: KeyedDispatcher):
+        """Feed fetched records to the dispatcher, waiting when partitions are drained"""
+        try:
+            while True:
+                member.wakeup.clear()
+                records = self.broker.fetch(group_id, member, dispatcher.max_queue_size)
+                if not records:
+                    await member.wakeup.wait()
+                    continue
+                
+                for record in records:
+                    routing_key = record.key if record.key is not None else (record.topic, record.partition)
+                    dispatcher.submit(routing_key, record)
+                    if dispatcher.is_full:
+                        await dispatcher.wait_for_capacity()
+                
+                # Let other consumers run between fetches
+                await asyncio.sleep(0)
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"In-memory consumer {member.consumer_id} error: {e}")
+    
+    async def _consume_batches(self,
+                               group_id: str,
+                               member: _GroupMember,
+                               batch_handler: Callable,
+                               stats: BatchConsumerStats):
+        """Collect batches of up to batch_size records, waiting at most batch_max_wait_ms"""
+        loop = asyncio.get_running_loop()
+        
+        try:
+            while True:
+                fetch_start = time.perf_counter()
+                deadline = loop.time() + stats.max_wait_ms / 1000
+                records: List[_Record] = []
+                
+                while len(records) < stats.batch_size:
+                    member.wakeup.clear()
+                    records.extend(self.broker.fetch(group_id, member, stats.batch_size - len(records)))
+                    remaining = deadline - loop.time()
+                    if len(records) >= stats.batch_size or remaining <= 0:
+                        break
+                    if records and not member.wakeup.is_set():
+                        # Partial batch: wait for more only until the deadline
+                        try:
+                            await asyncio.wait_for(member.wakeup.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            break
+                    elif not records:
+                        await member.wakeup.wait()
+                        deadline = loop.time() + stats.max_wait_ms / 1000
+                        fetch_start = time.perf_counter()
+                
+                stats.fetch_wait_ms.observe((time.perf_counter() - fetch_start) * 1000)
+                await self._process_batch(records, member.consumer_id, batch_handler, stats)
+                await asyncio.sleep(0)
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"In-memory batch consumer {member.consumer_id} error: {e}")
+    
+    def _to_kafka_message(self, record: _Record) -> Tuple[KafkaMessage, Dict[str, Any]]:
+        """Build the message and handler context for a stored record"""
+        message = record.message
+        if isinstance(message, bytes):
+            # Stored encoded by a codec_roundtrip producer; decoded on first access like on Kafka
+            message = LazyKafkaMessage(message, record.headers.get('content-type'), self.codecs, record.headers)
+        
+        context = {
+            'topic': record.topic,
+            'partition': record.partition,
+            'offset': record.offset,
+            'key': record.key,
+            'headers': record.headers,
+            'timestamp': record.timestamp,
+            'original_topic': record.topic,
+            'attempt': 0
+        }
+        return message, context
+    
+    def _skip_record(self, record: _Record, consumer_id: str) -> bool:
+        """Whether the consumer's header filter rejects a record"""
+        header_filter = self.header_filters.get(consumer_id)
+        if header_filter is None:
+            return False
+        
+        try:
+            skip = not header_filter(record.headers)
+        except Exception as e:
+            logger.error(f"Header filter of consumer {consumer_id} failed: {e}")
+            return False
+        
+        if skip:
+            self.metrics['messages_filtered'] += 1
+        return skip
+    
+    async def _process_record(self, record: _Record, consumer_id: str, message_handler: Callable):
+        """Run the message handler for a single record"""
+        if self._skip_record(record, consumer_id):
+            return
+        
+        group_id = self.consumer_groups[consumer_id]
+        try:
+            message, context = self._to_kafka_message(record)
+            start = time.perf_counter()
+            await message_handler(message, context)
+            self.metrics['messages_consumed'] += 1
+            self.telemetry.record_consumed(record.topic, group_id, 1, (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            self.metrics['consumption_errors'] += 1
+            self.telemetry.record_failed(record.topic, group_id)
+            self.metrics['last_error'] = str(e)
+            logger.error(f"Error processing message in consumer {consumer_id}: {e}")
+            await self._send_to_dlq(record, e)
+    
+    async def _process_batch(self,
+                             records: List[_Record],
+                             consumer_id: str,
+                             batch_handler: Callable,
+                             stats: BatchConsumerStats):
+        """Run the batch handler for a list of records"""
+        records = [record for record in records if not self._skip_record(record, consumer_id)]
+        if not records:
+            return
+        
+        messages = []
+        contexts = []
+        for record in records:
+            message, context = self._to_kafka_message(record)
+            messages.append(message)
+            contexts.append(context)
+        
+        stats.size.observe(len(messages))
+        group_id = self.consumer_groups[consumer_id]
+        topic_counts: Dict[str, int] = {}
+        for record in records:
+            topic_counts[record.topic] = topic_counts.get(record.topic, 0) + 1
+        start = time.perf_counter()
+        
+        try:
+            await batch_handler(messages, contexts)
+            self.metrics['messages_consumed'] += len(messages)
+            handler_ms = (time.perf_counter() - start) * 1000
+            for topic, count in topic_counts.items():
+                self.telemetry.record_consumed(topic, group_id, count, handler_ms)
+        except Exception as e:
+            stats.batches_failed += 1
+            self.metrics['consumption_errors'] += len(records)
+            for topic, count in topic_counts.items():
+                self.telemetry.record_failed(topic, group_id, count)
+            self.metrics['last_error'] = str(e)
+            logger.error(f"Error processing batch of {len(records)} in consumer {consumer_id}: {e}")
+            for record in records:
+                await self._send_to_dlq(record, e)
+        finally:
+            stats.handler_latency_ms.observe((time.perf_counter() - start) * 1000)
+    
+    async def retry_message(self,
+                            message: KafkaMessage,
+                            context: Dict[str, Any],
+                            error: Exception,
+                            group_id: str,
+                            retry_tiers: Optional[List[Tuple[str, int]]] = None,
+                            headers: Optional[Dict[str, str]] = None) -> bool:
+        """No retry tiers in memory: park the message on the DLQ topic"""
+        return await self._dead_letter(message, context.get('original_topic', context['topic']),
+                                       error, group_id)
+    
+    async def _send_to_dlq(self, record: _Record, error: Exception):
+        """Park a failed record on the DLQ topic"""
+        if record.topic == DLQ_TOPIC:
+            return
+        
+        message, _ = self._to_kafka_message(record)
+        await self._dead_letter(message, record.topic, error)
+    
+    async def _dead_letter(self,
+                           message: KafkaMessage,
+                           original_topic: str,
+                           error: Exception,
+                           consumer_group: Optional[str] = None) -> bool:
+        failed_at = datetime.now(timezone.utc).isoformat()
+        dlq_message = KafkaMessage(
+            id=f"dlq-{uuid.uuid4()}",
+            timestamp=failed_at,
+            type="dlq_message",
+            source="in_memory_bus",
+            data={
+                'original_message': asdict(message),
+                'original_topic': original_topic,
+                'error': str(error),
+                'error_class': type(error).__name__,
+                'attempts': 1,
+                'consumer_group': consumer_group,
+                'failed_at': failed_at
+            }
+        )
+        parked = await self.produce_message(DLQ_TOPIC, dlq_message)
+        if parked:
+            self.metrics['dead_lettered'] += 1
+        return parked
+    
+    async def get_topic_metadata(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Get metadata for a specific topic"""
+        partitions = self.broker.topics.get(topic)
+        if partitions is None:
+            return None
+        
+        return {
+            'topic': topic,
+            'partitions': len(partitions),
+            'partition_metadata': [
+                {'partition': idx, 'leader': 0, 'replicas': [0], 'isr': [0],
+                 'end_offset': log.end_offset}
+                for idx, log in enumerate(partitions)
+            ]
+        }
+    
+    async def measure_lag(self) -> Dict[str, Dict[str, Dict[int, int]]]:
+        """Lag by consumer group, topic and partition, as KafkaClient.measure_lag"""
+        return {
+            group_id: self.broker.lag(group_id)
+            for group_id in set(self.consumer_groups.values())
+        }
+    
+    async def _report_telemetry(self):
+        """Periodically hand per-topic telemetry rows to the metrics writer"""
+        while self.running:
+            await asyncio.sleep(self.telemetry_interval)
+            window, self.telemetry = self.telemetry, QueueTelemetry()
+            if self.metrics_writer:
+                self.metrics_writer.add(window.to_rows(await self.measure_lag(), self.client_id))
+    
+    async def health_check(self) -> Dict[str, Any]:
+        """Report bus state in the same shape as KafkaClient.health_check"""
+        return {
+            'status': 'healthy' if self.running else 'unhealthy',
+            'broker': self.bootstrap_servers,
+            'producer_connected': self.running,
+            'consumers_count': len(self.consumers),
+            'redis_connected': False,
+            'metrics': self.metrics.copy(),
+            'dispatchers': {
+                consumer_id: dispatcher.stats()
+                for consumer_id, dispatcher in self.dispatchers.items()
+            },
+            'batch_consumers': {
+                consumer_id: stats.stats()
+                for consumer_id, stats in self.batch_stats.items()
+            },
+            'consumer_lag': await self.measure_lag()
+        }
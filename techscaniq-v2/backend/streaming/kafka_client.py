@@ -4,21 +4,57 @@ Handles message production and consumption with error handling and monitoring
 """
 
 import asyncio
-import json
 import logging
+import os
+import re
 import time
-from typing import Any, Dict, List, Optional, Callable
+import uuid
+from bisect import bisect_left
+from collections import deque
+from functools import partial
+from typing import Any, Awaitable, Dict, List, Optional, Callable, Set, Tuple
 from datetime import datetime, timezone
 from dataclasses import dataclass, asdict
 from contextlib import asynccontextmanager
 
 import aiokafka
-from aiokafka import AIOKafkaProducer, AIOKafkaConsumer
+from aiokafka import AIOKafkaProducer, AIOKafkaConsumer, ConsumerRebalanceListener
 from aiokafka.errors import KafkaError
+from aiokafka.structs import TopicPartition
 import aioredis
 
+from streaming.blob_store import ClaimCheck
+from streaming.codecs import CONTENT_TYPE_HEADER, CodecError, CodecRegistry
+from streaming.queue_metrics import QueueMetricsRow, QueueMetricsWriter
+
 logger = logging.getLogger(__name__)
 
+DLQ_TOPIC = 'dlq.failed-messages'
+
+# Default retry tiers: (topic suffix, delay in seconds)
+DEFAULT_RETRY_TIERS: List[Tuple[str, int]] = [('10s', 10), ('1m', 60), ('10m', 600)]
+
+# Backoff between attempts to park a failed record when its retry topic or the DLQ cannot be written:
+# (first delay, max delay) in seconds
+PARK_BACKOFF: Tuple[float, float] = (0.5, 30.0)
+
+# Headers carried by records on retry topics and the DLQ
+ATTEMPT_HEADER = 'x-attempt'
+ORIGINAL_TOPIC_HEADER = 'x-original-topic'
+NOT_BEFORE_HEADER = 'x-not-before'
+ERROR_CLASS_HEADER = 'x-error-class'
+ERROR_HEADER = 'x-error'
+CONSUMER_GROUP_HEADER = 'x-consumer-group'
+RETRY_HEADERS = {
+    ATTEMPT_HEADER, ORIGINAL_TOPIC_HEADER, NOT_BEFORE_HEADER,
+    ERROR_CLASS_HEADER, ERROR_HEADER, CONSUMER_GROUP_HEADER
+}
+
+# Message envelope fields copied to headers so consumers can route without decoding
+MESSAGE_ID_HEADER = 'message-id'
+CONFIG_ID_HEADER = 'config-id'
+PRIORITY_HEADER = 'priority'
+
 @dataclass
 class KafkaMessage:
     """Standard message format for monitoring pipeline"""
@@ -29,6 +65,591 @@ class KafkaMessage:
     data: Dict[str, Any]
     metadata: Optional[Dict[str, Any]] = None
 
+def message_headers(message: KafkaMessage) -> Dict[str, str]:
+    """Routing headers for a message: envelope fields plus the config it belongs to and its priority lane"""
+    headers = {
+        MESSAGE_ID_HEADER: message.id,
+        'source': message.source,
+        'type': message.type,
+        'timestamp': message.timestamp
+    }
+    config_id = message.data.get('config_id') if isinstance(message.data, dict) else None
+    if config_id:
+        headers[CONFIG_ID_HEADER] = str(config_id)
+    priority = message.data.get('priority') if isinstance(message.data, dict) else None
+    if priority:
+        headers[PRIORITY_HEADER] = str(priority)
+    return headers
+
+class LazyKafkaMessage(KafkaMessage):
+    """
+    KafkaMessage over a consumed record, decoded on first access to its payload
+    
+    id, timestamp, type and source come from the record headers written by
+    produce_message, so filtering and routing on them never decodes the value.
+    Records from producers that did not write those headers decode on first
+    access to any field. A value that fails to decode raises CodecError there.
+    """
+    
+    HEADER_FIELDS = {'id': MESSAGE_ID_HEADER, 'timestamp': 'timestamp', 'type': 'type', 'source': 'source'}
+    
+    def __init__(self, 
+                 raw: bytes, 
+                 content_type: Optional[str], 
+                 codecs: CodecRegistry, 
+                 headers: Dict[str, str]):
+        self._raw = raw
+        self._content_type = content_type
+        self._codecs = codecs
+        self._headers = headers
+        self._value: Optional[Dict[str, Any]] = None
+        self._fields: Dict[str, Any] = {}
+    
+    @property
+    def decoded(self) -> bool:
+        """Whether the payload has been decoded"""
+        return self._value is not None
+    
+    def _decode(self) -> Dict[str, Any]:
+        if self._value is None:
+            self._value = self._codecs.decode(self._raw, self._content_type)
+            self._raw = None
+        return self._value
+    
+    def _get(self, name: str, default: Any) -> Any:
+        if name in self._fields:
+            return self._fields[name]
+        
+        header = self.HEADER_FIELDS.get(name)
+        if header in self._headers:
+            return self._headers[header]
+        
+        # Cache so repeated access returns the same (mutable) object
+        value = self._fields[name] = self._decode().get(name, default)
+        return value
+    
+    def _set(self, name: str, value: Any):
+        self._fields[name] = value
+    
+    id = property(lambda self: self._get('id', ''), lambda self, v: self._set('id', v))
+    timestamp = property(lambda self: self._get('timestamp', ''), lambda self, v: self._set('timestamp', v))
+    type = property(lambda self: self._get('type', ''), lambda self, v: self._set('type', v))
+    source = property(lambda self: self._get('source', ''), lambda self, v: self._set('source', v))
+    data = property(lambda self: self._get('data', {}), lambda self, v: self._set('data', v))
+    metadata = property(lambda self: self._get('metadata', {}), lambda self, v: self._set('metadata', v))
+
+@dataclass
+class ProduceRecord:
+    """A single record queued for batched production"""
+    topic: str
+    message: KafkaMessage
+    key: Optional[str] = None
+    headers: Optional[Dict[str, str]] = None
+
+@dataclass
+class ProduceResult:
+    """Delivery outcome for a produced record"""
+    topic: str
+    message_id: str
+    success: bool
+    partition: Optional[int] = None
+    offset: Optional[int] = None
+    error: Optional[str] = None
+
+@dataclass
+class RetryPolicy:
+    """Tiered retry topics for one consumer group"""
+    group_id: str
+    tiers: List[Tuple[str, int]]
+    
+    @staticmethod
+    def topic_name(group_id: str, tier: str) -> str:
+        return f"retry.{group_id}.{tier}"
+    
+    def topics(self) -> List[str]:
+        return [self.topic_name(self.group_id, tier) for tier, _ in self.tiers]
+    
+    def pattern(self) -> str:
+        return rf"^retry\.{re.escape(self.group_id)}\.[^.]+$"
+    
+    def tier_for(self, attempt: int) -> Optional[Tuple[str, int]]:
+        """Retry topic and delay for a 1-based attempt, or None once tiers are exhausted"""
+        if attempt > len(self.tiers):
+            return None
+        tier, delay = self.tiers[attempt - 1]
+        return self.topic_name(self.group_id, tier), delay
+
+class LatencyTracker:
+    """Rolling window of latency samples with percentile snapshots"""
+    
+    def __init__(self, window: int = 1000):
+        self.samples: deque = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def record(self, latency_ms: float):
+        """Record a single latency sample"""
+        self.samples.append(latency_ms)
+        self.count += 1
+        self.total_ms += latency_ms
+        if latency_ms > self.max_ms:
+            self.max_ms = latency_ms
+    
+    @staticmethod
+    def _pick(ordered: List[float], pct: float) -> Optional[float]:
+        """Nearest-rank percentile of an already sorted list"""
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 3)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Percentile over the current window"""
+        return self._pick(sorted(self.samples), pct)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary statistics suitable for health checks"""
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50_ms': self._pick(ordered, 50),
+            'p95_ms': self._pick(ordered, 95),
+            'p99_ms': self._pick(ordered, 99),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+class Histogram:
+    """Fixed-bucket histogram with cumulative (Prometheus-style) bucket counts"""
+    
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        """Record a single observation"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts plus count/sum/avg"""
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            running += bucket_count
+            cumulative[f"le_{bound:g}"] = running
+        cumulative['le_inf'] = self.count
+        
+        return {
+            'buckets': cumulative,
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'avg': round(self.sum / self.count, 3) if self.count else None
+        }
+
+class BatchConsumerStats:
+    """Batch size and latency histograms for a batch-mode consumer"""
+    
+    SIZE_BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000]
+    LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+    
+    def __init__(self, batch_size: int, max_wait_ms: int):
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+        self.size = Histogram(self.SIZE_BUCKETS)
+        self.fetch_wait_ms = Histogram(self.LATENCY_BUCKETS_MS)
+        self.handler_latency_ms = Histogram(self.LATENCY_BUCKETS_MS)
+        self.batches_failed = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'batch_size': self.batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'batches_failed': self.batches_failed,
+            'batch_size_histogram': self.size.snapshot(),
+            'fetch_wait_ms_histogram': self.fetch_wait_ms.snapshot(),
+            'handler_latency_ms_histogram': self.handler_latency_ms.snapshot()
+        }
+
+class QueueTelemetry:
+    """
+    Per-topic produce/consume counts and handler latency for one reporting interval
+    Recording is a dict update on the hot path; the reporter swaps in a fresh
+    window each interval and turns the old one into queue_metrics rows
+    """
+    
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.produced: Dict[str, int] = {}
+        # Keyed by (topic, consumer group)
+        self.consumed: Dict[Tuple[str, str], int] = {}
+        self.failed: Dict[Tuple[str, str], int] = {}
+        self.handler_latency: Dict[Tuple[str, str], LatencyTracker] = {}
+    
+    def record_produced(self, topic: str, count: int = 1):
+        self.produced[topic] = self.produced.get(topic, 0) + count
+    
+    def record_consumed(self, topic: str, group_id: str, count: int, handler_ms: float):
+        """Record one handler call that processed `count` records of a topic"""
+        key = (topic, group_id)
+        self.consumed[key] = self.consumed.get(key, 0) + count
+        tracker = self.handler_latency.get(key)
+        if tracker is None:
+            tracker = self.handler_latency[key] = LatencyTracker()
+        tracker.record(handler_ms)
+    
+    def record_failed(self, topic: str, group_id: str, count: int = 1):
+        key = (topic, group_id)
+        self.failed[key] = self.failed.get(key, 0) + count
+    
+    def to_rows(self, 
+                lag: Dict[str, Dict[str, Dict[int, int]]], 
+                client_id: str) -> List[QueueMetricsRow]:
+        """
+        Build queue_metrics rows for this window
+        
+        Args:
+            lag: Partition lag by consumer group, then topic, then partition
+            client_id: Client the rows are attributed to
+            
+        Returns:
+            List[QueueMetricsRow]: One producer-side row per produced topic and one
+                row per (topic, consumer group) that consumed or has assigned partitions
+        """
+        now = datetime.now(timezone.utc)
+        elapsed = max(time.monotonic() - self.started_at, 1e-3)
+        rows = []
+        
+        for topic, count in self.produced.items():
+            rows.append(QueueMetricsRow(
+                time=now,
+                queue_name=topic,
+                client_id=client_id,
+                messages_produced=count,
+                throughput_per_second=round(count / elapsed, 3)
+            ))
+        
+        keys = set(self.consumed) | set(self.failed)
+        keys.update((topic, group_id) for group_id, topics in lag.items() for topic in topics)
+        
+        for topic, group_id in sorted(keys):
+            consumed = self.consumed.get((topic, group_id), 0)
+            partition_lag = lag.get(group_id, {}).get(topic, {})
+            tracker = self.handler_latency.get((topic, group_id))
+            latency = tracker.snapshot() if tracker else {}
+            
+            rows.append(QueueMetricsRow(
+                time=now,
+                queue_name=topic,
+                consumer_group=group_id,
+                client_id=client_id,
+                messages_consumed=consumed,
+                messages_failed=self.failed.get((topic, group_id), 0),
+                queue_depth=sum(partition_lag.values()),
+                max_partition_lag=max(partition_lag.values(), default=0),
+                partition_lag={str(p): n for p, n in sorted(partition_lag.items())},
+                average_processing_time_ms=latency.get('avg_ms'),
+                p50_processing_time_ms=latency.get('p50_ms'),
+                p95_processing_time_ms=latency.get('p95_ms'),
+                p99_processing_time_ms=latency.get('p99_ms'),
+                throughput_per_second=round(consumed / elapsed, 3)
+            ))
+        
+        return rows
+
+class KeyedDispatcher:
+    """
+    Runs a handler on a bounded pool of worker lanes
+    Items with the same routing key always land on the same lane, so they are
+    processed in order while unrelated keys proceed concurrently
+    """
+    
+    def __init__(self, 
+                 name: str,
+                 handler: Callable[[Any], Awaitable[Any]],
+                 max_in_flight: int = 1,
+                 max_queue_size: int = 1000):
+        self.name = name
+        self.handler = handler
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue_size = max(1, max_queue_size)
+        self.low_watermark = self.max_queue_size // 2
+        
+        self.lanes: List[asyncio.Queue] = [asyncio.Queue() for _ in range(self.max_in_flight)]
+        self.workers: List[asyncio.Task] = []
+        self.queued = 0
+        self.in_flight = 0
+        self.latency = LatencyTracker()
+        
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+        
+        # Metrics
+        self.metrics = {
+            'dispatched': 0,
+            'completed': 0,
+            'failed': 0,
+            'backpressure_pauses': 0,
+            'max_queue_depth': 0
+        }
+    
+    def start(self):
+        """Start one worker task per lane"""
+        for idx, lane in enumerate(self.lanes):
+            self.workers.append(asyncio.create_task(self._worker(lane), name=f"{self.name}-lane-{idx}"))
+    
+    @property
+    def is_full(self) -> bool:
+        return self.queued >= self.max_queue_size
+    
+    def submit(self, routing_key: Any, item: Any):
+        """Queue an item on the lane owning its routing key"""
+        lane = self.lanes[hash(routing_key) % self.max_in_flight]
+        lane.put_nowait(item)
+        self.queued += 1
+        self.metrics['dispatched'] += 1
+        
+        if self.queued > self.metrics['max_queue_depth']:
+            self.metrics['max_queue_depth'] = self.queued
+        if self.is_full:
+            self._capacity.clear()
+    
+    async def wait_for_capacity(self):
+        """Wait until the queue has drained below the low watermark"""
+        self.metrics['backpressure_pauses'] += 1
+        await self._capacity.wait()
+    
+    async def _worker(self, lane: asyncio.Queue):
+        """Process items from a single lane sequentially"""
+        while True:
+            item = await lane.get()
+            self.queued -= 1
+            self.in_flight += 1
+            start = time.perf_counter()
+            
+            try:
+                await self.handler(item)
+                self.metrics['completed'] += 1
+            except Exception as e:
+                self.metrics['failed'] += 1
+                logger.error(f"Dispatcher {self.name} handler error: {e}")
+            finally:
+                self.latency.record((time.perf_counter() - start) * 1000)
+                self.in_flight -= 1
+                lane.task_done()
+                if self.queued <= self.low_watermark:
+                    self._capacity.set()
+    
+    async def stop(self, timeout: float = 30.0):
+        """Let queued items finish (up to timeout), then stop the workers"""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(lane.join() for lane in self.lanes)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Dispatcher {self.name} stopped with {self.queued} queued items")
+        
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+    
+    def stats(self) -> Dict[str, Any]:
+        """Concurrency, queue depth and handler latency"""
+        return {
+            'max_in_flight': self.max_in_flight,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queued,
+            'max_queue_size': self.max_queue_size,
+            'handler_latency': self.latency.snapshot(),
+            **self.metrics
+        }
+
+class OffsetCommitManager:
+    """
+    At-least-once offset commits for a manually committed consumer
+    Offsets are committed only up to the first record whose handler has not
+    finished, and commits are coalesced every N acks or T milliseconds
+    """
+    
+    def __init__(self, 
+                 consumer: AIOKafkaConsumer,
+                 consumer_id: str,
+                 commit_every: int = 100,
+                 commit_interval_ms: int = 5000,
+                 revoke_drain_timeout: float = 5.0):
+        self.consumer = consumer
+        self.consumer_id = consumer_id
+        self.commit_every = max(1, commit_every)
+        self.commit_interval_ms = commit_interval_ms
+        self.revoke_drain_timeout = revoke_drain_timeout
+        
+        # Offsets handed to handlers, in consumption order, per partition
+        self._pending: Dict[TopicPartition, deque] = {}
+        # Offsets whose handler finished before an earlier offset did
+        self._done: Dict[TopicPartition, set] = {}
+        # Next offset safe to commit / last committed offset per partition
+        self._positions: Dict[TopicPartition, int] = {}
+        self._committed: Dict[TopicPartition, int] = {}
+        
+        self._acks_since_commit = 0
+        self._commit_lock = asyncio.Lock()
+        self._commit_task: Optional[asyncio.Task] = None
+        self._timer_task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.metrics = {
+            'commits': 0,
+            'commit_failures': 0,
+            'messages_committed': 0,
+            'revocation_flushes': 0,
+            'uncommitted_high_water': 0,
+            'last_commit_at': None
+        }
+    
+    def start(self):
+        """Start the time-based commit cadence"""
+        self._timer_task = asyncio.create_task(self._commit_periodically())
+    
+    def track(self, tp: TopicPartition, offset: int):
+        """Register a record that is about to be handed to a handler"""
+        if tp not in self._pending:
+            # The first record fetched after assignment sits at the committed position
+            self._pending[tp] = deque()
+            self._done[tp] = set()
+            self._committed.setdefault(tp, offset)
+        self._pending[tp].append(offset)
+        
+        uncommitted = self.uncommitted()
+        if uncommitted > self.metrics['uncommitted_high_water']:
+            self.metrics['uncommitted_high_water'] = uncommitted
+    
+    def ack(self, tp: TopicPartition, offset: int):
+        """Mark a record as handled; advances the committable position"""
+        pending = self._pending.get(tp)
+        if pending is None:
+            # Partition was revoked while the record was in flight
+            return
+        
+        done = self._done[tp]
+        done.add(offset)
+        while pending and pending[0] in done:
+            finished = pending.popleft()
+            done.discard(finished)
+            self._positions[tp] = finished + 1
+        
+        self._acks_since_commit += 1
+        if self._acks_since_commit >= self.commit_every and not self._commit_in_progress():
+            self._commit_task = asyncio.create_task(self.commit())
+    
+    def committed_offset(self, tp: TopicPartition) -> Optional[int]:
+        """Last offset committed (or found committed) for a partition, if known"""
+        return self._committed.get(tp)
+    
+    def uncommitted(self) -> int:
+        """Records that would be redelivered if the process died now"""
+        in_flight = sum(len(pending) for pending in self._pending.values())
+        handled = sum(
+            position - self._committed.get(tp, position)
+            for tp, position in self._positions.items()
+        )
+        return in_flight + handled
+    
+    def _commit_in_progress(self) -> bool:
+        return bool(self._commit_task and not self._commit_task.done())
+    
+    async def commit(self, partitions: Optional[List[TopicPartition]] = None):
+        """Commit handled positions, optionally only for some partitions"""
+        async with self._commit_lock:
+            offsets = {
+                tp: position for tp, position in self._positions.items()
+                if (partitions is None or tp in partitions) 
+                and position > self._committed.get(tp, -1)
+            }
+            self._acks_since_commit = 0
+            if not offsets:
+                return
+            
+            try:
+                await self.consumer.commit(offsets)
+                
+                for tp, position in offsets.items():
+                    self.metrics['messages_committed'] += position - self._committed.get(tp, position)
+                    self._committed[tp] = position
+                
+                self.metrics['commits'] += 1
+                self.metrics['last_commit_at'] = datetime.now(timezone.utc).isoformat()
+                
+            except Exception as e:
+                self.metrics['commit_failures'] += 1
+                logger.error(f"Offset commit failed for consumer {self.consumer_id}: {e}")
+    
+    async def _commit_periodically(self):
+        """Commit at least every commit_interval_ms while there is progress"""
+        while True:
+            await asyncio.sleep(self.commit_interval_ms / 1000)
+            if self._acks_since_commit:
+                await self.commit()
+    
+    async def on_partitions_revoked(self, revoked: List[TopicPartition]):
+        """Give in-flight records a moment to finish, then flush their commits"""
+        revoked = [tp for tp in revoked if tp in self._pending]
+        if not revoked:
+            return
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.revoke_drain_timeout
+        while any(self._pending[tp] for tp in revoked) and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        
+        await self.commit(revoked)
+        self.metrics['revocation_flushes'] += 1
+        
+        for tp in revoked:
+            abandoned = len(self._pending.pop(tp, ()))
+            self._done.pop(tp, None)
+            self._positions.pop(tp, None)
+            self._committed.pop(tp, None)
+            if abandoned:
+                logger.warning(f"Consumer {self.consumer_id} lost {tp} with {abandoned} "
+                               f"records in flight; they will be redelivered")
+    
+    async def close(self):
+        """Stop the commit timer and flush everything handled so far"""
+        if self._timer_task:
+            self._timer_task.cancel()
+            await asyncio.gather(self._timer_task, return_exceptions=True)
+        if self._commit_task:
+            await asyncio.gather(self._commit_task, return_exceptions=True)
+        
+        await self.commit()
+        logger.info(f"Consumer {self.consumer_id} committed offsets on shutdown, "
+                    f"{self.uncommitted()} records left uncommitted")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'commit_every': self.commit_every,
+            'commit_interval_ms': self.commit_interval_ms,
+            'uncommitted': self.uncommitted(),
+            **self.metrics
+        }
+
+class CommitOnRevokeListener(ConsumerRebalanceListener):
+    """Flushes offset commits before partitions move to another consumer"""
+    
+    def __init__(self, commit_manager: OffsetCommitManager):
+        self.commit_manager = commit_manager
+    
+    async def on_partitions_revoked(self, revoked):
+        await self.commit_manager.on_partitions_revoked(list(revoked))
+    
+    async def on_partitions_assigned(self, assigned):
+        pass
+
 class KafkaClient:
     """
     High-level Kafka client for monitoring pipeline
@@ -38,21 +659,64 @@ class KafkaClient:
     def __init__(self, 
                  bootstrap_servers: str = "localhost:29092",
                  redis_url: str = "redis://localhost:6379",
-                 client_id: str = "techscaniq-monitoring"):
+                 client_id: str = "techscaniq-monitoring",
+                 codec: Optional[str] = None,
+                 compression_type: Optional[str] = None,
+                 metrics_writer: Optional[QueueMetricsWriter] = None,
+                 telemetry_interval: float = 15.0):
+        """
+        Args:
+            bootstrap_servers: Kafka bootstrap servers
+            redis_url: Redis URL for metrics and state tracking
+            client_id: Client id prefix for producer and consumers
+            codec: Payload codec to produce with (json, orjson, msgpack, envelope);
+                defaults to KAFKA_CODEC or json. Every installed codec is readable.
+            compression_type: Producer compression (gzip, snappy, lz4, zstd);
+                defaults to KAFKA_COMPRESSION or none
+            metrics_writer: Started writer that receives per-topic lag, throughput
+                and handler-time rows for queue_metrics; the caller owns its lifecycle
+            telemetry_interval: Seconds between lag measurements and telemetry rows
+        """
         self.bootstrap_servers = bootstrap_servers
         self.redis_url = redis_url
         self.client_id = client_id
+        self.codecs = CodecRegistry(codec or os.getenv('KAFKA_CODEC', 'json'))
+        self.compression_type = compression_type or os.getenv('KAFKA_COMPRESSION') or None
         self.producer: Optional[AIOKafkaProducer] = None
         self.consumers: Dict[str, AIOKafkaConsumer] = {}
+        self.consumer_tasks: Dict[str, asyncio.Task] = {}
+        self.dispatchers: Dict[str, KeyedDispatcher] = {}
+        self.batch_stats: Dict[str, BatchConsumerStats] = {}
+        self.commit_managers: Dict[str, OffsetCommitManager] = {}
+        self.consumer_groups: Dict[str, str] = {}
+        self.header_filters: Dict[str, Callable[[Dict[str, str]], bool]] = {}
+        
+        # Consumers blocked on a failed record that could not be parked yet
+        self.stalled_consumers: Set[str] = set()
+        
         self.redis: Optional[aioredis.Redis] = None
         self.running = False
         
+        # Per-topic produce/consume counts not yet written to Redis
+        self._unflushed_produced: Dict[str, int] = {}
+        self._unflushed_consumed: Dict[str, int] = {}
+        
+        # Lag, throughput and handler time, reported every telemetry_interval
+        self.metrics_writer = metrics_writer
+        self.telemetry_interval = telemetry_interval
+        self.telemetry = QueueTelemetry()
+        self.consumer_lag: Dict[str, Dict[str, Dict[int, int]]] = {}
+        
         # Monitoring metrics
         self.metrics = {
             'messages_produced': 0,
             'messages_consumed': 0,
+            'messages_filtered': 0,
             'production_errors': 0,
             'consumption_errors': 0,
+            'retries_scheduled': 0,
+            'dead_lettered': 0,
+            'park_retries': 0,
             'last_error': None
         }
     
@@ -68,8 +732,8 @@ class KafkaClient:
             self.producer = AIOKafkaProducer(
                 bootstrap_servers=self.bootstrap_servers,
                 client_id=f"{self.client_id}-producer",
-                value_serializer=lambda v: json.dumps(v, default=str).encode('utf-8'),
                 key_serializer=lambda k: k.encode('utf-8') if k else None,
+                compression_type=self.compression_type,
                 acks='all',  # Wait for all replicas
                 retries=3,
                 max_in_flight_requests_per_connection=5,
@@ -79,12 +743,14 @@ class KafkaClient:
             )
             
             await self.producer.start()
-            logger.info("Kafka producer started")
+            logger.info(f"Kafka producer started (codec={self.codecs.default.name}, "
+                        f"compression={self.compression_type or 'none'})")
             
             self.running = True
             
             # Start metrics reporting
             asyncio.create_task(self._report_metrics())
+            asyncio.create_task(self._report_telemetry())
             
         except Exception as e:
             logger.error(f"Failed to start Kafka client: {e}")
@@ -95,15 +761,32 @@ class KafkaClient:
         self.running = False
         
         try:
+            # Stop consumers first so in-flight handlers can still produce
+            for consumer_id, consumer in self.consumers.items():
+                task = self.consumer_tasks.get(consumer_id)
+                if task:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                
+                dispatcher = self.dispatchers.get(consumer_id)
+                if dispatcher:
+                    await dispatcher.stop()
+                
+                commit_manager = self.commit_managers.get(consumer_id)
+                if commit_manager:
+                    await commit_manager.close()
+                
+                await consumer.stop()
+                logger.info(f"Consumer {consumer_id} stopped")
+            
             if self.producer:
                 await self.producer.stop()
                 logger.info("Kafka producer stopped")
             
-            for topic, consumer in self.consumers.items():
-                await consumer.stop()
-                logger.info(f"Consumer for topic {topic} stopped")
+            self._emit_telemetry({})
             
             if self.redis:
+                await self._flush_counters()
                 await self.redis.close()
                 logger.info("Redis connection closed")
                 
@@ -114,205 +797,920 @@ class KafkaClient:
                             topic: str, 
                             message: KafkaMessage, 
                             key: Optional[str] = None,
-                            headers: Optional[Dict[str, str]] = None) -> bool:
+                            headers: Optional[Dict[str, str]] = None,
+                            dead_letter: bool = True) -> bool:
         """
-        Produce a message to Kafka topic
+        Produce a message to Kafka topic and wait for the broker acknowledgement
         
         Args:
             topic: Kafka topic name
             message: Message to send
             key: Optional message key for partitioning
             headers: Optional message headers
+            dead_letter: Route the message to the DLQ if it cannot be produced
             
         Returns:
             bool: True if message was sent successfully
         """
+        delivery = await self.produce(topic, message, key=key, headers=headers, dead_letter=dead_letter)
+        result = await delivery
+        return result.success
+    
+    async def produce(self, 
+                      topic: str, 
+                      message: KafkaMessage, 
+                      key: Optional[str] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      dead_letter: bool = True) -> 'asyncio.Future[ProduceResult]':
+        """
+        Queue a message on the producer without waiting for the broker acknowledgement
+        
+        The record is appended to the producer's accumulator so linger/batching
+        can group it with other records. Failed deliveries are routed to the DLQ
+        unless dead_letter is False.
+        
+        Args:
+            topic: Kafka topic name
+            message: Message to send
+            key: Optional message key for partitioning
+            headers: Optional message headers
+            dead_letter: Route the message to the DLQ if it cannot be produced
+            
+        Returns:
+            Future resolving to a ProduceResult once the broker has responded
+        """
+        message_dict = asdict(message)
+        
         if not self.producer:
             logger.error("Producer not initialized")
-            return False
+            return self._completed_delivery(ProduceResult(
+                topic=topic,
+                message_id=message.id,
+                success=False,
+                error="Producer not initialized"
+            ))
         
         try:
-            # Convert message to dict
-            message_dict = asdict(message)
-            
-            # Prepare headers
-            kafka_headers = []
-            if headers:
-                kafka_headers.extend([(k, v.encode('utf-8')) for k, v in headers.items()])
-            
-            # Add default headers
-            kafka_headers.extend([
-                ('source', message.source.encode('utf-8')),
-                ('type', message.type.encode('utf-8')),
-                ('timestamp', message.timestamp.encode('utf-8'))
-            ])
-            
-            # Send message
-            record_metadata = await self.producer.send_and_wait(
+            value, content_type = self.codecs.encode(message_dict)
+            send_future = await self.producer.send(
                 topic=topic,
-                value=message_dict,
+                value=value,
                 key=key,
-                headers=kafka_headers
+                headers=self._build_headers(message, headers, content_type)
             )
+        except Exception as e:
+            result = await self._handle_produce_failure(topic, message_dict, e, dead_letter)
+            return self._completed_delivery(result)
+        
+        return asyncio.ensure_future(self._await_delivery(send_future, topic, message_dict, dead_letter))
+    
+    async def produce_batch(self, records: List[ProduceRecord]) -> List[ProduceResult]:
+        """
+        Produce many records at once and wait for all acknowledgements
+        
+        All records are queued before any acknowledgement is awaited, so the
+        whole burst shares producer batches instead of paying one round-trip each.
+        
+        Args:
+            records: Records to produce, in order
             
-            self.metrics['messages_produced'] += 1
-            
-            logger.debug(f"Message sent to {topic} partition {record_metadata.partition} "
-                        f"offset {record_metadata.offset}")
-            
-            # Update Redis metrics
-            if self.redis:
-                await self.redis.incr(f"kafka:produced:{topic}")
-                await self.redis.set(f"kafka:last_produced:{topic}", time.time())
-            
-            return True
-            
-        except KafkaError as e:
-            self.metrics['production_errors'] += 1
-            self.metrics['last_error'] = str(e)
-            logger.error(f"Failed to produce message to {topic}: {e}")
+        Returns:
+            List[ProduceResult]: One result per record, in the same order
+        """
+        deliveries = []
+        for record in records:
+            deliveries.append(await self.produce(
+                record.topic,
+                record.message,
+                key=record.key,
+                headers=record.headers
+            ))
+        
+        results = list(await asyncio.gather(*deliveries))
+        
+        failed = sum(1 for r in results if not r.success)
+        if failed:
+            logger.warning(f"Batch produce: {failed}/{len(results)} records failed")
+        
+        return results
+    
+    async def flush(self):
+        """Send any records still lingering in the producer buffer"""
+        if self.producer:
+            await self.producer.flush()
+    
+    def _build_headers(self, 
+                       message: KafkaMessage, 
+                       headers: Optional[Dict[str, str]] = None,
+                       content_type: Optional[str] = None) -> List[Tuple[str, bytes]]:
+        """Build Kafka headers for a message"""
+        kafka_headers = []
+        if headers:
+            kafka_headers.extend([(k, v.encode('utf-8')) for k, v in headers.items()])
+        
+        # Add default headers
+        kafka_headers.extend([(k, v.encode('utf-8')) for k, v in message_headers(message).items()])
+        if content_type:
+            kafka_headers.append((CONTENT_TYPE_HEADER, content_type.encode('utf-8')))
+        return kafka_headers
+    
+    def _completed_delivery(self, result: ProduceResult) -> 'asyncio.Future[ProduceResult]':
+        """Wrap an already known result in a future"""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(result)
+        return future
+    
+    async def _await_delivery(self, 
+                              send_future: 'asyncio.Future', 
+                              topic: str, 
+                              message_dict: Dict[str, Any],
+                              dead_letter: bool = True) -> ProduceResult:
+        """Wait for a queued record to be acknowledged and record the outcome"""
+        try:
+            record_metadata = await send_future
+        except Exception as e:
+            return await self._handle_produce_failure(topic, message_dict, e, dead_letter)
+        
+        self.metrics['messages_produced'] += 1
+        self._unflushed_produced[topic] = self._unflushed_produced.get(topic, 0) + 1
+        self.telemetry.record_produced(topic)
+        
+        logger.debug(f"Message sent to {topic} partition {record_metadata.partition} "
+                    f"offset {record_metadata.offset}")
+        
+        return ProduceResult(
+            topic=topic,
+            message_id=message_dict.get('id', ''),
+            success=True,
+            partition=record_metadata.partition,
+            offset=record_metadata.offset
+        )
+    
+    async def _handle_produce_failure(self, 
+                                      topic: str, 
+                                      message_dict: Dict[str, Any], 
+                                      error: Exception,
+                                      dead_letter: bool = True) -> ProduceResult:
+        """Record a failed produce and route the message to the DLQ"""
+        self.metrics['production_errors'] += 1
+        self.metrics['last_error'] = str(error)
+        
+        if isinstance(error, KafkaError):
+            logger.error(f"Failed to produce message to {topic}: {error}")
             
             # Try to send to DLQ
-            if topic != 'dlq.failed-messages':
-                await self._send_to_dlq(message_dict, topic, str(e))
-            
-            return False
+            if dead_letter and topic != DLQ_TOPIC:
+                await self._send_to_dlq(message_dict, topic, str(error), 
+                                        error_class=type(error).__name__)
+        else:
+            logger.error(f"Unexpected error producing message to {topic}: {error}")
+        
+        return ProduceResult(
+            topic=topic,
+            message_id=message_dict.get('id', ''),
+            success=False,
+            error=str(error)
+        )
+    
+    async def _flush_counters(self):
+        """Write pending per-topic produce/consume counters to Redis in one round-trip"""
+        if not self.redis or not (self._unflushed_produced or self._unflushed_consumed):
+            return
         
+        produced, self._unflushed_produced = self._unflushed_produced, {}
+        consumed, self._unflushed_consumed = self._unflushed_consumed, {}
+        try:
+            now = time.time()
+            pipe = self.redis.pipeline(transaction=False)
+            for topic, count in produced.items():
+                pipe.incrby(f"kafka:produced:{topic}", count)
+                pipe.set(f"kafka:last_produced:{topic}", now)
+            for topic, count in consumed.items():
+                pipe.incrby(f"kafka:consumed:{topic}", count)
+                pipe.set(f"kafka:last_consumed:{topic}", now)
+            await pipe.execute()
         except Exception as e:
-            self.metrics['production_errors'] += 1
-            self.metrics['last_error'] = str(e)
-            logger.error(f"Unexpected error producing message to {topic}: {e}")
-            return False
+            logger.error(f"Failed to update message counters in Redis: {e}")
+    
+    def _record_consumed(self, consumer_id: str, topic_counts: Dict[str, int], handler_ms: float):
+        """Count handled records for telemetry and the next Redis flush"""
+        group_id = self.consumer_groups.get(consumer_id, consumer_id)
+        for topic, count in topic_counts.items():
+            self._unflushed_consumed[topic] = self._unflushed_consumed.get(topic, 0) + count
+            self.telemetry.record_consumed(topic, group_id, count, handler_ms)
+    
+    def _record_failed(self, consumer_id: str, topic_counts: Dict[str, int]):
+        group_id = self.consumer_groups.get(consumer_id, consumer_id)
+        for topic, count in topic_counts.items():
+            self.telemetry.record_failed(topic, group_id, count)
     
     async def create_consumer(self, 
                             topics: List[str], 
                             group_id: str,
-                            message_handler: Callable[[KafkaMessage, Dict[str, Any]], Any],
+                            message_handler: Optional[Callable[[KafkaMessage, Dict[str, Any]], Any]] = None,
                             auto_offset_reset: str = 'latest',
-                            enable_auto_commit: bool = True) -> str:
+                            enable_auto_commit: bool = False,
+                            max_in_flight: int = 1,
+                            max_queue_size: int = 1000,
+                            batch_handler: Optional[Callable[[List[KafkaMessage], List[Dict[str, Any]]], Any]] = None,
+                            batch_size: int = 100,
+                            batch_max_wait_ms: int = 500,
+                            commit_every: int = 100,
+                            commit_interval_ms: int = 5000,
+                            retry_tiers: Optional[List[Tuple[str, int]]] = None,
+                            header_filter: Optional[Callable[[Dict[str, str]], bool]] = None) -> str:
         """
         Create and start a Kafka consumer
         
+        With message_handler, messages are dispatched to a pool of up to
+        max_in_flight concurrent handler invocations. Ordering is preserved per
+        message key (and per partition for unkeyed messages).
+        
+        With batch_handler, the handler instead receives lists of up to
+        batch_size messages (and their contexts), collected for at most
+        batch_max_wait_ms. Batches are handled one at a time, in offset order.
+        
+        Unless enable_auto_commit is set, offsets are committed only after the
+        handler has finished with a record (or it was parked in the DLQ), every
+        commit_every records or commit_interval_ms, on partition revocation and
+        on shutdown. A crash therefore redelivers at most the uncommitted window.
+        
+        A record whose handler fails is forwarded to the group's retry topics
+        (retry.{group_id}.{tier}), one tier per attempt, and handled again by a
+        companion consumer once its delay has passed. After the last tier it is
+        parked in the DLQ. Pass retry_tiers=[] to send failures straight to the DLQ.
+        
+        Messages are decoded lazily, on first access to their payload. A
+        header_filter sees each record's headers (type, source, message-id,
+        config-id, ...) first; records it rejects are committed without being
+        decoded or handed to the handler.
+        
         Args:
             topics: List of topics to subscribe to
             group_id: Consumer group ID
-            message_handler: Async function to handle messages
+            message_handler: Async function to handle single messages
             auto_offset_reset: Where to start reading ('earliest' or 'latest')
-            enable_auto_commit: Whether to auto-commit offsets
+            enable_auto_commit: Whether to auto-commit offsets instead of committing after handling
+            max_in_flight: Maximum number of concurrent handler invocations
+            max_queue_size: Dispatch queue depth at which partitions are paused
+            batch_handler: Async function to handle lists of messages
+            batch_size: Maximum number of messages per batch
+            batch_max_wait_ms: Maximum time to wait while filling a batch
+            commit_every: Commit after this many handled records
+            commit_interval_ms: Commit at least this often while records are handled
+            retry_tiers: (suffix, delay seconds) retry tiers, defaults to DEFAULT_RETRY_TIERS
+            header_filter: Predicate on record headers; False skips the record
             
         Returns:
             str: Consumer ID for tracking
         """
+        if (message_handler is None) == (batch_handler is None):
+            raise ValueError("Exactly one of message_handler or batch_handler is required")
+        
         consumer_id = f"{group_id}-{len(self.consumers)}"
+        retry_policy = RetryPolicy(group_id, DEFAULT_RETRY_TIERS if retry_tiers is None else retry_tiers)
+        if header_filter:
+            self.header_filters[consumer_id] = header_filter
         
         try:
-            consumer = AIOKafkaConsumer(
-                *topics,
-                bootstrap_servers=self.bootstrap_servers,
-                client_id=f"{self.client_id}-consumer-{consumer_id}",
-                group_id=group_id,
+            consumer, commit_manager = await self._start_consumer(
+                consumer_id,
+                group_id,
+                topics=topics,
                 auto_offset_reset=auto_offset_reset,
                 enable_auto_commit=enable_auto_commit,
-                value_deserializer=lambda m: json.loads(m.decode('utf-8')) if m else None,
-                key_deserializer=lambda k: k.decode('utf-8') if k else None,
-                max_poll_records=100,
-                session_timeout_ms=30000,
-                heartbeat_interval_ms=3000
+                max_poll_records=max(100, batch_size) if batch_handler else 100,
+                commit_every=commit_every,
+                commit_interval_ms=commit_interval_ms
             )
             
-            await consumer.start()
-            self.consumers[consumer_id] = consumer
+            if batch_handler:
+                stats = BatchConsumerStats(batch_size, batch_max_wait_ms)
+                self.batch_stats[consumer_id] = stats
+                self.consumer_tasks[consumer_id] = asyncio.create_task(
+                    self._consume_batches(consumer, consumer_id, batch_handler, stats, 
+                                          commit_manager, retry_policy)
+                )
+                logger.info(f"Batch consumer {consumer_id} started for topics {topics}")
+            else:
+                dispatcher = KeyedDispatcher(
+                    name=consumer_id,
+                    handler=partial(self._process_message, consumer_id=consumer_id, 
+                                    message_handler=message_handler, commit_manager=commit_manager,
+                                    retry_policy=retry_policy),
+                    max_in_flight=max_in_flight,
+                    max_queue_size=max_queue_size
+                )
+                dispatcher.start()
+                self.dispatchers[consumer_id] = dispatcher
+                
+                # Start message processing task
+                self.consumer_tasks[consumer_id] = asyncio.create_task(
+                    self._consume_messages(consumer, consumer_id, dispatcher, commit_manager)
+                )
+                logger.info(f"Consumer {consumer_id} started for topics {topics}")
             
-            # Start message processing task
-            asyncio.create_task(
-                self._consume_messages(consumer, consumer_id, message_handler)
+        except Exception as e:
+            logger.error(f"Failed to create consumer {consumer_id}: {e}")
+            raise
+        
+        if retry_policy.tiers:
+            await self._create_retry_consumer(
+                retry_policy,
+                message_handler=message_handler,
+                batch_handler=batch_handler,
+                batch_size=batch_size,
+                batch_max_wait_ms=batch_max_wait_ms,
+                enable_auto_commit=enable_auto_commit,
+                commit_every=commit_every,
+                commit_interval_ms=commit_interval_ms,
+                header_filter=header_filter
             )
+        
+        return consumer_id
+    
+    async def _start_consumer(self, 
+                              consumer_id: str, 
+                              group_id: str,
+                              topics: Optional[List[str]] = None,
+                              pattern: Optional[str] = None,
+                              auto_offset_reset: str = 'latest',
+                              enable_auto_commit: bool = False,
+                              max_poll_records: int = 100,
+                              commit_every: int = 100,
+                              commit_interval_ms: int = 5000,
+                              **consumer_options) -> Tuple[AIOKafkaConsumer, Optional[OffsetCommitManager]]:
+        """Start and subscribe an AIOKafkaConsumer, with manual commits unless auto-commit is on"""
+        consumer = AIOKafkaConsumer(
+            bootstrap_servers=self.bootstrap_servers,
+            client_id=f"{self.client_id}-consumer-{consumer_id}",
+            group_id=group_id,
+            auto_offset_reset=auto_offset_reset,
+            enable_auto_commit=enable_auto_commit,
+            key_deserializer=lambda k: k.decode('utf-8') if k else None,
+            max_poll_records=max_poll_records,
+            session_timeout_ms=30000,
+            heartbeat_interval_ms=3000,
+            **consumer_options
+        )
+        
+        await consumer.start()
+        self.consumers[consumer_id] = consumer
+        self.consumer_groups[consumer_id] = group_id
+        
+        subscription = {'topics': topics} if topics else {'pattern': pattern}
+        
+        commit_manager = None
+        if enable_auto_commit:
+            consumer.subscribe(**subscription)
+        else:
+            commit_manager = OffsetCommitManager(
+                consumer,
+                consumer_id,
+                commit_every=commit_every,
+                commit_interval_ms=commit_interval_ms
+            )
+            commit_manager.start()
+            self.commit_managers[consumer_id] = commit_manager
+            consumer.subscribe(**subscription, listener=CommitOnRevokeListener(commit_manager))
+        
+        return consumer, commit_manager
+    
+    async def _create_retry_consumer(self, 
+                                     retry_policy: RetryPolicy,
+                                     message_handler: Optional[Callable],
+                                     batch_handler: Optional[Callable],
+                                     batch_size: int,
+                                     batch_max_wait_ms: int,
+                                     enable_auto_commit: bool,
+                                     commit_every: int,
+                                     commit_interval_ms: int,
+                                     header_filter: Optional[Callable[[Dict[str, str]], bool]] = None) -> str:
+        """Start the companion consumer that re-runs a group's handler on its retry topics"""
+        retry_group_id = f"{retry_policy.group_id}.retry"
+        consumer_id = f"{retry_group_id}-{len(self.consumers)}"
+        if header_filter:
+            self.header_filters[consumer_id] = header_filter
+        
+        try:
+            # Retry topics are created on first use, so subscribe by pattern and
+            # refresh metadata often enough to pick them up quickly
+            consumer, commit_manager = await self._start_consumer(
+                consumer_id,
+                retry_group_id,
+                pattern=retry_policy.pattern(),
+                auto_offset_reset='earliest',
+                enable_auto_commit=enable_auto_commit,
+                max_poll_records=max(100, batch_size) if batch_handler else 100,
+                commit_every=commit_every,
+                commit_interval_ms=commit_interval_ms,
+                metadata_max_age_ms=30000
+            )
+            
+            stats = None
+            if batch_handler:
+                stats = BatchConsumerStats(batch_size, batch_max_wait_ms)
+                self.batch_stats[consumer_id] = stats
             
-            logger.info(f"Consumer {consumer_id} started for topics {topics}")
+            self.consumer_tasks[consumer_id] = asyncio.create_task(
+                self._consume_retries(consumer, consumer_id, retry_policy, message_handler,
+                                      batch_handler, stats, commit_manager)
+            )
+            
+            logger.info(f"Retry consumer {consumer_id} started for topics {retry_policy.topics()}")
             return consumer_id
             
         except Exception as e:
-            logger.error(f"Failed to create consumer {consumer_id}: {e}")
+            logger.error(f"Failed to create retry consumer {consumer_id}: {e}")
             raise
     
     async def _consume_messages(self, 
                               consumer: AIOKafkaConsumer, 
                               consumer_id: str,
-                              message_handler: Callable) -> None:
-        """Internal method to consume messages"""
+                              dispatcher: KeyedDispatcher,
+                              commit_manager: Optional[OffsetCommitManager] = None) -> None:
+        """Internal method to feed consumed messages to the dispatcher"""
         try:
             async for msg in consumer:
-                try:
-                    # Parse message
-                    if not msg.value:
-                        continue
-                    
-                    # Extract headers
-                    headers = {}
-                    if msg.headers:
-                        headers = {k: v.decode('utf-8') for k, v in msg.headers}
-                    
-                    # Create KafkaMessage object
-                    kafka_message = KafkaMessage(
-                        id=msg.value.get('id', ''),
-                        timestamp=msg.value.get('timestamp', ''),
-                        type=msg.value.get('type', ''),
-                        source=msg.value.get('source', ''),
-                        data=msg.value.get('data', {}),
-                        metadata=msg.value.get('metadata', {})
-                    )
-                    
-                    # Call message handler
-                    await message_handler(kafka_message, {
-                        'topic': msg.topic,
-                        'partition': msg.partition,
-                        'offset': msg.offset,
-                        'key': msg.key,
-                        'headers': headers,
-                        'timestamp': msg.timestamp
-                    })
-                    
-                    self.metrics['messages_consumed'] += 1
-                    
-                    # Update Redis metrics
-                    if self.redis:
-                        await self.redis.incr(f"kafka:consumed:{msg.topic}")
-                        await self.redis.set(f"kafka:last_consumed:{msg.topic}", time.time())
+                if commit_manager:
+                    commit_manager.track(TopicPartition(msg.topic, msg.partition), msg.offset)
+                
+                # Keyed messages are ordered per key, unkeyed ones per partition
+                routing_key = msg.key if msg.key is not None else (msg.topic, msg.partition)
+                dispatcher.submit(routing_key, msg)
+                
+                if dispatcher.is_full:
+                    # Backpressure: stop fetching until handlers catch up
+                    paused = consumer.assignment()
+                    consumer.pause(*paused)
+                    logger.debug(f"Consumer {consumer_id} paused: dispatch queue full")
                     
-                except Exception as e:
-                    self.metrics['consumption_errors'] += 1
-                    self.metrics['last_error'] = str(e)
-                    logger.error(f"Error processing message in consumer {consumer_id}: {e}")
+                    await dispatcher.wait_for_capacity()
                     
-                    # Send to DLQ if not already a DLQ message
-                    if msg.topic != 'dlq.failed-messages':
-                        await self._send_to_dlq(msg.value, msg.topic, str(e))
+                    consumer.resume(*(tp for tp in paused if tp in consumer.assignment()))
+                    logger.debug(f"Consumer {consumer_id} resumed")
                     
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Consumer {consumer_id} error: {e}")
         finally:
             logger.info(f"Consumer {consumer_id} stopped")
     
-    async def _send_to_dlq(self, message_data: Dict[str, Any], original_topic: str, error: str):
+    def _to_kafka_message(self, msg: Any) -> Tuple[KafkaMessage, Dict[str, Any]]:
+        """Wrap a consumed record in a lazily decoded KafkaMessage and build its handler context"""
+        headers = self._record_headers(msg)
+        kafka_message = LazyKafkaMessage(msg.value, headers.get(CONTENT_TYPE_HEADER), self.codecs, headers)
+        
+        context = {
+            'topic': msg.topic,
+            'partition': msg.partition,
+            'offset': msg.offset,
+            'key': msg.key,
+            'headers': headers,
+            'timestamp': msg.timestamp,
+            'original_topic': headers.get(ORIGINAL_TOPIC_HEADER, msg.topic),
+            'attempt': int(headers.get(ATTEMPT_HEADER, 0))
+        }
+        return kafka_message, context
+    
+    @staticmethod
+    def _record_headers(msg: Any) -> Dict[str, str]:
+        """Decode a consumed record's headers"""
+        if not msg.headers:
+            return {}
+        return {k: v.decode('utf-8') for k, v in msg.headers}
+    
+    def _skip_record(self, msg: Any, consumer_id: str) -> bool:
+        """Whether the consumer's header filter rejects a record"""
+        header_filter = self.header_filters.get(consumer_id)
+        if header_filter is None:
+            return False
+        
+        try:
+            skip = not header_filter(self._record_headers(msg))
+        except Exception as e:
+            logger.error(f"Header filter of consumer {consumer_id} failed: {e}")
+            return False
+        
+        if skip:
+            self.metrics['messages_filtered'] += 1
+        return skip
+    
+    def _dlq_payload(self, msg: Any) -> Any:
+        """Best-effort decoded value of a failed record for the DLQ"""
+        content_type = self._record_headers(msg).get(CONTENT_TYPE_HEADER)
+        try:
+            return self.codecs.decode(msg.value, content_type)
+        except CodecError:
+            # Undecodable payloads are kept verbatim so they can be inspected
+            return {'undecodable': msg.value.hex(), 'content_type': content_type}
+    
+    async def _process_message(self, 
+                               msg: Any, 
+                               consumer_id: str,
+                               message_handler: Callable,
+                               commit_manager: Optional[OffsetCommitManager] = None,
+                               retry_policy: Optional[RetryPolicy] = None) -> None:
+        """Run the message handler for a single consumed record"""
+        handled = False
+        try:
+            # Empty and filtered-out records need no handling
+            if not msg.value or self._skip_record(msg, consumer_id):
+                handled = True
+                return
+            
+            kafka_message, context = self._to_kafka_message(msg)
+            
+            # Call message handler
+            start = time.perf_counter()
+            await message_handler(kafka_message, context)
+            handled = True
+            
+            self.metrics['messages_consumed'] += 1
+            self._record_consumed(consumer_id, {msg.topic: 1}, (time.perf_counter() - start) * 1000)
+            
+        except Exception as e:
+            self.metrics['consumption_errors'] += 1
+            self._record_failed(consumer_id, {msg.topic: 1})
+            self.metrics['last_error'] = str(e)
+            logger.error(f"Error processing message in consumer {consumer_id}: {e}")
+            
+            # Only a message that was forwarded for retry or parked counts as handled
+            handled = await self._park_failure(msg, e, consumer_id, retry_policy)
+        finally:
+            if commit_manager and handled:
+                commit_manager.ack(TopicPartition(msg.topic, msg.partition), msg.offset)
+    
+    async def _consume_batches(self, 
+                               consumer: AIOKafkaConsumer, 
+                               consumer_id: str,
+                               batch_handler: Callable,
+                               stats: BatchConsumerStats,
+                               commit_manager: Optional[OffsetCommitManager] = None,
+                               retry_policy: Optional[RetryPolicy] = None) -> None:
+        """Internal method to consume messages in batches"""
+        try:
+            while True:
+                fetch_start = time.perf_counter()
+                records = await self._fetch_batch(consumer, stats.batch_size, stats.max_wait_ms)
+                if not records:
+                    continue
+                
+                stats.fetch_wait_ms.observe((time.perf_counter() - fetch_start) * 1000)
+                await self._process_batch(records, consumer_id, batch_handler, stats, 
+                                          commit_manager, retry_policy)
+                
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Batch consumer {consumer_id} error: {e}")
+        finally:
+            logger.info(f"Batch consumer {consumer_id} stopped")
+    
+    async def _consume_retries(self, 
+                               consumer: AIOKafkaConsumer, 
+                               consumer_id: str,
+                               retry_policy: RetryPolicy,
+                               message_handler: Optional[Callable],
+                               batch_handler: Optional[Callable],
+                               stats: Optional[BatchConsumerStats],
+                               commit_manager: Optional[OffsetCommitManager] = None) -> None:
+        """
+        Re-run the handler for records on a group's retry topics once they are due
+        
+        Records on one retry partition share a delay, so they become due in order.
+        When the head of a partition is not due yet, the consumer seeks back to it
+        and pauses the partition until its x-not-before time.
+        """
+        loop = asyncio.get_running_loop()
+        
+        try:
+            while True:
+                fetched = await consumer.getmany(timeout_ms=1000, max_records=100)
+                now_ms = time.time() * 1000
+                
+                due = []
+                for tp, records in fetched.items():
+                    for record in records:
+                        not_before_ms = int(self._record_headers(record).get(NOT_BEFORE_HEADER, 0))
+                        if not_before_ms > now_ms:
+                            consumer.seek(tp, record.offset)
+                            consumer.pause(tp)
+                            loop.call_later((not_before_ms - now_ms) / 1000, 
+                                            self._resume_partition, consumer, tp)
+                            break
+                        due.append(record)
+                
+                if not due:
+                    continue
+                
+                if batch_handler:
+                    await self._process_batch(due, consumer_id, batch_handler, stats, 
+                                              commit_manager, retry_policy)
+                    continue
+                
+                for record in due:
+                    if commit_manager:
+                        commit_manager.track(TopicPartition(record.topic, record.partition), record.offset)
+                    await self._process_message(record, consumer_id, message_handler, 
+                                                commit_manager, retry_policy)
+                
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Retry consumer {consumer_id} error: {e}")
+        finally:
+            logger.info(f"Retry consumer {consumer_id} stopped")
+    
+    @staticmethod
+    def _resume_partition(consumer: AIOKafkaConsumer, tp: TopicPartition):
+        """Resume a delayed retry partition if this consumer still owns it"""
+        try:
+            if tp in consumer.assignment():
+                consumer.resume(tp)
+        except Exception as e:
+            logger.debug(f"Could not resume {tp}: {e}")
+    
+    async def _fetch_batch(self, 
+                           consumer: AIOKafkaConsumer, 
+                           batch_size: int, 
+                           max_wait_ms: int) -> List[Any]:
+        """Collect up to batch_size records, waiting at most max_wait_ms"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait_ms / 1000
+        records: List[Any] = []
+        
+        while len(records) < batch_size:
+            remaining_ms = int((deadline - loop.time()) * 1000)
+            if remaining_ms <= 0:
+                break
+            
+            fetched = await consumer.getmany(
+                timeout_ms=remaining_ms,
+                max_records=batch_size - len(records)
+            )
+            for partition_records in fetched.values():
+                records.extend(partition_records)
+        
+        return records
+    
+    async def _process_batch(self, 
+                             records: List[Any], 
+                             consumer_id: str,
+                             batch_handler: Callable,
+                             stats: BatchConsumerStats,
+                             commit_manager: Optional[OffsetCommitManager] = None,
+                             retry_policy: Optional[RetryPolicy] = None) -> None:
+        """Run the batch handler for a list of consumed records"""
+        if commit_manager:
+            for record in records:
+                commit_manager.track(TopicPartition(record.topic, record.partition), record.offset)
+        
+        # Empty and filtered-out records need no handling
+        kept = []
+        for record in records:
+            if record.value and not self._skip_record(record, consumer_id):
+                kept.append(record)
+            elif commit_manager:
+                commit_manager.ack(TopicPartition(record.topic, record.partition), record.offset)
+        
+        records = kept
+        if not records:
+            return
+        
+        messages = []
+        contexts = []
+        for record in records:
+            kafka_message, context = self._to_kafka_message(record)
+            messages.append(kafka_message)
+            contexts.append(context)
+        
+        stats.size.observe(len(messages))
+        topic_counts: Dict[str, int] = {}
+        for record in records:
+            topic_counts[record.topic] = topic_counts.get(record.topic, 0) + 1
+        start = time.perf_counter()
+        
+        try:
+            await batch_handler(messages, contexts)
+        except Exception as e:
+            stats.batches_failed += 1
+            self.metrics['consumption_errors'] += len(records)
+            self._record_failed(consumer_id, topic_counts)
+            self.metrics['last_error'] = str(e)
+            logger.error(f"Error processing batch of {len(records)} in consumer {consumer_id}: {e}")
+            
+            for record in records:
+                parked = await self._park_failure(record, e, consumer_id, retry_policy)
+                if commit_manager and parked:
+                    commit_manager.ack(TopicPartition(record.topic, record.partition), record.offset)
+            return
+        finally:
+            stats.handler_latency_ms.observe((time.perf_counter() - start) * 1000)
+        
+        if commit_manager:
+            for record in records:
+                commit_manager.ack(TopicPartition(record.topic, record.partition), record.offset)
+        
+        self.metrics['messages_consumed'] += len(messages)
+        self._record_consumed(consumer_id, topic_counts, (time.perf_counter() - start) * 1000)
+    
+    async def _park_failure(self, 
+                            msg: Any, 
+                            error: Exception, 
+                            consumer_id: str,
+                            retry_policy: Optional[RetryPolicy] = None) -> bool:
+        """
+        Route a failed record, retrying with backoff until it is parked
+        
+        An unparked record would hold back its partition's commit position for
+        good, so the consumer stays on it, marked stalled in health_check,
+        instead of moving on. Only a stopping client gives up; the record is
+        then redelivered after the restart.
+        
+        Returns:
+            bool: True if the record is safely parked and its offset may be committed
+        """
+        delay, max_delay = PARK_BACKOFF
+        while True:
+            if await self._route_failure(msg, error, retry_policy):
+                self.stalled_consumers.discard(consumer_id)
+                return True
+            
+            if not self.running:
+                return False
+            
+            self.stalled_consumers.add(consumer_id)
+            self.metrics['park_retries'] += 1
+            logger.warning(f"Consumer {consumer_id} could not park {msg.topic}[{msg.partition}]@{msg.offset}, "
+                           f"retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+    
+    async def _route_failure(self, 
+                             msg: Any, 
+                             error: Exception, 
+                             retry_policy: Optional[RetryPolicy] = None) -> bool:
+        """
+        Forward a record whose handler failed to its next retry tier, or to the DLQ
+        
+        Returns:
+            bool: True if the record is safely parked and its offset may be committed
+        """
+        # Failed DLQ messages are dropped as before rather than stalling commits
+        if msg.topic == DLQ_TOPIC:
+            return True
+        
+        headers = self._record_headers(msg)
+        attempt = int(headers.get(ATTEMPT_HEADER, 0)) + 1
+        original_topic = headers.get(ORIGINAL_TOPIC_HEADER, msg.topic)
+        
+        tier = retry_policy.tier_for(attempt) if retry_policy else None
+        if tier:
+            retry_topic, delay = tier
+            return await self._send_to_retry(msg, retry_topic, delay, attempt, 
+                                             original_topic, error, retry_policy.group_id)
+        
+        return await self._send_to_dlq(
+            self._dlq_payload(msg), 
+            original_topic, 
+            str(error),
+            error_class=type(error).__name__,
+            attempts=attempt,
+            consumer_group=retry_policy.group_id if retry_policy else None
+        )
+    
+    async def retry_message(self, 
+                            message: KafkaMessage, 
+                            context: Dict[str, Any], 
+                            error: Exception,
+                            group_id: str,
+                            retry_tiers: Optional[List[Tuple[str, int]]] = None,
+                            headers: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Send an already decoded message to its group's next retry tier, or to the DLQ
+        
+        For handlers that catch their own failures (such as the topic router)
+        instead of failing the whole record.
+        
+        Args:
+            message: Message whose handling failed
+            context: Handler context the message was delivered with
+            error: The handler's exception
+            group_id: Consumer group whose retry topics to use
+            retry_tiers: Retry tiers, defaults to DEFAULT_RETRY_TIERS
+            headers: Extra headers for the retried record
+            
+        Returns:
+            bool: True if the message was parked on a retry topic or the DLQ
+        """
+        retry_policy = RetryPolicy(group_id, DEFAULT_RETRY_TIERS if retry_tiers is None else retry_tiers)
+        attempt = context.get('attempt', 0) + 1
+        original_topic = context.get('original_topic', context['topic'])
+        
+        tier = retry_policy.tier_for(attempt)
+        if tier is None:
+            return await self._send_to_dlq(asdict(message), original_topic, str(error),
+                                           error_class=type(error).__name__,
+                                           attempts=attempt, consumer_group=group_id)
+        
+        retry_topic, delay = tier
+        retry_headers = dict(headers or {})
+        retry_headers.update({
+            ATTEMPT_HEADER: str(attempt),
+            ORIGINAL_TOPIC_HEADER: original_topic,
+            NOT_BEFORE_HEADER: str(int((time.time() + delay) * 1000)),
+            ERROR_CLASS_HEADER: type(error).__name__,
+            ERROR_HEADER: str(error)[:1000],
+            CONSUMER_GROUP_HEADER: group_id
+        })
+        
+        # A failed retry produce is left to the caller, which must not also find the message dead-lettered
+        scheduled = await self.produce_message(retry_topic, message, key=context.get('key'), 
+                                               headers=retry_headers, dead_letter=False)
+        if scheduled:
+            self.metrics['retries_scheduled'] += 1
+        return scheduled
+    
+    async def _send_to_retry(self, 
+                             msg: Any, 
+                             retry_topic: str, 
+                             delay: int, 
+                             attempt: int,
+                             original_topic: str, 
+                             error: Exception, 
+                             group_id: str) -> bool:
+        """Copy a failed record, unchanged, to a retry topic with its attempt headers"""
+        not_before_ms = int((time.time() + delay) * 1000)
+        headers = [(k, v) for k, v in (msg.headers or ()) if k not in RETRY_HEADERS]
+        headers.extend([
+            (ATTEMPT_HEADER, str(attempt).encode('utf-8')),
+            (ORIGINAL_TOPIC_HEADER, original_topic.encode('utf-8')),
+            (NOT_BEFORE_HEADER, str(not_before_ms).encode('utf-8')),
+            (ERROR_CLASS_HEADER, type(error).__name__.encode('utf-8')),
+            (ERROR_HEADER, str(error)[:1000].encode('utf-8')),
+            (CONSUMER_GROUP_HEADER, group_id.encode('utf-8'))
+        ])
+        
+        try:
+            send_future = await self.producer.send(
+                topic=retry_topic,
+                value=msg.value,
+                key=msg.key,
+                headers=headers
+            )
+            await send_future
+            
+            self.metrics['retries_scheduled'] += 1
+            logger.info(f"Scheduled retry {attempt} of {original_topic} message on {retry_topic} in {delay}s")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to schedule retry on {retry_topic}: {e}")
+            return False
+    
+    async def _send_to_dlq(self, 
+                           message_data: Dict[str, Any], 
+                           original_topic: str, 
+                           error: str,
+                           error_class: Optional[str] = None,
+                           attempts: int = 0,
+                           consumer_group: Optional[str] = None) -> bool:
         """Send failed message to Dead Letter Queue"""
         try:
+            failed_at = datetime.now(timezone.utc).isoformat()
             dlq_message = KafkaMessage(
-                id=f"dlq-{time.time()}",
-                timestamp=datetime.now(timezone.utc).isoformat(),
+                id=f"dlq-{uuid.uuid4()}",
+                timestamp=failed_at,
                 type="dlq_message",
                 source="kafka_client",
                 data={
                     'original_message': message_data,
                     'original_topic': original_topic,
                     'error': error,
-                    'failed_at': datetime.now(timezone.utc).isoformat()
+                    'error_class': error_class,
+                    'attempts': attempts,
+                    'consumer_group': consumer_group,
+                    'failed_at': failed_at
                 }
             )
             
-            await self.produce_message('dlq.failed-messages', dlq_message)
+            # Filterable without decoding the payload
+            headers = {ORIGINAL_TOPIC_HEADER: original_topic}
+            if error_class:
+                headers[ERROR_CLASS_HEADER] = error_class
+            if consumer_group:
+                headers[CONSUMER_GROUP_HEADER] = consumer_group
+            
+            parked = await self.produce_message(DLQ_TOPIC, dlq_message, headers=headers)
+            if parked:
+                self.metrics['dead_lettered'] += 1
+            return parked
             
         except Exception as e:
             logger.error(f"Failed to send message to DLQ: {e}")
+            return False
     
     async def _report_metrics(self):
         """Periodically report metrics to Redis and logs"""
@@ -320,6 +1718,8 @@ class KafkaClient:
             try:
                 await asyncio.sleep(60)  # Report every minute
                 
+                await self._flush_counters()
+                
                 if self.redis:
                     # Store current metrics in Redis
                     metrics_key = f"kafka:metrics:{int(time.time())}"
@@ -331,6 +1731,62 @@ class KafkaClient:
             except Exception as e:
                 logger.error(f"Error reporting metrics: {e}")
     
+    async def _report_telemetry(self):
+        """Periodically measure consumer lag and hand per-topic telemetry to the writer"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.telemetry_interval)
+                
+                self.consumer_lag = await self.measure_lag()
+                self._emit_telemetry(self.consumer_lag)
+                await self._flush_counters()
+                
+            except Exception as e:
+                logger.error(f"Error reporting telemetry: {e}")
+    
+    def _emit_telemetry(self, lag: Dict[str, Dict[str, Dict[int, int]]]):
+        """Close the current telemetry window and queue its rows"""
+        window, self.telemetry = self.telemetry, QueueTelemetry()
+        if self.metrics_writer:
+            self.metrics_writer.add(window.to_rows(lag, self.client_id))
+    
+    async def measure_lag(self) -> Dict[str, Dict[str, Dict[int, int]]]:
+        """
+        Consumer lag from the brokers' end offsets
+        
+        Lag is end offset minus committed offset, so records fetched but not
+        yet committed still count. One ListOffsets request per consumer.
+        
+        Returns:
+            Dict: Lag by consumer group, then topic, then partition
+        """
+        lag: Dict[str, Dict[str, Dict[int, int]]] = {}
+        
+        for consumer_id, consumer in list(self.consumers.items()):
+            assigned = list(consumer.assignment())
+            if not assigned:
+                continue
+            
+            try:
+                end_offsets = await consumer.end_offsets(assigned)
+                commit_manager = self.commit_managers.get(consumer_id)
+                group_lag = lag.setdefault(self.consumer_groups.get(consumer_id, consumer_id), {})
+                
+                for tp in assigned:
+                    committed = commit_manager.committed_offset(tp) if commit_manager else None
+                    if committed is None:
+                        committed = await consumer.committed(tp)
+                    if committed is None:
+                        # Nothing committed yet; measure from where the consumer will read
+                        committed = await consumer.position(tp)
+                    
+                    group_lag.setdefault(tp.topic, {})[tp.partition] = max(0, end_offsets[tp] - committed)
+                    
+            except Exception as e:
+                logger.error(f"Failed to measure lag for consumer {consumer_id}: {e}")
+        
+        return lag
+    
     async def get_topic_metadata(self, topic: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a specific topic"""
         if not self.producer:
@@ -368,9 +1824,26 @@ class KafkaClient:
             'producer_connected': bool(self.producer and not self.producer._closed),
             'consumers_count': len(self.consumers),
             'redis_connected': False,
-            'metrics': self.metrics.copy()
+            'metrics': self.metrics.copy(),
+            'dispatchers': {
+                consumer_id: dispatcher.stats()
+                for consumer_id, dispatcher in self.dispatchers.items()
+            },
+            'batch_consumers': {
+                consumer_id: stats.stats()
+                for consumer_id, stats in self.batch_stats.items()
+            },
+            'commit_managers': {
+                consumer_id: commit_manager.stats()
+                for consumer_id, commit_manager in self.commit_managers.items()
+            },
+            'consumer_lag': self.consumer_lag,
+            'stalled_consumers': sorted(self.stalled_consumers)
         }
         
+        if self.metrics_writer:
+            health['queue_metrics_writer'] = self.metrics_writer.stats()
+        
         # Check Redis connection
         if self.redis:
             try:
@@ -383,43 +1856,99 @@ class KafkaClient:
         if self.metrics['production_errors'] > 10 or self.metrics['consumption_errors'] > 10:
             health['status'] = 'degraded'
         
-        if not health['producer_connected'] or not health['redis_connected']:
+        if not health['producer_connected'] or not health['redis_connected'] or self.stalled_consumers:
             health['status'] = 'unhealthy'
         
         return health
 
+def create_kafka_client(bootstrap_servers: str = "localhost:29092",
+                        redis_url: str = "redis://localhost:6379",
+                        client_id: str = "techscaniq-monitoring",
+                        **options) -> KafkaClient:
+    """
+    Build the streaming client for a bootstrap string
+    
+    A memory://<name> bootstrap string selects the in-process InMemoryBus;
+    every component configured with the same name shares its topics.
+    """
+    if bootstrap_servers.startswith('memory://'):
+        from streaming.in_memory_bus import InMemoryBus
+        return InMemoryBus(bootstrap_servers=bootstrap_servers, redis_url=redis_url,
+                           client_id=client_id, **options)
+    
+    return KafkaClient(bootstrap_servers=bootstrap_servers, redis_url=redis_url,
+                       client_id=client_id, **options)
+
 # Convenience functions for common operations
 
-async def create_scan_scheduled_message(config_id: str, url: str, scan_config: Dict[str, Any]) -> KafkaMessage:
-    """Create a scan.scheduled message"""
+async def create_scan_scheduled_message(config_id: str, url: str, scan_config: Dict[str, Any], 
+                                      planned_at: Optional[datetime] = None,
+                                      priority: Optional[str] = None,
+                                      queue_wait_ms: Optional[float] = None,
+                                      config_ids: Optional[List[str]] = None,
+                                      job_id: Optional[str] = None) -> KafkaMessage:
+    """
+    Create a scan.scheduled message
+    
+    planned_at is the nominal schedule time before any spread; priority and
+    queue_wait_ms record the lane the scan was dispatched from and how long it
+    waited in the pipeline's fair queue. config_ids lists every config a
+    coalesced scan serves, config_id first. job_id identifies the scan and is
+    to be echoed in its scan.completed, which the pipeline's fan-out needs.
+    """
+    data = {
+        'config_id': config_id,
+        'url': url,
+        'scan_config': scan_config,
+        'scheduled_at': datetime.now(timezone.utc).isoformat()
+    }
+    if planned_at:
+        data['planned_at'] = planned_at.isoformat()
+    if priority:
+        data['priority'] = priority
+    if queue_wait_ms is not None:
+        data['queue_wait_ms'] = round(queue_wait_ms, 3)
+    if config_ids:
+        data['config_ids'] = config_ids
+    if job_id:
+        data['job_id'] = job_id
+    
     return KafkaMessage(
         id=f"scan-{config_id}-{int(time.time())}",
         timestamp=datetime.now(timezone.utc).isoformat(),
         type="scan_scheduled",
         source="scheduler",
-        data={
-            'config_id': config_id,
-            'url': url,
-            'scan_config': scan_config,
-            'scheduled_at': datetime.now(timezone.utc).isoformat()
-        }
+        data=data
     )
 
 async def create_scan_completed_message(config_id: str, scan_id: str, result_summary: Dict[str, Any], 
-                                      full_result_url: Optional[str] = None) -> KafkaMessage:
-    """Create a scan.completed message"""
+                                      full_result_url: Optional[str] = None,
+                                      claim_check: Optional[ClaimCheck] = None,
+                                      job_id: Optional[str] = None) -> KafkaMessage:
+    """
+    Create a scan.completed message, offloading a large summary when a claim check is given
+    
+    job_id is the one the scan was scheduled with in scan.scheduled.
+    """
+    if claim_check:
+        result_summary = await claim_check.offload(result_summary)
+    
+    data = {
+        'config_id': config_id,
+        'scan_id': scan_id,
+        'result_summary': result_summary,
+        'full_result_url': full_result_url,
+        'completed_at': datetime.now(timezone.utc).isoformat()
+    }
+    if job_id:
+        data['job_id'] = job_id
+    
     return KafkaMessage(
         id=scan_id,
         timestamp=datetime.now(timezone.utc).isoformat(),
         type="scan_completed",
         source="scanner",
-        data={
-            'config_id': config_id,
-            'scan_id': scan_id,
-            'result_summary': result_summary,
-            'full_result_url': full_result_url,
-            'completed_at': datetime.now(timezone.utc).isoformat()
-        }
+        data=data
     )
 
 async def create_change_detected_message(config_id: str, change_type: str, 
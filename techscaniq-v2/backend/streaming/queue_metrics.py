@@ -0,0 +1,186 @@
+"""
+Queue metrics writer for the TechScanIQ monitoring pipeline
+Buffers per-topic consumer telemetry and flushes it into the TimescaleDB queue_metrics hypertable
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+QUEUE_METRICS_COLUMNS = [
+    'time',
+    'queue_name',
+    'consumer_group',
+    'client_id',
+    'messages_produced',
+    'messages_consumed',
+    'messages_failed',
+    'queue_depth',
+    'max_partition_lag',
+    'partition_lag',
+    'average_processing_time_ms',
+    'p50_processing_time_ms',
+    'p95_processing_time_ms',
+    'p99_processing_time_ms',
+    'throughput_per_second'
+]
+
+@dataclass
+class QueueMetricsRow:
+    """One reporting interval for a topic, per consumer group (None for producer-side counts)"""
+    time: datetime
+    queue_name: str
+    consumer_group: Optional[str] = None
+    client_id: Optional[str] = None
+    messages_produced: int = 0
+    messages_consumed: int = 0
+    messages_failed: int = 0
+    queue_depth: int = 0
+    max_partition_lag: int = 0
+    partition_lag: Dict[str, int] = field(default_factory=dict)
+    average_processing_time_ms: Optional[float] = None
+    p50_processing_time_ms: Optional[float] = None
+    p95_processing_time_ms: Optional[float] = None
+    p99_processing_time_ms: Optional[float] = None
+    throughput_per_second: Optional[float] = None
+    
+    def to_record(self) -> tuple:
+        values = []
+        for column in QUEUE_METRICS_COLUMNS:
+            value = getattr(self, column)
+            values.append(json.dumps(value) if column == 'partition_lag' else value)
+        return tuple(values)
+
+class QueueMetricsWriter:
+    """
+    Buffered writer for the queue_metrics hypertable
+    
+    Rows are queued in memory and copied to the database in one round-trip
+    every flush interval, or sooner once the buffer fills. If the metrics
+    database is unavailable, rows are kept (up to max_buffer, oldest dropped
+    first) and retried on the next flush, so telemetry never blocks consumers.
+    """
+    
+    def __init__(self,
+                 db_url: str,
+                 flush_interval: float = 30.0,
+                 flush_size: int = 500,
+                 max_buffer: int = 10000):
+        self.db_url = db_url
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        
+        self.pool: Optional[asyncpg.Pool] = None
+        self.buffer: deque = deque(maxlen=max_buffer)
+        self.running = False
+        
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.metrics = {
+            'rows_buffered': 0,
+            'rows_written': 0,
+            'rows_dropped': 0,
+            'flushes': 0,
+            'flush_failures': 0,
+            'last_flush_at': None
+        }
+    
+    async def start(self):
+        """Connect to the metrics database and start periodic flushing"""
+        try:
+            self.pool = await asyncpg.create_pool(self.db_url, min_size=1, max_size=2, command_timeout=30)
+            self.running = True
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+            logger.info("Queue metrics writer started")
+        except Exception as e:
+            logger.error(f"Failed to start queue metrics writer: {e}")
+            raise
+    
+    async def stop(self):
+        """Flush what is buffered and close the pool"""
+        self.running = False
+        
+        for task in (self._flush_task, self._pending_flush):
+            if task and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        
+        await self.flush()
+        
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        logger.info("Queue metrics writer stopped")
+    
+    def add(self, rows: List[QueueMetricsRow]):
+        """Queue rows for the next flush"""
+        overflow = max(0, len(self.buffer) + len(rows) - self.buffer.maxlen)
+        if overflow:
+            self.metrics['rows_dropped'] += overflow
+        
+        self.buffer.extend(rows)
+        self.metrics['rows_buffered'] += len(rows)
+        
+        if len(self.buffer) >= self.flush_size and self.running and (
+                self._pending_flush is None or self._pending_flush.done()):
+            self._pending_flush = asyncio.create_task(self.flush())
+    
+    async def flush(self) -> int:
+        """Copy buffered rows to queue_metrics, returning how many were written"""
+        async with self._flush_lock:
+            if not self.buffer or not self.pool:
+                return 0
+            
+            rows = list(self.buffer)
+            self.buffer.clear()
+            
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.copy_records_to_table(
+                        'queue_metrics',
+                        records=[row.to_record() for row in rows],
+                        columns=QUEUE_METRICS_COLUMNS
+                    )
+                
+                self.metrics['rows_written'] += len(rows)
+                self.metrics['flushes'] += 1
+                self.metrics['last_flush_at'] = rows[-1].time.isoformat()
+                return len(rows)
+            
+            except Exception as e:
+                self.metrics['flush_failures'] += 1
+                logger.error(f"Failed to write {len(rows)} queue metrics rows: {e}")
+                
+                # Put the rows back in front of anything added meanwhile, dropping the oldest that no longer fit
+                overflow = max(0, len(rows) + len(self.buffer) - self.buffer.maxlen)
+                self.metrics['rows_dropped'] += overflow
+                self.buffer.extendleft(reversed(rows[overflow:]))
+                return 0
+    
+    async def _flush_periodically(self):
+        """Flush on a fixed interval"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error flushing queue metrics: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'buffered': len(self.buffer),
+            **self.metrics
+        }
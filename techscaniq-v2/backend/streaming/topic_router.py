@@ -0,0 +1,274 @@
+"""
+Topic router for the TechScanIQ monitoring pipeline
+Consumes each topic once per consumer group and fans decoded messages out to in-process handlers
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from streaming.kafka_client import PARK_BACKOFF, KafkaClient, KafkaMessage, LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# Handlers a retried record is meant for; the others already succeeded
+TARGET_HANDLERS_HEADER = 'x-target-handlers'
+
+@dataclass
+class Route:
+    """A handler registered for a topic"""
+    name: str
+    topic: str
+    message_handler: Optional[Callable[[KafkaMessage, Dict[str, Any]], Any]] = None
+    batch_handler: Optional[Callable[[List[KafkaMessage], List[Dict[str, Any]]], Any]] = None
+    max_in_flight: int = 1
+    header_filter: Optional[Callable[[Dict[str, str]], bool]] = None
+    latency: LatencyTracker = field(default_factory=LatencyTracker)
+    metrics: Dict[str, int] = field(default_factory=lambda: {'delivered': 0, 'failed': 0, 'filtered': 0})
+
+class TopicRouter:
+    """
+    Shares one consumer group across every in-process handler of a topic
+    
+    Each record is fetched and decoded once, then handed to every route
+    registered for its topic. Message handlers keep per-key ordering with up to
+    max_in_flight keys in parallel; batch handlers receive the topic's slice of
+    each batch. When some handlers fail, the record is sent to the group's
+    retry tiers tagged with just those handlers, so the ones that succeeded do
+    not run again. Handlers share the decoded message and must not mutate it.
+    
+    Messages are decoded lazily, so a record is only decoded if some handler
+    reads its payload; a route's header_filter can skip records by their
+    headers (type, source, config-id) before that happens.
+    """
+    
+    def __init__(self,
+                 kafka: KafkaClient,
+                 group_id: str,
+                 batch_size: int = 100,
+                 batch_max_wait_ms: int = 250,
+                 auto_offset_reset: str = 'latest',
+                 retry_tiers: Optional[List[Tuple[str, int]]] = None):
+        self.kafka = kafka
+        self.group_id = group_id
+        self.batch_size = batch_size
+        self.batch_max_wait_ms = batch_max_wait_ms
+        self.auto_offset_reset = auto_offset_reset
+        self.retry_tiers = retry_tiers
+        
+        self.routes: Dict[str, List[Route]] = {}
+        self.consumer_id: Optional[str] = None
+        
+        # Set while a failed message cannot be parked on the retry tiers
+        self.stalled = False
+        
+        # Metrics
+        self.metrics = {
+            'batches': 0,
+            'messages': 0,
+            'retries_scheduled': 0,
+            'retry_failures': 0
+        }
+    
+    def register(self,
+                 topic: str,
+                 name: str,
+                 message_handler: Optional[Callable[[KafkaMessage, Dict[str, Any]], Any]] = None,
+                 batch_handler: Optional[Callable[[List[KafkaMessage], List[Dict[str, Any]]], Any]] = None,
+                 max_in_flight: int = 1,
+                 header_filter: Optional[Callable[[Dict[str, str]], bool]] = None):
+        """
+        Register a handler for a topic
+        
+        Args:
+            topic: Topic to route
+            name: Unique handler name, used to target retries
+            message_handler: Async function called per message
+            batch_handler: Async function called with this topic's messages of each batch
+            max_in_flight: Keys handled concurrently by a message handler
+            header_filter: Predicate on record headers; False skips the record for this handler
+        """
+        if (message_handler is None) == (batch_handler is None):
+            raise ValueError("Exactly one of message_handler or batch_handler is required")
+        if self.consumer_id is not None:
+            raise RuntimeError(f"Router {self.group_id} is already consuming; register handlers before start()")
+        if any(route.name == name for routes in self.routes.values() for route in routes):
+            raise ValueError(f"Handler name '{name}' is already registered")
+        
+        self.routes.setdefault(topic, []).append(Route(
+            name=name,
+            topic=topic,
+            message_handler=message_handler,
+            batch_handler=batch_handler,
+            max_in_flight=max(1, max_in_flight),
+            header_filter=header_filter
+        ))
+        logger.info(f"Router {self.group_id}: {name} registered for {topic}")
+    
+    async def start(self):
+        """Start one consumer for all registered topics"""
+        if not self.routes:
+            logger.warning(f"Router {self.group_id} has no routes; not consuming")
+            return
+        
+        self.consumer_id = await self.kafka.create_consumer(
+            topics=sorted(self.routes),
+            group_id=self.group_id,
+            batch_handler=self._dispatch,
+            batch_size=self.batch_size,
+            batch_max_wait_ms=self.batch_max_wait_ms,
+            auto_offset_reset=self.auto_offset_reset,
+            retry_tiers=self.retry_tiers
+        )
+    
+    async def _dispatch(self, messages: List[KafkaMessage], contexts: List[Dict[str, Any]]):
+        """Fan a consumed batch out to the routes of each message's topic"""
+        self.metrics['batches'] += 1
+        self.metrics['messages'] += len(messages)
+        
+        by_topic: Dict[str, List[Tuple[KafkaMessage, Dict[str, Any]]]] = {}
+        for message, context in zip(messages, contexts):
+            topic = context.get('original_topic', context['topic'])
+            by_topic.setdefault(topic, []).append((message, context))
+        
+        runs = []
+        for topic, items in by_topic.items():
+            for route in self.routes.get(topic, ()):
+                targeted = [item for item in items 
+                            if self._targets(item[1], route.name) and self._accepts(route, item[1])]
+                if targeted:
+                    runs.append(self._run_route(route, targeted))
+        
+        # Collect which handlers failed for each message
+        failures: Dict[int, Tuple[KafkaMessage, Dict[str, Any], List[str], Exception]] = {}
+        for route_failures in await asyncio.gather(*runs):
+            for message, context, route_name, error in route_failures:
+                entry = failures.setdefault(id(message), (message, context, [], error))
+                entry[2].append(route_name)
+        
+        for message, context, route_names, error in failures.values():
+            await self._park(message, context, sorted(route_names), error)
+    
+    async def _park(self,
+                    message: KafkaMessage,
+                    context: Dict[str, Any],
+                    route_names: List[str],
+                    error: Exception):
+        """
+        Send a message to the group's retry tiers for the routes that failed, retrying with backoff until it is parked
+        
+        The batch is acknowledged once dispatch returns, and failing it would
+        re-run routes that already succeeded, so a message is never given up
+        on: the router stays on it, marked stalled, until the retry topic
+        accepts it or the consumer is cancelled on shutdown.
+        """
+        delay, max_delay = PARK_BACKOFF
+        while True:
+            scheduled = await self.kafka.retry_message(
+                message,
+                context,
+                error,
+                group_id=self.group_id,
+                retry_tiers=self.retry_tiers,
+                headers={TARGET_HANDLERS_HEADER: ','.join(route_names)}
+            )
+            if scheduled:
+                self.metrics['retries_scheduled'] += 1
+                self.stalled = False
+                return
+            
+            self.metrics['retry_failures'] += 1
+            self.stalled = True
+            logger.warning(f"Router {self.group_id} could not schedule a retry for {message.id}, "
+                           f"retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+    
+    @staticmethod
+    def _targets(context: Dict[str, Any], route_name: str) -> bool:
+        """Whether a (possibly retried) record should go to a route"""
+        targets = context.get('headers', {}).get(TARGET_HANDLERS_HEADER)
+        return not targets or route_name in targets.split(',')
+    
+    @staticmethod
+    def _accepts(route: Route, context: Dict[str, Any]) -> bool:
+        """Whether a route's header filter lets a record through"""
+        if route.header_filter is None:
+            return True
+        
+        try:
+            accepted = route.header_filter(context.get('headers', {}))
+        except Exception as e:
+            logger.error(f"Header filter of router handler {route.name} failed: {e}")
+            return True
+        
+        if not accepted:
+            route.metrics['filtered'] += 1
+        return accepted
+    
+    async def _run_route(self,
+                         route: Route,
+                         items: List[Tuple[KafkaMessage, Dict[str, Any]]]) -> List[Tuple[KafkaMessage, Dict[str, Any], str, Exception]]:
+        """Run one route over its messages, returning the ones that failed"""
+        start = time.perf_counter()
+        
+        if route.batch_handler:
+            try:
+                await route.batch_handler([m for m, _ in items], [c for _, c in items])
+                route.metrics['delivered'] += len(items)
+                return []
+            except Exception as e:
+                route.metrics['failed'] += len(items)
+                logger.error(f"Router handler {route.name} failed on batch of {len(items)}: {e}")
+                return [(m, c, route.name, e) for m, c in items]
+            finally:
+                route.latency.record((time.perf_counter() - start) * 1000)
+        
+        # Keep per-key order; keys run concurrently up to max_in_flight
+        lanes: Dict[Any, List[Tuple[KafkaMessage, Dict[str, Any]]]] = {}
+        for message, context in items:
+            key = context.get('key')
+            lanes.setdefault(key if key is not None else (context['topic'], context['partition']), []).append(
+                (message, context)
+            )
+        
+        failed: List[Tuple[KafkaMessage, Dict[str, Any], str, Exception]] = []
+        semaphore = asyncio.Semaphore(route.max_in_flight)
+        
+        async def run_lane(lane: List[Tuple[KafkaMessage, Dict[str, Any]]]):
+            async with semaphore:
+                for message, context in lane:
+                    handler_start = time.perf_counter()
+                    try:
+                        await route.message_handler(message, context)
+                        route.metrics['delivered'] += 1
+                    except Exception as e:
+                        route.metrics['failed'] += 1
+                        logger.error(f"Router handler {route.name} failed on {message.id}: {e}")
+                        failed.append((message, context, route.name, e))
+                    finally:
+                        route.latency.record((time.perf_counter() - handler_start) * 1000)
+        
+        await asyncio.gather(*(run_lane(lane) for lane in lanes.values()))
+        return failed
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-route delivery counts and handler latency"""
+        return {
+            'group_id': self.group_id,
+            'consumer_id': self.consumer_id,
+            'topics': sorted(self.routes),
+            'stalled': self.stalled,
+            'routes': {
+                route.name: {
+                    'topic': route.topic,
+                    'handler_latency': route.latency.snapshot(),
+                    **route.metrics
+                }
+                for routes in self.routes.values()
+                for route in routes
+            },
+            **self.metrics
+        }